@@ -1,16 +1,21 @@
 import jwt
+import os
+import time
 from fastapi import Depends, HTTPException, status, APIRouter
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event
 from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
 
 from database import get_db
 from schemas import TokenData, UserResponse
 from models import User
+from auth.hashing import verify_password, get_password_hash
+from cache.lru import TTLCache
 
 # to get a string like this run:
 # openssl rand -hex 32
@@ -18,16 +23,31 @@ SECRET_KEY = "6fbf284513566fa642e0d1b26ba20d30cfa2eccaaf270a6edbde3507c5a2c586"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 router = APIRouter()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# token já validado -> identidade do usuário, para as requisições autenticadas do
+# painel não repetirem o SELECT User. Cada entrada expira junto com o token (exp)
+# e é removida quando a linha do usuário é alterada ou apagada (eventos abaixo).
+token_users = TTLCache(
+    "token_users",
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("USER_CACHE_TTL", 300)),
+)
+CACHED_USER_COLUMNS = ("user_id", "username", "email", "is_active")
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_token_users(mapper, connection, target):
+    token_users.discard_where(lambda identity: identity["user_id"] == target.user_id)
+
+async def _attach_cached_user(db: AsyncSession, identity: dict) -> User:
+    # recria o User como se tivesse vindo do banco e o coloca na sessão da requisição
+    # sem SELECT, assim `user in lab.users` e lab.users.append(user) continuam funcionando
+    user = User(**identity)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
 
 async def get_user(db: AsyncSession, username: str):
     result = await db.execute(select(User).filter(User.username == username))
@@ -54,7 +74,7 @@ async def authenticate_user(db: AsyncSession, username: str, password: str):
     user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -74,6 +94,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    identity = token_users.get(token)
+    if identity is not None:
+        return await _attach_cached_user(db, identity)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -86,6 +110,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     user = await get_user(db, token_data.username)
     if user is None:
         raise credentials_exception
+    token_users.set(
+        token,
+        {column: getattr(user, column) for column in CACHED_USER_COLUMNS},
+        expires_at=time.monotonic() + payload["exp"] - time.time() if "exp" in payload else None,
+    )
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
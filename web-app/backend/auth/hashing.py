@@ -0,0 +1,139 @@
+"""Hash e verificação de senha (bcrypt) fora do event loop.
+
+Cada hash do bcrypt leva centenas de ms de CPU. Chamado direto num handler async,
+ele trava o event loop inteiro e os logins do início da aula passam a ser
+atendidos em fila. Aqui o trabalho vai para um pool limitado:
+
+PASSWORD_HASH_EXECUTOR
+    "thread" (padrão): ThreadPoolExecutor. Precisa do pacote bcrypt, que libera
+    o GIL. O backend os_crypt do passlib segura o GIL durante o hash.
+    "process": ProcessPoolExecutor, funciona com qualquer backend.
+    "inline": roda no próprio event loop (comportamento antigo, usado para comparação).
+PASSWORD_HASH_WORKERS
+    Tamanho do pool. Padrão: número de CPUs.
+CREDENTIAL_CACHE_SIZE / CREDENTIAL_CACHE_TTL
+    Cache de verificações bem-sucedidas usado por verify_password_cached
+    (entradas / segundos). 0 desliga.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from cache.lru import TTLCache
+from monitoring.metrics import counter, gauge, histogram
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+hash_in_flight = gauge("password_hash_in_flight", "Hashes bcrypt enviados ao pool e ainda não terminados.")
+hash_queue_depth = gauge("password_hash_queue_depth", "Hashes bcrypt esperando um worker livre.")
+hash_workers = gauge("password_hash_workers", "Tamanho do pool de hash de senha.")
+hash_total = counter("password_hash_total", "Operações de hash de senha, por tipo (hash/verify).")
+hash_wait_seconds = histogram("password_hash_wait_seconds", "Tempo na fila até um worker pegar o hash.")
+hash_seconds = histogram("password_hash_seconds", "Tempo total do hash de senha, fila incluída.")
+
+# os estudantes logam várias vezes por dia no mesmo lab e o desktop sempre manda a
+# mesma senha, então verificações repetidas não precisam pagar o bcrypt de novo.
+# A chave é um HMAC (segredo aleatório do processo) de (sujeito, hash salvo, senha
+# digitada): a senha não fica guardada e um password_hash novo nunca acerta a entrada antiga.
+verified_credentials = TTLCache(
+    "verified_credentials",
+    maxsize=int(os.getenv("CREDENTIAL_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("CREDENTIAL_CACHE_TTL", 3600)),
+)
+_credential_key = secrets.token_bytes(32)
+
+_executor: Executor | None = None
+_executor_kind = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+_workers = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _timed(fn, *args):
+    # time.monotonic é o mesmo relógio em todos os processos, serve também para o ProcessPoolExecutor
+    return time.monotonic(), fn(*args)
+
+def configure_executor(kind: str | None = None, workers: int | None = None):
+    """Troca o tipo/tamanho do pool (o anterior é encerrado)."""
+    global _executor_kind, _workers
+    kind = kind or _executor_kind
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"PASSWORD_HASH_EXECUTOR inválido: {kind} (use {', '.join(EXECUTOR_KINDS)})")
+    shutdown_executor()
+    _executor_kind = kind
+    _workers = max(1, workers or _workers)
+
+def get_executor() -> Executor | None:
+    global _executor
+    if _executor is None and _executor_kind != "inline":
+        if _executor_kind == "process":
+            _executor = ProcessPoolExecutor(max_workers=_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="password-hash")
+        hash_workers.set(_workers)
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+async def _run(operation: str, fn, *args):
+    hash_total.inc(operation=operation)
+    executor = get_executor()
+    submitted = time.monotonic()
+    if executor is None:
+        result = fn(*args)
+        hash_seconds.observe(time.monotonic() - submitted)
+        return result
+
+    hash_in_flight.inc()
+    hash_queue_depth.set(max(0, hash_in_flight.value() - _workers))
+    try:
+        started, result = await asyncio.get_running_loop().run_in_executor(executor, _timed, fn, *args)
+    finally:
+        hash_in_flight.dec()
+        hash_queue_depth.set(max(0, hash_in_flight.value() - _workers))
+    hash_wait_seconds.observe(max(0.0, started - submitted))
+    hash_seconds.observe(time.monotonic() - submitted)
+    return result
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run("verify", _verify, plain_password, hashed_password)
+
+def _credential_digest(subject: str, plain_password: str, hashed_password: str) -> bytes:
+    message = "\0".join((subject, hashed_password, plain_password)).encode()
+    return hmac.new(_credential_key, message, hashlib.sha256).digest()
+
+async def verify_password_cached(subject: str, plain_password: str, hashed_password: str) -> bool:
+    """verify_password que lembra as verificações bem-sucedidas de `subject` (ex: "student:12")."""
+    if not verified_credentials.enabled:
+        return await verify_password(plain_password, hashed_password)
+    digest = _credential_digest(subject, plain_password, hashed_password)
+    if verified_credentials.get(digest):
+        return True
+    verified = await verify_password(plain_password, hashed_password)
+    if verified:
+        verified_credentials.set(digest, True)
+    return verified
+
+async def get_password_hash(password: str) -> str:
+    return await _run("hash", _hash, password)
+
+def hash_password_sync(password: str) -> str:
+    """Hash direto no thread atual, para scripts fora dos handlers (ex: harness/dataset.py)."""
+    return _hash(password)
+
+configure_executor()
@@ -0,0 +1,36 @@
+"""Verificação de "o usuário X é membro do lab Y".
+
+Um EXISTS no índice (lab_id, user_id) de user_lab_association, sem carregar o
+lab nem a lista de usuários. O resultado fica guardado em `db.info` e vale até
+o fim da requisição (cada requisição tem a própria AsyncSession), então os
+handlers podem conferir de novo sem repetir a query.
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import User, user_lab_association
+
+_MEMO_KEY = "lab_membership"
+
+def _memo(db: AsyncSession) -> dict:
+    return db.info.setdefault(_MEMO_KEY, {})
+
+async def is_lab_member(lab_id: str, user: User, db: AsyncSession) -> bool:
+    memo = _memo(db)
+    key = (lab_id, user.user_id)
+    if key not in memo:
+        result = await db.execute(select(exists().where(
+            user_lab_association.c.lab_id == lab_id, user_lab_association.c.user_id == user.user_id
+        )))
+        memo[key] = bool(result.scalar())
+    return memo[key]
+
+async def verify_lab_member(lab_id: str, user: User, db: AsyncSession):
+    if not await is_lab_member(lab_id, user, db):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operação não autorizada")
+
+def remember_lab_member(lab_id: str, user: User, db: AsyncSession, member: bool = True):
+    """Atualiza o valor guardado depois de uma escrita na mesma requisição (ex.: join_lab)."""
+    _memo(db)[(lab_id, user.user_id)] = member
@@ -0,0 +1,72 @@
+"""Micro-benchmark da resolução do usuário autenticado (get_current_user).
+
+Simula as requisições do painel: cada iteração abre uma sessão, resolve o token
+como a dependência do FastAPI faria e fecha a sessão. Compara o cache de tokens
+desligado (decode do JWT + SELECT User toda vez) com o cache ligado.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_current_user --requests 2000
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/postgres python -m benchmarks.bench_current_user --backend postgres
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from auth.auth_handler import create_access_token, get_current_user, token_users
+from database import build_engine
+from models import Base, User
+from harness.throwaway_db import throwaway_database
+
+async def measure(name: str, session_factory, token: str, requests: int, statements: list) -> dict:
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(requests):
+        async with session_factory() as db:
+            await get_current_user(token=token, db=db)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": name,
+        "requests": requests,
+        "us_per_request": round(elapsed / requests * 1e6, 1),
+        "sql_per_request": round(len(statements) / requests, 2),
+    }
+
+async def main(backend: str, requests: int):
+    async with throwaway_database(backend) as url:
+        print(f"banco: {url}")
+        engine = build_engine(url)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(User(username="prof", email="prof@ifba.edu.br", hashed_password="x"))
+            await db.commit()
+        token = create_access_token({"sub": "prof"}, expires_delta=timedelta(minutes=30))
+
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        maxsize = token_users.maxsize
+        token_users.maxsize = 0
+        without = await measure("sem cache", session_factory, token, requests, statements)
+        token_users.maxsize = maxsize
+        token_users.clear()
+        cached = await measure("com cache", session_factory, token, requests, statements)
+        await engine.dispose()
+
+    print(without)
+    print(cached)
+    print(f"speedup: {without['us_per_request'] / cached['us_per_request']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["auto", "postgres", "sqlite"], default="sqlite")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.backend, args.requests))
@@ -0,0 +1,127 @@
+"""Benchmark do custo de serializar as listagens (responses.py).
+
+Para cada response_model das listagens monta --rows modelos e mede só a
+serialização, do retorno do handler até os bytes do corpo:
+
+    fastapi+json      caminho padrão: valida de novo + jsonable + json.dumps
+    fastapi+orjson    o mesmo com ORJSONResponse (JSON_RESPONSE=orjson, rotas sem typed_response)
+    fastapi+pydantic  o mesmo com PydanticJSONResponse (JSON_RESPONSE=pydantic)
+    typed_response    TypeAdapter(response_model).dump_json, usado nas listagens
+
+Resultados em ms por 10 mil linhas (melhor de --repeat).
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_json_response
+    python -m benchmarks.bench_json_response --rows 50000 --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from models import StateCleanliness
+from responses import PydanticJSONResponse, _adapter
+from schemas import (
+    LastSessionResponse, MachineConfigResponse, SessionResponse, StudentResponse, TaskResponse
+)
+
+START = datetime(2025, 3, 1, 7, 0)
+
+def sessions(n: int):
+    return [
+        SessionResponse(
+            student_name=f"aluno{i:05d}", class_var="INFO1",
+            session_start=(START + timedelta(minutes=i)).strftime("%d/%m/%Y %H:%M:%S"),
+            cpu_usage=12.5 + i % 50, ram_usage=40.0, cpu_temp=55.0, machine_name=f"PC-{i % 40:02d}",
+            lab_name="Laboratório de Informática 1",
+        )
+        for i in range(n)
+    ]
+
+def students(n: int):
+    return [
+        StudentResponse(
+            student_id=i, student_name=f"aluno{i:05d}", student_password="$2b$12$" + "x" * 53, class_var="INFO1",
+            last_session=LastSessionResponse(
+                session_id=i, session_start=START + timedelta(minutes=i), lab_id="LAB01", machine_key=f"key-{i % 40}"
+            ),
+        )
+        for i in range(n)
+    ]
+
+def tasks(n: int):
+    return [
+        TaskResponse(
+            task_id=i, task_name=f"Tarefa {i}", task_description="Limpar teclados e mouses", is_complete=i % 2 == 0,
+            machine_keys=[f"key-{j}" for j in range(3)], machine_names=[f"PC-{j:02d}" for j in range(3)],
+            task_creation=START + timedelta(hours=i),
+        )
+        for i in range(n)
+    ]
+
+def machines(n: int):
+    return [
+        MachineConfigResponse(
+            machine_key=f"key-{i}", motherboard="ASUS H110M", machine_name=f"PC-{i:05d}",
+            state_cleanliness=StateCleanliness.BOM, last_checked="01/02/2025",
+        )
+        for i in range(n)
+    ]
+
+LISTS = {
+    "SessionResponse": (SessionResponse, sessions),
+    "StudentResponse": (StudentResponse, students),
+    "TaskResponse": (TaskResponse, tasks),
+    "MachineConfigResponse": (MachineConfigResponse, machines),
+}
+
+def fastapi_path(response_class):
+    async def serialize(field, annotation, items) -> bytes:
+        content = await serialize_response(field=field, response_content=items)
+        return response_class(content).body
+    return serialize
+
+async def typed_path(field, annotation, items) -> bytes:
+    return _adapter(annotation).dump_json(items)
+
+PATHS = {
+    "fastapi+json": fastapi_path(JSONResponse),
+    "fastapi+orjson": fastapi_path(ORJSONResponse),
+    "fastapi+pydantic": fastapi_path(PydanticJSONResponse),
+    "typed_response": typed_path,
+}
+
+async def main(rows: int, repeat: int):
+    for name, (model, build) in LISTS.items():
+        annotation = List[model]
+        field = create_model_field(name="Response_" + name, type_=annotation, mode="serialization")
+        items = build(rows)
+        result = {"model": name, "rows": rows}
+        reference = None
+        for path_name, serialize in PATHS.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = await serialize(field, annotation, items)
+                best = min(best, time.perf_counter() - start)
+            result[path_name] = round(best * 1000 * 10_000 / rows, 1)
+            # todos os caminhos precisam gerar o mesmo JSON
+            decoded = json.loads(body)
+            if reference is None:
+                reference = decoded
+            elif decoded != reference:
+                raise AssertionError(f"{path_name} gerou um corpo diferente para {name}")
+        print(result)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Linhas por listagem.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições, vale a melhor.")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,94 @@
+"""Teste de carga do login de estudantes com bcrypt real (auth/hashing.py).
+
+Dispara --clients logins simultâneos (post_new_session, como no início da aula)
+para cada configuração do pool de hash e mede a latência p50/p95/p99 por login e
+o maior atraso do event loop. O cache de credenciais é limpo antes de cada rodada,
+e uma última rodada com o cache já preenchido mostra o login repetido. No modo "inline" (hash no próprio event loop) os
+logins são atendidos em série e o loop fica travado. Com o pool, o tempo da rodada
+cai proporcionalmente ao número de workers até o limite de CPUs da máquina.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_login_latency --clients 40
+    python -m benchmarks.bench_login_latency --modes thread --workers 1,2,4,8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from auth import hashing
+from benchmarks.common import classroom, login_payload, percentile, seat
+from database import build_engine
+from harness.dataset import generate
+from schemas import SessionCreate
+from session.session_handler import post_new_session
+from harness.throwaway_db import throwaway_database
+
+async def one_login(session_factory, spec, i: int, stamp: str) -> float:
+    payload = SessionCreate(**login_payload(spec, i, stamp))
+    start = time.perf_counter()
+    async with session_factory() as db:
+        await post_new_session(machine_key=seat(spec, i), session=payload, db=db)
+    return time.perf_counter() - start
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+async def run(session_factory, spec, mode: str, workers: int, clients: int, round_no: int, warm_cache: bool = False) -> dict:
+    hashing.configure_executor(mode, workers)
+    if not warm_cache:
+        hashing.verified_credentials.clear()
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(one_login(session_factory, spec, i, f"01/03/2025 07:{round_no:02d}:00") for i in range(clients))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    hashing.shutdown_executor()
+    return {
+        "mode": mode + (" (cache)" if warm_cache else ""),
+        "workers": workers if mode != "inline" else 0,
+        "clients": clients,
+        "seconds": round(elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000),
+        "p95_ms": round(percentile(latencies, 95) * 1000),
+        "p99_ms": round(percentile(latencies, 99) * 1000),
+        "max_loop_lag_ms": round(lag * 1000),
+    }
+
+async def main(clients: int, modes: list[str], workers: list[int]):
+    print(f"cpus: {os.cpu_count()}, backend bcrypt: {hashing.pwd_context.handler('bcrypt').get_backend()}")
+    async with throwaway_database("sqlite") as url:
+        engine = build_engine(url)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        spec = classroom(clients)
+        await generate(engine, spec)
+
+        round_no = 0
+        for mode in modes:
+            for n in (workers if mode != "inline" else [1]):
+                print(await run(session_factory, spec, mode, n, clients, round_no))
+                round_no += 1
+        print(await run(session_factory, spec, modes[-1], workers[-1], clients, round_no, warm_cache=True))
+        await engine.dispose()
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=40, help="Logins simultâneos.")
+    parser.add_argument("--modes", default="inline,thread,process", help="Tipos de pool, separados por vírgula.")
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, cpus})),
+                        help="Tamanhos de pool a testar, separados por vírgula.")
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.modes.split(","), [int(n) for n in args.workers.split(",")]))
@@ -0,0 +1,97 @@
+"""Benchmark de N chamadas a post_new_session contra um único post_session_batch.
+
+Simula um cliente que ficou offline e envia o backlog de sessões: primeiro uma a
+uma (como o endpoint /session/new), depois tudo em um lote (/session/batch).
+Conta também quantos comandos SQL cada caminho mandou para o banco.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_session_batch --sessions 500
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/postgres python -m benchmarks.bench_session_batch --backend postgres
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import session.session_handler as session_handler
+from benchmarks.common import classroom, login_payload, seat, skip_password_checks
+from database import build_engine
+from harness.dataset import generate
+from schemas import SessionCreate, SessionBatchCreate, SessionBatchItem, MAX_SESSION_BATCH
+from harness.throwaway_db import throwaway_database
+
+MACHINES = 40
+STUDENTS = 200
+
+def backlog(spec, sessions: int, day: int) -> list[SessionBatchItem]:
+    start = datetime(2025, 3, day, 7, 0)
+    return [
+        SessionBatchItem(
+            machine_key=seat(spec, i),
+            **login_payload(spec, i % spec.students, (start + timedelta(minutes=i)).strftime("%d/%m/%Y %H:%M:%S")),
+        )
+        for i in range(sessions)
+    ]
+
+async def run_single(session_factory, items):
+    for item in items:
+        async with session_factory() as db:
+            await session_handler.post_new_session(
+                machine_key=item.machine_key,
+                session=SessionCreate(**item.model_dump(exclude={"machine_key"})),
+                db=db,
+            )
+
+async def run_batch(session_factory, items):
+    for i in range(0, len(items), MAX_SESSION_BATCH):
+        async with session_factory() as db:
+            response = await session_handler.post_session_batch(
+                batch=SessionBatchCreate(sessions=items[i:i + MAX_SESSION_BATCH]), db=db
+            )
+            assert response.created == len(response.results)
+
+async def measure(name, fn, session_factory, items, statements) -> dict:
+    statements.clear()
+    start = time.perf_counter()
+    await fn(session_factory, items)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": name,
+        "sessions": len(items),
+        "seconds": round(elapsed, 3),
+        "sessions_per_sec": round(len(items) / elapsed, 1),
+        "sql_statements": len(statements),
+    }
+
+async def main(backend: str, sessions: int):
+    skip_password_checks()
+
+    async with throwaway_database(backend) as url:
+        print(f"banco: {url}")
+        engine = build_engine(url)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        spec = classroom(MACHINES, STUDENTS)
+        await generate(engine, spec)
+
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        single = await measure("single", run_single, session_factory, backlog(spec, sessions, 1), statements)
+        batch = await measure("batch", run_batch, session_factory, backlog(spec, sessions, 2), statements)
+        await engine.dispose()
+
+    print(single)
+    print(batch)
+    print(f"speedup: {single['seconds'] / batch['seconds']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["auto", "postgres", "sqlite"], default="sqlite")
+    parser.add_argument("--sessions", type=int, default=500, help="Tamanho do backlog enviado.")
+    args = parser.parse_args()
+    asyncio.run(main(args.backend, args.sessions))
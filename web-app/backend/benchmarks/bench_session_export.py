@@ -0,0 +1,89 @@
+"""Benchmark da exportação de sessões (session/export.py) contra a listagem completa.
+
+Popula um lab com --rows sessões em um SQLite temporário e, em um processo
+separado para cada modo (para o pico de memória de um não contaminar o outro), mede:
+  csv / ndjson  gerador do /session/lab/{lab_id}/export consumido até o fim
+  list          get_sessions_for_lab sem limite + serialização JSON da lista inteira
+
+No perfil "production" o pico de RSS inclui as páginas do banco mapeadas pelo
+mmap_size do SQLite (até 256 MiB), com DB_PROFILE=default sobra só o processo.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_session_export --rows 1000000
+    python -m benchmarks.bench_session_export --rows 200000 --modes csv,list
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import classroom, seed
+from database import build_engine
+from harness.dataset import lab_id
+from schemas import SessionResponse
+from session.session_handler import export_sessions_for_lab, get_sessions_for_lab
+
+MACHINES = 40
+STUDENTS = 500
+LAB = lab_id(classroom(MACHINES, STUDENTS), 0)
+
+async def run_mode(url: str, mode: str) -> dict:
+    engine = build_engine(url)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    start = time.perf_counter()
+    size = 0
+    async with session_factory() as db:
+        if mode == "list":
+            page = await get_sessions_for_lab(lab_id=LAB, db=db)
+            size = len(TypeAdapter(List[SessionResponse]).dump_json(page.items))
+        else:
+            stream = await export_sessions_for_lab(
+                lab_id=LAB, export_format=mode, db=db, session_factory=session_factory
+            )
+            async for chunk in stream:
+                size += len(chunk.encode())
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "mb": round(size / 2**20, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+def main(rows: int, modes: list[str]):
+    with tempfile.TemporaryDirectory(prefix="infodomus_export_") as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        start = time.perf_counter()
+        asyncio.run(seed(url, classroom(MACHINES, STUDENTS, rows)))
+        print(f"{rows} sessões geradas em {time.perf_counter() - start:.1f}s")
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_session_export", "--worker", mode, "--url", url],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["rows"] = rows
+            print(result)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", default="csv,ndjson,list")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(asyncio.run(run_mode(args.url, args.worker))))
+    else:
+        main(args.rows, args.modes.split(","))
@@ -0,0 +1,73 @@
+"""Benchmark de inserção concorrente de sessões (início de aula).
+
+Simula N máquinas chamando post_new_session ao mesmo tempo contra um banco
+SQLite em arquivo, comparando os perfis de engine definidos em database.py.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_session_insert --clients 40 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import classroom, login_payload, seat, skip_password_checks
+from database import build_engine, SQLITE_PROFILES
+from harness.dataset import generate
+from schemas import SessionCreate
+from session.session_handler import post_new_session
+
+async def one_login(session_factory, spec, i: int, stamp: str):
+    payload = SessionCreate(**login_payload(spec, i, stamp))
+    async with session_factory() as db:
+        await post_new_session(machine_key=seat(spec, i), session=payload, db=db)
+
+async def run_profile(profile_name: str, clients: int, rounds: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = build_engine(url, profile_name)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        spec = classroom(clients)
+        await generate(engine, spec)
+
+        ok = errors = 0
+        elapsed = 0.0
+        for r in range(rounds):
+            stamp = f"01/03/2025 07:{r:02d}:00"
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(one_login(session_factory, spec, i, stamp) for i in range(clients)),
+                return_exceptions=True,
+            )
+            elapsed += time.perf_counter() - start
+            for res in results:
+                if isinstance(res, Exception):
+                    errors += 1
+                else:
+                    ok += 1
+        await engine.dispose()
+
+    return {
+        "profile": profile_name,
+        "inserts": ok,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "inserts_per_sec": round(ok / elapsed, 1) if elapsed else 0.0,
+    }
+
+async def main(clients: int, rounds: int):
+    skip_password_checks()
+
+    for profile_name in SQLITE_PROFILES:
+        print(await run_profile(profile_name, clients, rounds))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=40, help="Máquinas simultâneas por rodada.")
+    parser.add_argument("--rounds", type=int, default=5, help="Quantidade de rodadas.")
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.rounds))
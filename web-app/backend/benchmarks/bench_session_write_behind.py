@@ -0,0 +1,93 @@
+"""Benchmark do /session/new síncrono contra o write-behind (session/write_behind.py).
+
+Mesmo cenário do bench_session_insert (perfil production, bcrypt fora da medida):
+N máquinas logam ao mesmo tempo por rodada. Mostra a latência de cada login até
+a resposta e, no write-behind, quanto tempo a fila leva para chegar ao banco.
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_session_write_behind --clients 40 --rounds 5
+    python -m benchmarks.bench_session_write_behind --journal   # com journal em arquivo
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import classroom, login_payload, percentile, seat, skip_password_checks
+from database import build_engine
+from harness.dataset import generate
+from models import Session
+from schemas import SessionCreate
+from session.session_handler import post_new_session, queue_new_session
+from session.write_behind import SessionWriter
+import session.session_handler as session_handler
+
+async def one_login(session_factory, handler, spec, i: int, stamp: str) -> float:
+    payload = SessionCreate(**login_payload(spec, i, stamp))
+    start = time.perf_counter()
+    async with session_factory() as db:
+        await handler(machine_key=seat(spec, i), session=payload, db=db)
+    return time.perf_counter() - start
+
+async def run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = build_engine(url, "production")
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        spec = classroom(args.clients)
+        await generate(engine, spec)
+
+        handler = post_new_session
+        if mode == "write_behind":
+            session_handler.session_writer = SessionWriter(
+                enabled=True, queue_size=10000, batch_size=args.batch, flush_ms=args.flush_ms, drain_timeout=60,
+                journal_path=os.path.join(tmp, "sessions.journal") if args.journal else None,
+            )
+            await session_handler.session_writer.start(session_factory)
+            handler = queue_new_session
+
+        latencies = []
+        start = time.perf_counter()
+        for r in range(args.rounds):
+            stamp = f"01/03/2025 07:{r:02d}:00"
+            latencies += await asyncio.gather(
+                *(one_login(session_factory, handler, spec, i, stamp) for i in range(args.clients))
+            )
+        accepted = time.perf_counter() - start
+        if mode == "write_behind":
+            await session_handler.session_writer.stop()
+        stored = time.perf_counter() - start
+
+        async with session_factory() as db:
+            rows = (await db.execute(select(func.count()).select_from(Session))).scalar_one()
+        await engine.dispose()
+
+    return {
+        "mode": mode + (" + journal" if mode == "write_behind" and args.journal else ""),
+        "sessions": rows,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "accepted_s": round(accepted, 3),
+        "stored_s": round(stored, 3),
+    }
+
+async def main(args):
+    skip_password_checks()
+    for mode in ("sync", "write_behind"):
+        print(await run_mode(mode, args))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=40, help="Máquinas simultâneas por rodada.")
+    parser.add_argument("--rounds", type=int, default=5, help="Quantidade de rodadas.")
+    parser.add_argument("--batch", type=int, default=200, help="SESSION_WRITE_BATCH")
+    parser.add_argument("--flush-ms", type=float, default=100, help="SESSION_WRITE_FLUSH_MS")
+    parser.add_argument("--journal", action="store_true", help="Liga o journal (SESSION_WRITE_JOURNAL).")
+    asyncio.run(main(parser.parse_args()))
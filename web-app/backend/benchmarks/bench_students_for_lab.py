@@ -0,0 +1,94 @@
+"""Benchmark do get_students_for_lab antigo (selectinload + loop) contra a query nova.
+
+Para cada tamanho em --sizes, gera um SQLite temporário com esse total de
+sessões espalhadas por LABS labs e mede a listagem de alunos do primeiro lab:
+  legacy   implementação anterior: carrega todas as sessões do lab e os alunos
+  full     query com CTE recursiva, lista completa
+  page     query com CTE recursiva, primeira página de --limit alunos
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_students_for_lab
+    python -m benchmarks.bench_students_for_lab --sizes 10000,100000,1000000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from benchmarks.common import classroom
+from config.lab_handler import get_students_for_lab
+from database import build_engine
+from harness.dataset import generate, lab_id
+from models import Lab, Session
+from student.pagination import StudentPage
+
+LABS = 4
+MACHINES_PER_LAB = 40
+STUDENTS = 800
+
+async def legacy_students_for_lab(lab_id: str, db: AsyncSession) -> int:
+    result = await db.execute(
+        select(Lab).where(Lab.lab_id == lab_id).options(selectinload(Lab.sessions).selectinload(Session.student))
+    )
+    lab = result.scalars().first()
+    sessions_by_student = {}
+    for session in lab.sessions:
+        current_latest = sessions_by_student.get(session.student.student_id)
+        if current_latest is None or session.session_start > current_latest.session_start:
+            sessions_by_student[session.student.student_id] = session
+    return len(sessions_by_student)
+
+def spec_for(sessions: int):
+    return replace(classroom(MACHINES_PER_LAB, STUDENTS, sessions), labs=LABS)
+
+async def timed(session_factory, fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        async with session_factory() as db:
+            start = time.perf_counter()
+            await fn(db)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+async def run_size(sessions: int, limit: int, repeat: int, skip_legacy: bool):
+    with tempfile.TemporaryDirectory(prefix="infodomus_students_") as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        spec = spec_for(sessions)
+        await generate(engine, spec)
+        lab = lab_id(spec, 0)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            students = await get_students_for_lab(lab_id=lab, db=db)
+            if not skip_legacy:
+                assert await legacy_students_for_lab(lab, db) == len(students.items)
+
+        row = {"sessions": sessions, "students_in_lab": len(students.items)}
+        if not skip_legacy:
+            row["legacy_ms"] = round(await timed(session_factory, lambda db: legacy_students_for_lab(lab, db), repeat), 1)
+        row["full_ms"] = round(await timed(
+            session_factory, lambda db: get_students_for_lab(lab_id=lab, db=db), repeat), 1)
+        row["page_ms"] = round(await timed(
+            session_factory, lambda db: get_students_for_lab(lab_id=lab, db=db, page=StudentPage(limit=limit)), repeat), 1)
+        await engine.dispose()
+    print(row)
+
+async def main(sizes: list[int], limit: int, repeat: int, legacy_max: int):
+    for sessions in sizes:
+        await run_size(sessions, limit, repeat, skip_legacy=sessions > legacy_max)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Totais de sessões, separados por vírgula.")
+    parser.add_argument("--limit", type=int, default=50, help="Tamanho da página no modo page.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=400_000, help="Acima disso não roda o legacy.")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",")], args.limit, args.repeat, args.legacy_max))
@@ -0,0 +1,122 @@
+"""Benchmark da leitura e escrita de datas por linha (timestamps.py).
+
+Parte 1, só a leitura de um session_start:
+    strptime            o que schemas/models faziam antes (uma vez em cada)
+    parse_legacy        leitura por fatias, sem cache
+    parse_legacy+cache  leitura por fatias com cache (logins no mesmo horário)
+    fromisoformat/epoch formatos novos negociados
+
+Parte 2, o ciclo de uma sessão do login até a listagem:
+    antes   SessionCreate valida com strptime, o models.py faz strptime de novo,
+            a listagem faz strftime e o SessionResponse valida com strptime
+    agora   SessionCreate lê uma vez (datetime), o models.py recebe o datetime e
+            a listagem monta o SessionResponse sem validar e formata ao serializar
+
+Resultados em µs por linha (melhor de --repeat).
+
+Uso (dentro de web-app/backend):
+    python -m benchmarks.bench_timestamps
+    python -m benchmarks.bench_timestamps --rows 200000 --distinct 50
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter, field_validator
+
+from schemas import SessionResponse
+from timestamps import LEGACY_DATETIME, parse_legacy, parse_timestamp
+
+START = datetime(2025, 3, 1, 7, 0)
+
+def best_per_row(fn, values, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(values) * 1_000_000, 3)
+
+def parse_all(parse):
+    def run(values):
+        for value in values:
+            parse(value)
+    return run
+
+def cached_legacy(values):
+    parse_legacy.cache_clear()
+    for value in values:
+        parse_legacy(value)
+
+class OldSessionResponse(BaseModel):
+    # SessionResponse como era antes: session_start em texto, validado com strptime
+    student_name: str
+    class_var: str
+    session_start: str
+    cpu_usage: float
+    ram_usage: float
+    cpu_temp: float
+    machine_name: str
+    lab_name: str
+
+    @field_validator("session_start")
+    def validate_datetime_format(cls, value):
+        datetime.strptime(value, LEGACY_DATETIME)
+        return value
+
+_old_sessions = TypeAdapter(List[OldSessionResponse])
+_sessions = TypeAdapter(List[SessionResponse])
+
+def old_cycle(values):
+    rows = []
+    for value in values:
+        datetime.strptime(value, LEGACY_DATETIME) # SessionCreate
+        stored = datetime.strptime(value, LEGACY_DATETIME) # @validates do models.py
+        rows.append(OldSessionResponse( # _to_session_response
+            session_start=stored.strftime(LEGACY_DATETIME), student_name="aluno", class_var="INFO1", cpu_usage=1.0,
+            ram_usage=1.0, cpu_temp=1.0, machine_name="PC-01", lab_name="Lab 1",
+        ))
+    return _old_sessions.dump_json(rows)
+
+def new_cycle(values):
+    parse_legacy.cache_clear()
+    rows = []
+    for value in values:
+        stored = parse_timestamp(value) # SessionCreate; o models.py recebe o datetime pronto
+        rows.append(SessionResponse.model_construct(
+            session_start=stored, student_name="aluno", class_var="INFO1", cpu_usage=1.0, ram_usage=1.0,
+            cpu_temp=1.0, machine_name="PC-01", lab_name="Lab 1",
+        ))
+    return _sessions.dump_json(rows) # formata na serialização
+
+def main(rows: int, distinct: int, repeat: int):
+    stamps = [START + timedelta(minutes=i % distinct) for i in range(rows)]
+    legacy = [stamp.strftime(LEGACY_DATETIME) for stamp in stamps]
+    iso = [stamp.isoformat() for stamp in stamps]
+    epoch = [stamp.timestamp() for stamp in stamps]
+
+    print({
+        "rows": rows,
+        "distinct": distinct,
+        "strptime": best_per_row(parse_all(lambda v: datetime.strptime(v, LEGACY_DATETIME)), legacy, repeat),
+        "parse_legacy": best_per_row(parse_all(parse_legacy.__wrapped__), legacy, repeat),
+        "parse_legacy+cache": best_per_row(cached_legacy, legacy, repeat),
+        "fromisoformat": best_per_row(parse_all(parse_timestamp), iso, repeat),
+        "epoch": best_per_row(parse_all(parse_timestamp), epoch, repeat),
+    })
+    print({
+        "rows": rows,
+        "cycle_before": best_per_row(old_cycle, legacy, repeat),
+        "cycle_now": best_per_row(new_cycle, legacy, repeat),
+        "cycle_now_distinct": best_per_row(new_cycle, [s.strftime(LEGACY_DATETIME) for s in
+                                                       (START + timedelta(seconds=i) for i in range(rows))], repeat),
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="Linhas por medição.")
+    parser.add_argument("--distinct", type=int, default=240, help="Horários diferentes entre as linhas.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições, vale a melhor.")
+    args = parser.parse_args()
+    main(args.rows, args.distinct, args.repeat)
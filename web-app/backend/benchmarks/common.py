@@ -0,0 +1,89 @@
+"""Peças comuns dos benchmarks de login e sessões.
+
+Os dados vêm do harness.dataset: classroom() é a spec de um lab só (LAB0000),
+seat() a máquina do i-ésimo desktop e login_payload() o corpo do /session/new
+de um aluno gerado, com a senha e a turma certas. free_port() e wait_ready()
+servem aos testes de carga que sobem o uvicorn em outro processo.
+
+Os módulos do backend são importados dentro das funções: o load_classroom
+--in-process só ajusta o os.environ depois de importar este módulo, e o backend
+lê as variáveis no import. O httpx também só entra em wait_ready(), para os
+bench_*.py rodarem só com o requirements.txt.
+"""
+import asyncio
+import socket
+import statistics
+import subprocess
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+    from harness.dataset import DatasetSpec
+
+API_KEY = "load-test"
+CLIENT_TIMEOUT = 10 # mesmo timeout do desktop-app (api.py)
+
+def classroom(machines: int, students: int | None = None, sessions: int = 0, **fields) -> "DatasetSpec":
+    """Um lab com `machines` máquinas, `students` alunos (padrão: um por máquina) e `sessions` de histórico."""
+    from harness.dataset import DatasetSpec
+
+    return DatasetSpec(**{
+        "labs": 1, "machines_per_lab": machines, "students": students or machines, "sessions": sessions,
+        "users_per_lab": 1, "tasks_per_lab": 0, "prefix": "LAB", **fields,
+    })
+
+def seat(spec: "DatasetSpec", i: int) -> str:
+    from harness.dataset import machine_key
+
+    return machine_key(spec, 0, i % spec.machines_per_lab)
+
+def login_payload(spec: "DatasetSpec", student: int, session_start: str) -> dict:
+    from harness.dataset import lab_id, student_class_var, student_name
+
+    return dict(
+        student_name=student_name(spec, student), password=spec.password, class_var=student_class_var(spec, student),
+        session_start=session_start, cpu_usage=12.5, ram_usage=40.0, cpu_temp=55.0, lab_id=lab_id(spec, 0),
+    )
+
+async def seed(url: str, spec: "DatasetSpec") -> dict:
+    from database import build_engine
+    from harness.dataset import generate
+
+    engine = build_engine(url)
+    try:
+        return await generate(engine, spec)
+    finally:
+        await engine.dispose()
+
+async def skip_password_check(subject, plain_password, hashed_password):
+    return True
+
+def skip_password_checks():
+    # o bcrypt não faz parte do que está sendo medido, só o caminho de escrita
+    import session.session_handler as session_handler
+    import student.student_handler as student_handler
+
+    student_handler.verify_password_cached = session_handler.verify_password_cached = skip_password_check
+
+def percentile(values: list[float], p: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1] if len(values) > 1 else values[0]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def wait_ready(client: "httpx.AsyncClient", process: subprocess.Popen):
+    """Espera o uvicorn de `process` responder em `client`, ou falha se ele morrer antes."""
+    import httpx # só os load_*.py dependem do httpx (requirements-bench.txt)
+
+    for _ in range(200):
+        if process.poll() is not None:
+            raise RuntimeError("o servidor terminou antes de ficar pronto")
+        try:
+            await client.get("/monitoring/metrics")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("o servidor não respondeu")
@@ -0,0 +1,230 @@
+"""Teste de carga do início da aula, com o painel aberto.
+
+--clients desktops chamam /session/new/{machine_key} no mesmo instante (todos
+esperam a mesma largada; --spread espalha os logins em segundos) enquanto
+--dashboards usuários do frontend atualizam /session/lab/{lab_id} e /lab/{lab_id}
+a cada --poll segundos, do começo da rodada até --tail segundos depois do último
+login. O banco é um SQLite temporário gerado pelo harness.dataset: o lab, as
+máquinas, os alunos (cada login paga um bcrypt de verificação) e --history
+sessões de aulas anteriores.
+
+O backend roda no uvicorn em outro processo (padrão) ou dentro deste processo
+com --in-process (httpx.ASGITransport, sem rede; o cliente divide o event loop
+com o servidor). Variáveis do servidor entram com --env, ex.
+--env SESSION_WRITE_MODE=write_behind --env SESSION_ADMISSION_LIMIT=4.
+
+O resultado é um JSON (stdout e --output) com, por endpoint, vazão, latência
+p50/p95/p99/max em ms e taxa de erro, mais o commit e a configuração, para
+comparar rodadas entre commits:
+
+    python -m benchmarks.load_classroom --output antes.json
+    git checkout outro-commit
+    python -m benchmarks.load_classroom --output depois.json
+
+Uso (dentro de web-app/backend, com pip install -r requirements-bench.txt):
+    python -m benchmarks.load_classroom
+    python -m benchmarks.load_classroom --clients 80 --dashboards 10 --history 50000
+    python -m benchmarks.load_classroom --in-process --env DB_PROFILE=default
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import API_KEY, CLIENT_TIMEOUT, classroom, free_port, login_payload, seat, seed, wait_ready
+
+LOGIN = "POST /session/new/{machine_key}"
+SESSIONS = "GET /session/lab/{lab_id}"
+LAB = "GET /lab/{lab_id}"
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def classroom_logins(args):
+    """Spec do harness.dataset com uma máquina e um aluno por desktop, o lab e os logins."""
+    # import tardio: com --in-process o backend precisa ler as variáveis de server_env() no import
+    from harness.dataset import lab_id
+
+    spec = classroom(args.clients, sessions=args.history, tasks_per_lab=5, seed=args.seed)
+    logins = [(seat(spec, i), login_payload(spec, i, "01/03/2025 07:00:00")) for i in range(args.clients)]
+    return spec, lab_id(spec, 0), logins
+
+class Recorder:
+    def __init__(self):
+        self.samples = {LOGIN: [], SESSIONS: [], LAB: []}
+
+    async def call(self, endpoint: str, request) -> int | str:
+        start = time.perf_counter()
+        try:
+            response = await request
+            result = response.status_code
+        except httpx.TimeoutException:
+            result = "client_timeout"
+        except httpx.TransportError as e:
+            result = type(e).__name__
+        self.samples[endpoint].append((time.perf_counter() - start, result))
+        return result
+
+def summarize(samples: list, seconds: float) -> dict:
+    latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+    outcome = {}
+    for _, result in samples:
+        outcome[str(result)] = outcome.get(str(result), 0) + 1
+    errors = sum(n for result, n in outcome.items() if not result.startswith("2") and result != "304")
+    summary = {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / seconds, 1) if seconds else None,
+        "error_rate": round(errors / len(samples), 4) if samples else None,
+        "outcome": outcome,
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        summary["latency_ms"] = {
+            "p50": round(cuts[49], 1), "p95": round(cuts[94], 1), "p99": round(cuts[98], 1),
+            "max": round(latencies[-1], 1), "mean": round(statistics.fmean(latencies), 1),
+        }
+    elif latencies:
+        summary["latency_ms"] = {"p50": round(latencies[0], 1), "max": round(latencies[0], 1)}
+    return summary
+
+async def desktop(client: httpx.AsyncClient, recorder: Recorder, go: asyncio.Event, key: str, payload: dict,
+                  delay: float):
+    await go.wait()
+    if delay:
+        await asyncio.sleep(delay)
+    await recorder.call(LOGIN, client.post(f"/session/new/{key}", json=payload, timeout=CLIENT_TIMEOUT))
+
+async def dashboard(client: httpx.AsyncClient, recorder: Recorder, go: asyncio.Event, done: asyncio.Event,
+                    lab: str, poll: float, page_limit: int, rng: random.Random):
+    params = {"limit": page_limit} if page_limit else {}
+    await go.wait()
+    await asyncio.sleep(rng.uniform(0, poll)) # usuários não atualizam sincronizados
+    while not done.is_set():
+        await asyncio.gather(
+            recorder.call(SESSIONS, client.get(f"/session/lab/{lab}", params=params, timeout=CLIENT_TIMEOUT)),
+            recorder.call(LAB, client.get(f"/lab/{lab}", timeout=CLIENT_TIMEOUT)),
+        )
+        try:
+            await asyncio.wait_for(done.wait(), poll)
+        except asyncio.TimeoutError:
+            pass
+
+async def storm(client: httpx.AsyncClient, args, lab: str, logins: list) -> tuple[Recorder, float, float]:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    go, done = asyncio.Event(), asyncio.Event()
+    desktops = [
+        asyncio.create_task(desktop(client, recorder, go, key, payload, args.spread * i / args.clients))
+        for i, (key, payload) in enumerate(logins)
+    ]
+    dashboards = [
+        asyncio.create_task(dashboard(client, recorder, go, done, lab, args.poll, args.page_limit, rng))
+        for _ in range(args.dashboards)
+    ]
+    await asyncio.sleep(0) # todos esperando a largada
+    start = time.perf_counter()
+    go.set()
+    await asyncio.gather(*desktops)
+    logins_done = time.perf_counter() - start
+    await asyncio.sleep(args.tail)
+    done.set()
+    await asyncio.gather(*dashboards)
+    return recorder, logins_done, time.perf_counter() - start
+
+def server_env(url: str, args) -> dict:
+    env = {"DATABASE_URL": url, "WEB_API_KEY": API_KEY}
+    for item in args.env:
+        name, _, value = item.partition("=")
+        env[name] = value
+    return env
+
+async def run_uvicorn(url: str, args, lab: str, logins: list):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--workers", str(args.workers)],
+        env={**os.environ, **server_env(url, args)},
+    )
+    connections = args.clients + 2 * args.dashboards
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", headers={"api-key": API_KEY}, limits=limits
+        ) as client:
+            await wait_ready(client, process)
+            return await storm(client, args, lab, logins)
+    finally:
+        process.terminate()
+        process.wait()
+
+async def run_in_process(url: str, args, lab: str, logins: list):
+    main = importlib.import_module("main")
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", headers={"api-key": API_KEY}) as client:
+            return await storm(client, args, lab, logins)
+
+async def main(args):
+    with tempfile.TemporaryDirectory(prefix="infodomus_classroom_") as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'classroom.db')}"
+        if args.in_process: # antes de qualquer import do backend
+            os.environ.update(server_env(url, args))
+
+        spec, lab, logins = classroom_logins(args)
+        seed_start = time.perf_counter()
+        await seed(url, spec)
+        seed_seconds = time.perf_counter() - seed_start
+        runner = run_in_process if args.in_process else run_uvicorn
+        recorder, logins_seconds, seconds = await runner(url, args, lab, logins)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "clients": args.clients, "dashboards": args.dashboards, "spread_s": args.spread, "poll_s": args.poll,
+            "tail_s": args.tail, "page_limit": args.page_limit, "history": args.history, "seed": args.seed,
+            "server": "in-process" if args.in_process else f"uvicorn x{args.workers}", "env": args.env,
+        },
+        "seed_s": round(seed_seconds, 2),
+        "logins_s": round(logins_seconds, 2),
+        "duration_s": round(seconds, 2),
+        "endpoints": {
+            LOGIN: summarize(recorder.samples[LOGIN], logins_seconds),
+            SESSIONS: summarize(recorder.samples[SESSIONS], seconds),
+            LAB: summarize(recorder.samples[LAB], seconds),
+        },
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=40, help="Desktops que logam juntos.")
+    parser.add_argument("--dashboards", type=int, default=5, help="Usuários com o painel do lab aberto.")
+    parser.add_argument("--spread", type=float, default=0.0, help="Segundos em que os logins se espalham (0 = largada única).")
+    parser.add_argument("--poll", type=float, default=1.0, help="Intervalo de atualização do painel, em segundos.")
+    parser.add_argument("--tail", type=float, default=2.0, help="Segundos de painel depois do último login.")
+    parser.add_argument("--page-limit", type=int, default=50, help="limit do /session/lab (0 = lista inteira).")
+    parser.add_argument("--history", type=int, default=2000, help="Sessões antigas no banco.")
+    parser.add_argument("--seed", type=int, default=1, help="Semente dos dados e dos intervalos do painel.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn.")
+    parser.add_argument("--in-process", action="store_true", help="Roda o app neste processo, sem uvicorn.")
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Variável do servidor.")
+    parser.add_argument("--output", help="Também grava o JSON neste arquivo.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""Teste de carga do início da aula: --clients desktops chamam /session/new juntos.
+
+Sobe o backend de verdade (uvicorn em outro processo, SQLite temporário) para
+cada valor de --limits (SESSION_ADMISSION_LIMIT, 0 = sem controle de admissão) e
+dispara os logins espalhados em --spread segundos, com o mesmo timeout de 10 s do
+desktop-app. Cada aluno já existe, então cada login paga um bcrypt de verificação.
+
+Por rodada mostra quantos logins deram certo, quantos foram recusados com
+429/503, quantos estouraram o timeout do cliente e a latência até a resposta final.
+Com --retry o cliente respeita o Retry-After e tenta de novo até --budget segundos.
+Os contadores do controle de admissão vêm do /monitoring/metrics do servidor.
+
+Uso (dentro de web-app/backend, com pip install -r requirements-bench.txt):
+    python -m benchmarks.load_session_burst
+    python -m benchmarks.load_session_burst --clients 80 --limits 0,2,4 --retry
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import API_KEY, CLIENT_TIMEOUT, classroom, free_port, login_payload, seat, seed, wait_ready
+
+async def one_desktop(client: httpx.AsyncClient, spec, i: int, delay: float, retry: bool, budget: float) -> dict:
+    await asyncio.sleep(delay)
+    payload = login_payload(spec, i, "01/03/2025 07:00:00")
+    start = time.perf_counter()
+    attempts, rejected = 0, 0
+    while True:
+        attempts += 1
+        try:
+            response = await client.post(f"/session/new/{seat(spec, i)}", json=payload, timeout=CLIENT_TIMEOUT)
+        except httpx.TimeoutException:
+            return dict(result="client_timeout", seconds=time.perf_counter() - start, attempts=attempts, rejected=rejected)
+        if response.status_code in (429, 503):
+            rejected += 1
+            wait = float(response.headers.get("retry-after", 1))
+            if retry and time.perf_counter() - start + wait < budget:
+                await asyncio.sleep(wait)
+                continue
+            return dict(result=str(response.status_code), seconds=time.perf_counter() - start, attempts=attempts, rejected=rejected)
+        result = "ok" if response.status_code == 200 else str(response.status_code)
+        return dict(result=result, seconds=time.perf_counter() - start, attempts=attempts, rejected=rejected)
+
+def admission_counts(metrics: dict) -> dict:
+    counts = {}
+    for value in metrics.get("session_admission_total", {}).get("values", []):
+        counts[value["labels"]["result"]] = int(value["value"])
+    return counts
+
+async def run_limit(limit: int, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="infodomus_burst_") as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'burst.db')}"
+        spec = classroom(args.clients)
+        await seed(url, spec)
+        port = free_port()
+        env = {
+            **os.environ, "DATABASE_URL": url, "WEB_API_KEY": API_KEY,
+            "SESSION_ADMISSION_LIMIT": str(limit),
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", headers={"api-key": API_KEY}, limits=limits
+            ) as client:
+                await wait_ready(client, process)
+                start = time.perf_counter()
+                results = await asyncio.gather(*(
+                    one_desktop(client, spec, i, args.spread * i / args.clients, args.retry, args.budget)
+                    for i in range(args.clients)
+                ))
+                elapsed = time.perf_counter() - start
+                # dá tempo para os logins abandonados pelo cliente terminarem no servidor
+                await asyncio.sleep(1)
+                metrics = (await client.get("/monitoring/metrics")).json()
+        finally:
+            process.terminate()
+            process.wait()
+
+    ok = [r["seconds"] for r in results if r["result"] == "ok"]
+    outcome = {}
+    for r in results:
+        outcome[r["result"]] = outcome.get(r["result"], 0) + 1
+    return {
+        "limit": limit or "off",
+        "clients": args.clients,
+        "seconds": round(elapsed, 1),
+        "outcome": outcome,
+        "rejections": sum(r["rejected"] for r in results),
+        "ok_p50_s": round(statistics.median(ok), 2) if ok else None,
+        "ok_max_s": round(max(ok), 2) if ok else None,
+        "server": admission_counts(metrics),
+    }
+
+async def main(args):
+    for limit in [int(n) for n in args.limits.split(",")]:
+        print(await run_limit(limit, args))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=40, help="Desktops que logam juntos.")
+    parser.add_argument("--spread", type=float, default=2.0, help="Segundos em que os logins se espalham.")
+    parser.add_argument("--limits", default="0,4", help="Valores de SESSION_ADMISSION_LIMIT, 0 = desligado.")
+    parser.add_argument("--retry", action="store_true", help="Cliente respeita Retry-After e tenta de novo.")
+    parser.add_argument("--budget", type=float, default=30.0, help="Tempo máximo por desktop com --retry.")
+    asyncio.run(main(parser.parse_args()))
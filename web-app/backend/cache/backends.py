@@ -0,0 +1,80 @@
+"""Backends assíncronos para caches compartilháveis entre workers.
+
+`memory` guarda no próprio processo (TTLCache). `redis` usa qualquer servidor que
+fale o protocolo do Redis (Redis, Valkey, KeyDB...), assim a invalidação feita
+por um worker vale para todos. O pacote `redis` só é necessário nesse caso:
+    pip install redis
+
+Os valores precisam ser serializáveis em JSON. Falhas do Redis contam em
+cache_errors_total e viram erro de cache: a leitura cai no banco.
+"""
+import json
+
+from cache.lru import TTLCache, HitRatio
+from monitoring.metrics import counter
+
+cache_errors = counter("cache_errors_total", "Operações do backend de cache que falharam (tratadas como erro de cache).")
+
+class MemoryBackend:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = TTLCache(name, maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str):
+        return self._cache.get(key)
+
+    async def set(self, key: str, value):
+        self._cache.set(key, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.pop(key)
+
+class RedisBackend:
+    def __init__(self, name: str, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("ENTITY_CACHE_BACKEND=redis precisa do pacote redis (pip install redis)") from e
+        self.name = name
+        self.ttl = ttl
+        self._prefix = f"infodomus:{name}:"
+        self._client = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        self._ratio = HitRatio(name)
+
+    async def get(self, key: str):
+        try:
+            raw = await self._client.get(self._prefix + key)
+        except self._errors:
+            cache_errors.inc(cache=self.name, operation="get")
+            raw = None
+        self._ratio.record(raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value):
+        if self.ttl <= 0: # ENTITY_CACHE_TTL=0 desliga
+            return
+        try:
+            await self._client.set(self._prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+        except self._errors:
+            cache_errors.inc(cache=self.name, operation="set")
+
+    async def delete(self, *keys: str):
+        if not keys:
+            return
+        try:
+            await self._client.delete(*(self._prefix + key for key in keys))
+        except self._errors:
+            # a entrada antiga continua valendo até o TTL
+            cache_errors.inc(cache=self.name, operation="delete")
+
+    async def close(self):
+        await self._client.aclose()
+
+def build_backend(kind: str, name: str, maxsize: int, ttl: float, url: str | None = None):
+    if kind == "memory":
+        return MemoryBackend(name, maxsize=maxsize, ttl=ttl)
+    if kind == "redis":
+        return RedisBackend(name, url=url, ttl=ttl)
+    raise ValueError(f"Backend de cache desconhecido: {kind!r} (use memory ou redis)")
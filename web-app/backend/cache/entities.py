@@ -0,0 +1,78 @@
+"""Cache das linhas de Lab e Machine.
+
+Quase todo handler começa buscando o mesmo Lab ou Machine (verify_lab,
+get_machine_config, verify_user_for_machine, post_new_session). As linhas ficam
+guardadas por ENTITY_CACHE_TTL segundos no backend de ENTITY_CACHE_BACKEND
+(cache/backends.py) e os handlers de escrita chamam os invalidate_* depois do
+commit. As linhas servem só para leitura e autorização: o objeto que vai ser
+alterado ou apagado é carregado do banco (db.get), nunca montado a partir do
+cache. Com o backend memory e vários workers, a invalidação só alcança o
+processo que fez a escrita e o TTL limita quanto os outros ficam desatualizados.
+Use redis nesse caso.
+"""
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from cache.backends import build_backend
+from models import Lab, Machine
+
+ENTITY_CACHE_BACKEND = os.getenv("ENTITY_CACHE_BACKEND", "memory") # memory | redis
+ENTITY_CACHE_URL = os.getenv("ENTITY_CACHE_URL", "redis://localhost:6379/0")
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", 2048)) # por tipo, só no memory
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", 60))
+
+def _backend(name: str):
+    return build_backend(
+        ENTITY_CACHE_BACKEND, name, maxsize=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL, url=ENTITY_CACHE_URL
+    )
+
+labs = _backend("labs")
+machines = _backend("machines")
+
+LAB_COLUMNS = ("lab_id", "lab_name", "classes")
+MACHINE_COLUMNS = (
+    "machine_key", "machine_name", "motherboard", "memory", "storage",
+    "state_cleanliness", "last_checked", "lab_id",
+)
+
+async def get_lab_row(db: AsyncSession, lab_id: str) -> dict | None:
+    row = await labs.get(lab_id)
+    if row is None:
+        result = await db.execute(
+            select(*(getattr(Lab, column) for column in LAB_COLUMNS)).where(Lab.lab_id == lab_id)
+        )
+        found = result.first()
+        if found is None:
+            return None
+        row = dict(found._mapping)
+        await labs.set(lab_id, row)
+    return row
+
+async def get_machine_row(db: AsyncSession, machine_key: str) -> dict | None:
+    """Colunas da máquina; last_checked em ISO e state_cleanliness como texto (JSON)."""
+    row = await machines.get(machine_key)
+    if row is None:
+        result = await db.execute(
+            select(*(getattr(Machine, column) for column in MACHINE_COLUMNS)).where(Machine.machine_key == machine_key)
+        )
+        found = result.first()
+        if found is None:
+            return None
+        row = dict(found._mapping)
+        row["state_cleanliness"] = row["state_cleanliness"].value
+        row["last_checked"] = row["last_checked"].isoformat()
+        await machines.set(machine_key, row)
+    return row
+
+async def invalidate_lab(lab_id: str):
+    await labs.delete(lab_id)
+
+async def invalidate_machines(*machine_keys: str):
+    await machines.delete(*machine_keys)
+
+async def close():
+    for backend in (labs, machines):
+        if hasattr(backend, "close"):
+            await backend.close()
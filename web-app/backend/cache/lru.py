@@ -0,0 +1,92 @@
+"""Cache LRU em memória com TTL por entrada.
+
+Limitado a `maxsize` entradas (a menos usada recentemente sai primeiro). Cada
+entrada expira após `ttl` segundos ou no `expires_at` passado no set(). Acertos,
+erros e tamanho aparecem em /monitoring/metrics com o label cache=<name>.
+"""
+import time
+from collections import OrderedDict
+
+from monitoring.metrics import counter, gauge
+
+cache_hits = counter("cache_hits_total", "Leituras encontradas no cache.")
+cache_misses = counter("cache_misses_total", "Leituras que não estavam no cache (ou expiraram).")
+cache_evictions = counter("cache_evictions_total", "Entradas removidas por falta de espaço.")
+cache_entries = gauge("cache_entries", "Entradas guardadas no cache.")
+cache_hit_ratio = gauge("cache_hit_ratio", "Acertos / leituras desde o início do processo.")
+
+class HitRatio:
+    """Contagem de acertos e erros de um cache, exportada como cache_hit_ratio."""
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+            cache_hits.inc(cache=self.name)
+        else:
+            self.misses += 1
+            cache_misses.inc(cache=self.name)
+        cache_hit_ratio.set(self.hits / (self.hits + self.misses), cache=self.name)
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict() # chave -> (expira_em, valor)
+        self._ratio = HitRatio(name)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self._ratio.record(True)
+            return entry[1]
+        if entry is not None:
+            self._remove(key)
+        self._ratio.record(False)
+        return default
+
+    def set(self, key, value, expires_at: float | None = None):
+        """Guarda `value`; `expires_at` (time.monotonic) encurta o TTL padrão."""
+        if not self.enabled:
+            return
+        deadline = time.monotonic() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        self._data[key] = (deadline, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            cache_evictions.inc(cache=self.name)
+        cache_entries.set(len(self._data), cache=self.name)
+
+    def pop(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        self._remove(key)
+        return entry[1]
+
+    def discard_where(self, predicate):
+        """Remove as entradas cujo valor satisfaz `predicate` (percorre o cache inteiro)."""
+        for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+            self._remove(key)
+
+    def clear(self):
+        self._data.clear()
+        cache_entries.set(0, cache=self.name)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key):
+        del self._data[key]
+        cache_entries.set(len(self._data), cache=self.name)
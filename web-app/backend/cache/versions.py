@@ -0,0 +1,132 @@
+"""Versões por recurso para GET condicional (ETag / Last-Modified).
+
+Os handlers de escrita chamam bump() antes do commit, na mesma transação, para
+cada listagem que a escrita altera. Os endpoints de leitura consultam a versão
+(uma busca pela PK) antes de montar a resposta: se o cliente já tem essa versão
+(If-None-Match / If-Modified-Since) a resposta é 304 sem rodar a query completa.
+Como a versão fica no banco, vale para todos os workers.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import Machine, ResourceVersion
+from monitoring.metrics import counter
+from timestamps import time_format
+
+# recursos versionados, cada um com o id que aparece na URL
+LAB_MACHINES = "lab_machines" # GET /lab/{lab_id}/machines
+MACHINE = "machine" # GET /machine_config/{machine_key}
+LAB_TASKS = "lab_tasks" # GET /tasks/lab/{lab_id}
+
+conditional_requests = counter(
+    "conditional_requests_total", "GETs com versão conhecida, por resultado (not_modified/full)."
+)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+async def bump(db: AsyncSession, *keys: tuple[str, str]):
+    """Incrementa a versão de cada (recurso, id), criando a linha se ainda não existir."""
+    keys = [key for key in dict.fromkeys(keys) if key[1] is not None]
+    if not keys:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    now = _utcnow()
+    stmt = dialect.insert(ResourceVersion).values([
+        dict(resource=resource, resource_key=key, version=1, updated_at=now) for resource, key in keys
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.resource, ResourceVersion.resource_key],
+        set_={"version": ResourceVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+
+async def bump_lab_machines(db: AsyncSession, lab_id: str):
+    """Incrementa a versão de todas as máquinas do lab (ex.: lab removido)."""
+    await db.execute(
+        update(ResourceVersion)
+        .where(
+            ResourceVersion.resource == MACHINE,
+            ResourceVersion.resource_key.in_(select(Machine.machine_key).where(Machine.lab_id == lab_id)),
+        )
+        .values(version=ResourceVersion.version + 1, updated_at=_utcnow())
+    )
+
+async def get_version(db: AsyncSession, resource: str, key: str) -> tuple[int, datetime] | None:
+    result = await db.execute(
+        select(ResourceVersion.version, ResourceVersion.updated_at).where(
+            ResourceVersion.resource == resource, ResourceVersion.resource_key == key
+        )
+    )
+    return result.first()
+
+def _etag(resource: str, version: int, updated_at: datetime, fmt: str = "legacy") -> str:
+    # o updated_at entra para a ETag não repetir se a linha for recriada do zero;
+    # o corpo muda com o X-Time-Format (timestamps.py), então o formato também entra
+    suffix = "" if fmt == "legacy" else f"-{fmt}"
+    return f'"{resource}-{version}-{int(updated_at.timestamp() * 1_000_000):x}{suffix}"'
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tem prioridade sobre If-Modified-Since (RFC 9110)
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # o HTTP-date só tem segundos: uma escrita dentro do segundo de `since` pode ser
+        # posterior à cópia do cliente, então só é 304 se o updated_at for anterior a ele
+        return last_modified < since
+    return False
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    resource: str,
+    key: str,
+    build: Callable[[], Awaitable],
+    authorize: Callable[[], Awaitable] | None = None,
+):
+    """Responde 304 se o cliente já tem a versão atual; senão chama `build()` e
+    acrescenta ETag/Last-Modified na resposta. `authorize` roda antes do 304 nos
+    recursos que exigem permissão (no caminho completo quem confere é o `build()`).
+
+    A versão é lida antes de `build()`: se uma escrita acontecer no meio, a ETag
+    enviada fica mais velha que o corpo e o próximo GET só vem completo de novo.
+    """
+    current = await get_version(db, resource, key)
+    if current is None: # recurso ainda sem versão: resposta normal, sem cabeçalhos
+        return await build()
+
+    version, updated_at = current
+    etag = _etag(resource, version, updated_at, time_format.get())
+    last_modified = updated_at.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Vary": "X-Time-Format",
+    }
+    if _not_modified(request, etag, last_modified):
+        if authorize is not None:
+            await authorize()
+        conditional_requests.inc(resource=resource, result="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    conditional_requests.inc(resource=resource, result="full")
+    result = await build()
+    response.headers.update(headers)
+    return result
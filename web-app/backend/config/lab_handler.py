@@ -1,57 +1,64 @@
-from fastapi import HTTPException,status
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession 
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import or_,func
+from sqlalchemy import or_,func,tuple_,insert
 
 from typing import List
 from schemas import (
     LabCreate,LabResponse,LabResponseUser,LabUpdate,
     MachineConfigResponse,UserResponse,StudentResponse,
-    LastSessionResponse
+    LastSessionResponse,StudentPageResponse
 )
+from student.pagination import StudentPage, encode_cursor
+from cache.versions import LAB_MACHINES, LAB_TASKS, bump, bump_lab_machines
+from cache.entities import get_lab_row, invalidate_lab, invalidate_machines
+from auth.membership import is_lab_member, verify_lab_member, remember_lab_member
 from models import Lab,User,Machine,Student,Session,user_lab_association,Task
 
 async def verify_lab(lab_id: str, db: AsyncSession,user:User=None) -> Lab:
-    if user is not None:
-        lab_obj = await db.execute(
-            select(Lab).where(Lab.lab_id == lab_id).options(
-                selectinload(Lab.users)
-            ))
-        existing_lab = lab_obj.scalars().first()
-        if not existing_lab:
-            raise HTTPException(status_code=404,detail="Lab não foi encontrado")
-        if not any(u.user_id == user.user_id for u in lab_obj.users):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operação não autorizada")
-    lab_obj = await db.execute(select(Lab).where(Lab.lab_id == lab_id))
-    existing_lab = lab_obj.scalars().first()
-    if not existing_lab:
+    # a verificação usa o cache de entidades (cache/entities.py), mas o lab que o
+    # handler vai alterar ou apagar é carregado do banco
+    if await get_lab_row(db, lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
+    if user is not None:
+        await verify_lab_member(lab_id=lab_id, user=user, db=db)
 
-    return existing_lab
+    lab_obj = await db.get(Lab, lab_id)
+    if lab_obj is None: # apagado depois de entrar no cache
+        await invalidate_lab(lab_id)
+        raise HTTPException(status_code=404,detail="Lab não foi encontrado")
+    return lab_obj
 
 async def get_lab(lab_id: str, db: AsyncSession) -> LabResponse:
-    lab_obj = await verify_lab(lab_id=lab_id, db=db)
+    # Contagens restritas ao lab, todas na mesma ida ao banco
+    def count_for_lab(column, lab_column):
+        return select(column).where(lab_column == Lab.lab_id).scalar_subquery()
 
-    # Contagens restritas ao lab
-    machine_count_query = select(func.count(Machine.machine_key)).where(Machine.lab_id == lab_id)
-    student_count_query = select(func.count(Student.student_id)).join(Session).where(Session.lab_id == lab_id)
-    users_count_query = select(func.count(user_lab_association.c.user_id)).where(user_lab_association.c.lab_id == lab_id)
-    task_count_query = select(func.count(Task.task_id)).where(Task.lab_id == lab_id)
-
-    machine_result = await db.execute(machine_count_query)
-    student_result = await db.execute(student_count_query)
-    user_result = await db.execute(users_count_query)
-    task_result = await db.execute(task_count_query)
+    result = await db.execute(
+        select(
+            Lab.lab_id,
+            Lab.lab_name,
+            Lab.classes,
+            count_for_lab(func.count(Machine.machine_key), Machine.lab_id).label("machine_count"),
+            # um aluno com várias sessões conta uma vez só
+            count_for_lab(func.count(func.distinct(Session.student_id)), Session.lab_id).label("student_count"),
+            count_for_lab(func.count(user_lab_association.c.user_id), user_lab_association.c.lab_id).label("user_count"),
+            count_for_lab(func.count(Task.task_id), Task.lab_id).label("task_count"),
+        ).where(Lab.lab_id == lab_id)
+    )
+    lab = result.first()
+    if not lab:
+        raise HTTPException(status_code=404,detail="Lab não foi encontrado")
 
     return LabResponse(
-        lab_id=lab_obj.lab_id,
-        lab_name=lab_obj.lab_name,
-        classes=lab_obj.classes.split(","),
-        machine_count=machine_result.scalar_one(),
-        student_count=student_result.scalar_one(),
-        user_count=user_result.scalar_one(),
-        task_count=task_result.scalar_one()  # novo campo
+        lab_id=lab.lab_id,
+        lab_name=lab.lab_name,
+        classes=lab.classes.split(","),
+        machine_count=lab.machine_count,
+        student_count=lab.student_count,
+        user_count=lab.user_count,
+        task_count=lab.task_count
     )
 
 async def create_lab(new_lab: LabCreate,user:User, db: AsyncSession):
@@ -75,16 +82,23 @@ async def create_lab(new_lab: LabCreate,user:User, db: AsyncSession):
     db_lab.users.append(user)
     
     db.add(db_lab)
+    await bump(db, (LAB_MACHINES, db_lab.lab_id), (LAB_TASKS, db_lab.lab_id))
     await db.commit()
     await db.refresh(db_lab)
+    remember_lab_member(db_lab.lab_id, user, db)
     
     return {"message":"Lab criado com Sucesso"}
 
 async def delete_lab(lab_id: str, db: AsyncSession,user:User):
     lab_obj = await verify_lab(lab_id=lab_id,db=db,user=user)
 
+    machine_keys = (await db.execute(select(Machine.machine_key).where(Machine.lab_id == lab_id))).scalars().all()
+    await bump_lab_machines(db, lab_id) # máquinas ficam sem lab
+    await bump(db, (LAB_MACHINES, lab_id), (LAB_TASKS, lab_id))
     await db.delete(lab_obj)
     await db.commit()
+    await invalidate_lab(lab_id)
+    await invalidate_machines(*machine_keys)
 
     return {"message":"Lab excluido com sucesso"}
 
@@ -103,6 +117,7 @@ async def update_lab(lab_id: str, new_lab: LabUpdate,user:User, db: AsyncSession
         if updated:
             await db.commit()
             await db.refresh(lab_obj)
+            await invalidate_lab(lab_id)
         else:
             return {"message": "Nenhum campo foi alterado."}
 
@@ -112,19 +127,15 @@ async def update_lab(lab_id: str, new_lab: LabUpdate,user:User, db: AsyncSession
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar Lab: {str(e)}")
 
 async def join_lab(lab_id:str,user:User,db:AsyncSession):
-    lab_obj = await db.execute(
-        select(Lab).where(Lab.lab_id == lab_id).options(
-            selectinload(Lab.users)
-        ))
-    existing_lab = lab_obj.scalars().first()
-    if not existing_lab:
+    if await get_lab_row(db, lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
-    if user in existing_lab.users:
+    if await is_lab_member(lab_id, user, db):
         raise HTTPException(status_code=409,detail="Você já está neste lab")
 
-    existing_lab.users.append(user)
+    # insere só a associação, sem carregar a lista de usuários do lab
+    await db.execute(insert(user_lab_association).values(lab_id=lab_id, user_id=user.user_id))
     await db.commit()
-    await db.refresh(existing_lab)
+    remember_lab_member(lab_id, user, db)
 
     return {"message": "Você entrou no lab com sucesso"}
 
@@ -141,12 +152,12 @@ async def get_machines_for_lab(lab_id:str,db:AsyncSession) -> List[MachineConfig
         raise HTTPException(status_code=404, detail="Nenhuma máquina foi encontrada")
 
     return [
-        MachineConfigResponse(
+        MachineConfigResponse.model_construct(
             machine_key=m.machine_key,
             motherboard=m.motherboard,
             machine_name=m.machine_name,
             state_cleanliness=m.state_cleanliness,
-            last_checked=m.last_checked.strftime("%d/%m/%Y"),
+            last_checked=m.last_checked,
         )
         for m in lab.machines
     ]
@@ -196,43 +207,86 @@ async def get_users_for_lab(lab_id:str,db:AsyncSession) -> List[UserResponse]:
         for u in lab.users
     ]
 
-async def get_students_for_lab(lab_id: str, db: AsyncSession) -> List[StudentResponse]:
-    result = await db.execute(
-        select(Lab)
-        .where(Lab.lab_id == lab_id)
-        .options(
-            selectinload(Lab.sessions).selectinload(Session.student)
+async def get_students_for_lab(lab_id: str, db: AsyncSession, page: StudentPage = StudentPage()) -> StudentPageResponse:
+    # alunos do lab saltando pelo índice (lab_id, student_id, session_start, session_id):
+    # cada passo busca o próximo student_id maior que o anterior, então o custo
+    # depende de quantos alunos o lab tem e não de quantas sessões acumulou
+    lab_students = (
+        select(func.min(Session.student_id).label("student_id"))
+        .where(Session.lab_id == lab_id)
+        .cte("lab_students", recursive=True)
+    )
+    previous = lab_students.alias("previous")
+    lab_students = lab_students.union_all(
+        select(
+            select(func.min(Session.student_id))
+            .where(Session.lab_id == lab_id, Session.student_id > previous.c.student_id)
+            .correlate(previous)
+            .scalar_subquery()
+        ).where(previous.c.student_id.is_not(None))
+    )
+    # última sessão de cada aluno no lab: um LIMIT 1 no fim da faixa do índice
+    last_session_id = (
+        select(Session.session_id)
+        .where(Session.lab_id == lab_id, Session.student_id == lab_students.c.student_id)
+        .order_by(Session.session_start.desc(), Session.session_id.desc())
+        .limit(1)
+        .correlate(lab_students)
+        .scalar_subquery()
+    )
+    latest = (
+        select(lab_students.c.student_id, last_session_id.label("session_id"))
+        .where(lab_students.c.student_id.is_not(None))
+        .subquery()
+    )
+    stmt = (
+        select(
+            Student.student_id,
+            Student.student_name,
+            Student.class_var,
+            Student.password_hash,
+            Session.session_id,
+            Session.session_start,
+            Session.lab_id,
+            Session.machine_key,
         )
+        .join(latest, latest.c.student_id == Student.student_id)
+        .join(Session, Session.session_id == latest.c.session_id)
     )
-    lab = result.scalars().first()
-    
-    if not lab:
-        raise HTTPException(status_code=404, detail="Lab não foi encontrado")
+    if page.search:
+        stmt = stmt.where(func.lower(Student.student_name).contains(page.search.lower(), autoescape=True))
+    if page.after is not None:
+        stmt = stmt.where(tuple_(Student.student_name, Student.student_id) > page.after)
+    stmt = stmt.order_by(Student.student_name, Student.student_id)
+    if page.limit is not None:
+        stmt = stmt.limit(page.limit + 1) # uma a mais para saber se há próxima página
 
-    sessions_by_student = {}
-    for session in lab.sessions:
-        student = session.student
-        if student:
-            current_latest = sessions_by_student.get(student.student_id)
-            if current_latest is None or session.session_start > current_latest.session_start:
-                sessions_by_student[student.student_id] = session
-
-    response_list = []
-    for student_id, last_session in sessions_by_student.items():
-        student = last_session.student
-        response_list.append(
-            StudentResponse(
-                student_id=student.student_id,
-                student_name=student.student_name,
-                class_var=student.class_var,
-                student_password=student.password_hash,
-                last_session=LastSessionResponse(
-                    session_id=last_session.session_id,
-                    session_start=last_session.session_start,
-                    lab_id=last_session.lab_id,
-                    machine_key=last_session.machine_key,
+    rows = (await db.execute(stmt)).all()
+    if not rows and page.after is None:
+        # lista vazia: só aqui vale a pena conferir se o lab existe
+        if (await db.execute(select(Lab.lab_id).where(Lab.lab_id == lab_id))).first() is None:
+            raise HTTPException(status_code=404, detail="Lab não foi encontrado")
+
+    next_cursor = None
+    if page.limit is not None and len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1].student_name, rows[-1].student_id)
+
+    return StudentPageResponse(
+        items=[
+            StudentResponse.model_construct(
+                student_id=row.student_id,
+                student_name=row.student_name,
+                class_var=row.class_var,
+                student_password=row.password_hash,
+                last_session=LastSessionResponse.model_construct(
+                    session_id=row.session_id,
+                    session_start=row.session_start,
+                    lab_id=row.lab_id,
+                    machine_key=row.machine_key,
                 )
             )
-        )
-
-    return response_list
\ No newline at end of file
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
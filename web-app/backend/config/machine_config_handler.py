@@ -1,53 +1,57 @@
-import asyncio
 from datetime import datetime
 from fastapi import HTTPException,status
 from sqlalchemy.ext.asyncio import AsyncSession 
 from sqlalchemy.future import select
 from sqlalchemy import or_
-from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 
 from models import User
 from schemas import MachineConfig,NewMachineConfig,MachineNewState,MachineNewCheck
-from models import Machine, Lab, StateCleanliness
-from config.lab_handler import verify_lab
+from models import Machine, StateCleanliness
+from cache.versions import MACHINE, LAB_MACHINES, LAB_TASKS, bump
+from cache.entities import get_lab_row, get_machine_row, invalidate_machines
+from auth.membership import is_lab_member
 
 async def get_machine_config(machine_key:str, db: AsyncSession) -> MachineConfig:
-    result = await db.execute(select(Machine).filter(Machine.machine_key == machine_key))
-    machine_config_obj = result.scalars().first()
+    machine_row = await get_machine_row(db, machine_key)
 
-    if not machine_config_obj:
+    if not machine_row:
         raise HTTPException(status_code=404,detail="Computador não foi encontrado")
 
-    return MachineConfig(
-        motherboard=machine_config_obj.motherboard,
-        machine_name=machine_config_obj.machine_name,
-        memory=machine_config_obj.memory,
-        storage=machine_config_obj.storage,
-        state_cleanliness=machine_config_obj.state_cleanliness,
-        last_checked=machine_config_obj.last_checked.strftime("%d/%m/%Y"),
-        lab_id=machine_config_obj.lab_id
+    return MachineConfig.model_construct(
+        motherboard=machine_row["motherboard"],
+        machine_name=machine_row["machine_name"],
+        memory=machine_row["memory"],
+        storage=machine_row["storage"],
+        state_cleanliness=StateCleanliness(machine_row["state_cleanliness"]),
+        last_checked=datetime.fromisoformat(machine_row["last_checked"]),
+        lab_id=machine_row["lab_id"]
     )
 
 async def verify_user_for_machine(machine_key:str,user:User,db: AsyncSession) -> Machine:
-    result = await db.execute(select(Machine)
-            .where(Machine.machine_key == machine_key
-        ).options(
-            selectinload(Machine.lab).selectinload(Lab.users)
-        )
-    )
-    machine_obj = result.scalars().first()
+    # a autorização usa o cache de entidades (cache/entities.py), mas a máquina que o
+    # handler vai alterar ou apagar é carregada do banco
+    machine_row = await get_machine_row(db, machine_key)
 
-    if not machine_obj:
+    if not machine_row:
         raise HTTPException(status_code=404,detail="Computador não foi encontrado")
 
-    if user not in machine_obj.lab.users:
+    if machine_row["lab_id"] is None or not await is_lab_member(machine_row["lab_id"], user, db):
         raise HTTPException(status_code=403,detail="Usuário não autorizado")
-    
+
+    machine_obj = await db.get(Machine, machine_key)
+    if machine_obj is None or machine_obj.lab_id != machine_row["lab_id"]:
+        # cache desatualizado (máquina apagada ou trocada de lab): vale o banco
+        await invalidate_machines(machine_key)
+        if machine_obj is None:
+            raise HTTPException(status_code=404,detail="Computador não foi encontrado")
+        if machine_obj.lab_id is None or not await is_lab_member(machine_obj.lab_id, user, db):
+            raise HTTPException(status_code=403,detail="Usuário não autorizado")
+
     return machine_obj
 
 async def post_new_machine_config(new_machine:NewMachineConfig, db: AsyncSession):
-    if not await verify_lab(new_machine.lab_id,db=db):
+    if await get_lab_row(db, new_machine.lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
 
     existing_machine = await db.execute(
@@ -56,7 +60,6 @@ async def post_new_machine_config(new_machine:NewMachineConfig, db: AsyncSession
             Machine.machine_name == new_machine.machine_name
         ))    
     )
-    new_machine.last_checked = datetime.strptime(new_machine.last_checked, "%d/%m/%Y")
     if existing_machine.scalars().first():
         raise HTTPException(status_code=400,detail="Computador já registrado")
         
@@ -73,6 +76,7 @@ async def post_new_machine_config(new_machine:NewMachineConfig, db: AsyncSession
     
     try:
         db.add(db_machine)
+        await bump(db, (MACHINE, db_machine.machine_key), (LAB_MACHINES, db_machine.lab_id))
         await db.commit()
     except IntegrityError as e:
         await db.rollback()
@@ -85,8 +89,11 @@ async def post_new_machine_config(new_machine:NewMachineConfig, db: AsyncSession
 async def delete_machine(machine_key:str, user:User,db:AsyncSession):
     machine_config_obj = await verify_user_for_machine(machine_key=machine_key,user=user,db=db)
 
+    lab_id = machine_config_obj.lab_id
+    await bump(db, (MACHINE, machine_key), (LAB_MACHINES, lab_id), (LAB_TASKS, lab_id))
     await db.delete(machine_config_obj)
     await db.commit()
+    await invalidate_machines(machine_key)
     
     return {"message":"Computador removido do Laboratório com Sucesso"}
 
@@ -94,16 +101,11 @@ async def update_last_check(machine_key:str,new_check:MachineNewCheck,user:User,
     machine_obj = await verify_user_for_machine(machine_key=machine_key,user=user,db=db)
 
     try:
-        try:
-            for_new_check = datetime.strptime(new_check.new_check, "%d/%m/%Y")
-        except ValueError:
-            raise HTTPException(
-                status_code=422,
-                detail="Formato de data incorreto"
-            )
-        machine_obj.last_checked = for_new_check
+        machine_obj.last_checked = new_check.new_check
+        await bump(db, (MACHINE, machine_key), (LAB_MACHINES, machine_obj.lab_id))
         await db.commit()
         await db.refresh(machine_obj)
+        await invalidate_machines(machine_key)
         
         return {"message": "Última checagem atualizada"}
 
@@ -125,9 +127,11 @@ async def update_state_cleanliness(machine_key:str,new_state:MachineNewState,use
             )
 
         machine_obj.state_cleanliness = state_enum_value
+        await bump(db, (MACHINE, machine_key), (LAB_MACHINES, machine_obj.lab_id))
         
         await db.commit()
         await db.refresh(machine_obj)
+        await invalidate_machines(machine_key)
         
         return {"message": "Estado de limpeza da máquina atualizado com sucesso"}
 
@@ -137,7 +141,7 @@ async def update_state_cleanliness(machine_key:str,new_state:MachineNewState,use
 
 #TODO: esse método deve ser restrito
 async def update_machine_config(machine_key:str,new_config:MachineConfig, db:AsyncSession):
-    if not await verify_lab(new_config.lab_id,db=db):
+    if await get_lab_row(db, new_config.lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
     try:
         result = await db.execute(select(Machine).filter(Machine.machine_key == machine_key))
@@ -148,15 +152,22 @@ async def update_machine_config(machine_key:str,new_config:MachineConfig, db:Asy
 
         # utilizar getters e setters dinamicamente para alterar apenas se o valor não for
         # vazio e se ele for diferente do que o já armazenado na db 
-        new_config.last_checked = datetime.strptime(new_config.last_checked, "%d/%m/%Y")
+        old_lab_id = machine_config_obj.lab_id
         for field, new_value in new_config.dict().items():
             if new_value is not None:
                 current_value = getattr(machine_config_obj, field, None)
                 if new_value != current_value:
                     setattr(machine_config_obj, field, new_value)
-                    
+
+        # nome e lab aparecem nas listagens de máquinas e de tarefas do lab antigo e do novo
+        await bump(
+            db, (MACHINE, machine_key),
+            (LAB_MACHINES, old_lab_id), (LAB_MACHINES, machine_config_obj.lab_id),
+            (LAB_TASKS, old_lab_id), (LAB_TASKS, machine_config_obj.lab_id),
+        )
         await db.commit()
         await db.refresh(machine_config_obj)
+        await invalidate_machines(machine_key)
 
         return {"message": "Configuração da máquina salva com sucesso"}
     
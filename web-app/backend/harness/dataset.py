@@ -0,0 +1,326 @@
+"""Dados sintéticos em volume para testes de escala.
+
+Preenche todas as tabelas do models.py: labs, máquinas, alunos, usuários
+(professores/monitores de cada lab), tarefas com as máquinas associadas, a
+versão 1 de cada recurso com ETag (ResourceVersion, cache/versions.py) e o
+histórico de Session/SystemMetrics. O histórico segue a grade de aulas: em
+cada dia útil cada lab tem aula em parte dos horários de DATASET_PERIODS e a
+turma loga quase toda nos primeiros minutos (rajada), com alguns atrasados, como
+no início da aula de verdade.
+
+Tudo entra por INSERT do Core em lotes de `chunk_size` linhas (executemany, sem
+ORM nem RETURNING). Em um banco vazio as tabelas são criadas sem os índices
+secundários, que só são criados depois da carga (mais rápido que manter cada
+índice linha a linha), e no fim roda ANALYZE. Os ids são gerados aqui; no
+PostgreSQL as sequences são ajustadas depois para o app continuar inserindo.
+
+Todos os alunos e usuários têm a senha da spec (um único bcrypt), então os
+testes de carga conseguem logar com qualquer um. Os nomes seguem as funções
+lab_id/machine_key/student_name/username abaixo, com o `prefix` da spec para não
+colidir com os dados do roteiro do harness.
+
+Reuso:
+    from harness.dataset import SCALES, generate
+    await generate(engine, SCALES["small"])
+
+Uso (dentro de web-app/backend):
+    python -m harness.dataset --url sqlite+aiosqlite:///./escala.db --scale large
+    python -m harness.dataset --url postgresql://... --scale medium --sessions 2000000
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.schema import CreateIndex
+
+from auth.hashing import hash_password_sync
+from cache.versions import LAB_MACHINES, LAB_TASKS, MACHINE
+from database import build_engine
+from models import (
+    Base, Lab, Machine, ResourceVersion, Session, StateCleanliness, Student, SystemMetrics, Task, User,
+    task_machine_association, user_lab_association,
+)
+
+# início dos horários de aula (hora, minuto); cada aula dura 50 min
+DATASET_PERIODS = ((7, 0), (7, 50), (8, 40), (9, 50), (10, 40), (13, 0), (13, 50), (14, 40), (15, 50), (16, 40))
+
+@dataclass
+class DatasetSpec:
+    labs: int = 200
+    machines_per_lab: int = 40
+    students: int = 20_000
+    sessions: int = 1_000_000
+    users_per_lab: int = 2
+    tasks_per_lab: int = 5
+    machines_per_task: int = 10
+    occupancy: float = 0.6 # fração dos horários com aula em cada lab
+    attendance: float = 0.85 # fração das máquinas usadas em cada aula
+    start: datetime = datetime(2024, 2, 5) # uma segunda-feira
+    password: str = "senha"
+    prefix: str = "D"
+    seed: int = 1
+    chunk_size: int = 20_000
+
+SCALES = {
+    "small": DatasetSpec(labs=20, students=2_000, sessions=20_000),
+    "medium": DatasetSpec(),
+    "large": DatasetSpec(labs=500, students=50_000, sessions=5_000_000),
+}
+
+def lab_id(spec: DatasetSpec, lab: int) -> str:
+    return f"{spec.prefix}{lab:04d}"
+
+def machine_key(spec: DatasetSpec, lab: int, seat: int) -> str:
+    return f"{spec.prefix.lower()}-{lab:04d}-{seat:03d}"
+
+def student_name(spec: DatasetSpec, student: int) -> str:
+    # minúsculo: o /session/new compara o nome em minúsculas
+    return f"{spec.prefix.lower()}aluno{student:06d}"
+
+def username(spec: DatasetSpec, user: int) -> str:
+    return f"{spec.prefix.lower()}prof{user:05d}"
+
+def class_var(group: int) -> str:
+    return f"INFO{group + 1}"
+
+def student_class_var(spec: DatasetSpec, student: int) -> str:
+    """Turma do aluno: os alunos de cada lab são divididos em turmas do tamanho do lab."""
+    return class_var((student // spec.labs) // spec.machines_per_lab)
+
+def groups_per_lab(spec: DatasetSpec) -> int:
+    """Turmas de cada lab: os alunos são distribuídos entre os labs e divididos em turmas do tamanho do lab."""
+    return max(1, math.ceil(spec.students / (spec.labs * spec.machines_per_lab)))
+
+def student_for(spec: DatasetSpec, lab: int, group: int, seat: int) -> int | None:
+    """Índice do aluno que senta na máquina `seat` na aula da turma `group` do lab (None = lugar vago)."""
+    student = lab + spec.labs * (group * spec.machines_per_lab + seat)
+    return student if student < spec.students else None
+
+def _labs(spec: DatasetSpec):
+    classes = ",".join(class_var(g) for g in range(groups_per_lab(spec)))
+    for lab in range(spec.labs):
+        yield dict(lab_id=lab_id(spec, lab), lab_name=f"Laboratório {spec.prefix}{lab}", classes=classes[:50])
+
+def _machines(spec: DatasetSpec, rng: random.Random):
+    states = list(StateCleanliness)
+    for lab in range(spec.labs):
+        for seat in range(spec.machines_per_lab):
+            yield dict(
+                machine_key=machine_key(spec, lab, seat), machine_name=f"PC-{seat + 1:03d}",
+                motherboard=rng.choice(("H610M", "B660M", "A520M")), memory=rng.choice(("8GB", "16GB")),
+                storage=rng.choice(("256GB", "512GB")), state_cleanliness=rng.choice(states),
+                last_checked=spec.start - timedelta(days=rng.randint(0, 60)), lab_id=lab_id(spec, lab),
+            )
+
+def _students(spec: DatasetSpec, password_hash: str):
+    for student in range(spec.students):
+        yield dict(student_id=student + 1, student_name=student_name(spec, student),
+                   password_hash=password_hash, class_var=student_class_var(spec, student))
+
+def _users(spec: DatasetSpec, password_hash: str):
+    for user in range(spec.labs * spec.users_per_lab):
+        name = username(spec, user)
+        yield dict(user_id=user + 1, username=name, email=f"{name}@escola.example", hashed_password=password_hash,
+                   is_active=True)
+
+def _user_labs(spec: DatasetSpec):
+    for user in range(spec.labs * spec.users_per_lab):
+        yield dict(user_id=user + 1, lab_id=lab_id(spec, user // spec.users_per_lab))
+
+def _task_count(spec: DatasetSpec) -> int:
+    # cada tarefa é criada pelo primeiro usuário do lab
+    return spec.labs * spec.tasks_per_lab if spec.users_per_lab else 0
+
+def _tasks(spec: DatasetSpec, rng: random.Random):
+    for task in range(_task_count(spec)):
+        lab = task // spec.tasks_per_lab
+        yield dict(
+            task_id=task + 1, task_name=f"{spec.prefix}-tarefa-{task:06d}", task_description="Tarefa gerada",
+            is_complete=rng.random() < 0.5, task_creation=spec.start + timedelta(days=rng.randint(0, 90)),
+            lab_id=lab_id(spec, lab), user_id=lab * spec.users_per_lab + 1,
+        )
+
+def _task_machines(spec: DatasetSpec, rng: random.Random):
+    per_task = min(spec.machines_per_task, spec.machines_per_lab)
+    for task in range(_task_count(spec)):
+        lab = task // spec.tasks_per_lab
+        for seat in rng.sample(range(spec.machines_per_lab), per_task):
+            yield dict(task_id=task + 1, machine_key=machine_key(spec, lab, seat))
+
+def _versions(spec: DatasetSpec):
+    # como o v0004 faz nos bancos antigos: sem a linha o GET responde sem ETag/Last-Modified
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for lab in range(spec.labs):
+        for resource in (LAB_MACHINES, LAB_TASKS):
+            yield dict(resource=resource, resource_key=lab_id(spec, lab), version=1, updated_at=now)
+        for seat in range(spec.machines_per_lab):
+            yield dict(resource=MACHINE, resource_key=machine_key(spec, lab, seat), version=1, updated_at=now)
+
+def _login_offset(rng: random.Random) -> int:
+    """Segundos depois do início da aula: rajada nos primeiros minutos, alguns atrasados."""
+    if rng.random() < 0.05:
+        return rng.randint(300, 1800)
+    return min(int(rng.expovariate(1 / 45)), 600)
+
+def _sessions(spec: DatasetSpec, rng: random.Random):
+    """(Session, SystemMetrics) em ordem cronológica até completar spec.sessions."""
+    groups = groups_per_lab(spec)
+    # nomes prontos: formatar por linha custa mais que o resto da geração
+    labs = [lab_id(spec, lab) for lab in range(spec.labs)]
+    keys = [[machine_key(spec, lab, seat) for seat in range(spec.machines_per_lab)] for lab in range(spec.labs)]
+    session_id, day = 0, spec.start
+    while session_id < spec.sessions:
+        if day.weekday() < 5:
+            for hour, minute in DATASET_PERIODS:
+                period = day.replace(hour=hour, minute=minute)
+                rows = []
+                for lab in range(spec.labs):
+                    if rng.random() >= spec.occupancy:
+                        continue
+                    group = rng.randrange(groups)
+                    for seat in range(spec.machines_per_lab):
+                        student = student_for(spec, lab, group, seat)
+                        if student is None or rng.random() >= spec.attendance:
+                            continue
+                        rows.append((period + timedelta(seconds=_login_offset(rng)), lab, seat, student))
+                rows.sort()
+                for session_start, lab, seat, student in rows:
+                    session_id += 1
+                    yield (
+                        dict(session_id=session_id, session_start=session_start, machine_key=keys[lab][seat],
+                             student_id=student + 1, lab_id=labs[lab]),
+                        dict(metrics_id=session_id, session_id=session_id, cpu_usage=round(rng.uniform(2, 95), 1),
+                             ram_usage=round(rng.uniform(20, 90), 1), cpu_temp=round(rng.uniform(35, 85), 1)),
+                    )
+                    if session_id >= spec.sessions:
+                        return
+        day += timedelta(days=1)
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def _insert(conn, table, rows, size: int) -> int:
+    total = 0
+    for chunk in _chunks(rows, size):
+        await conn.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+def _create_tables(sync_conn) -> list:
+    """Cria as tabelas que faltam sem os índices; devolve os índices para criar depois da carga."""
+    existing = set(inspect(sync_conn).get_table_names())
+    deferred = []
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            continue
+        # table.create, e não CreateTable, para o PostgreSQL criar também o tipo do Enum
+        table.create(sync_conn)
+        for index in table.indexes:
+            index.drop(sync_conn)
+            deferred.append(index)
+    return deferred
+
+async def _reset_sequences(conn):
+    # os ids vieram daqui: o próximo INSERT do app pegaria um id já usado
+    for table, column in ((Student, "student_id"), (User, "user_id"), (Task, "task_id"),
+                          (Session, "session_id"), (SystemMetrics, "metrics_id")):
+        name = table.__tablename__
+        await conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('\"{name}\"', '{column}'), "
+            f"COALESCE((SELECT MAX({column}) FROM \"{name}\"), 0) + 1, false)"
+        )
+
+async def generate(engine, spec: DatasetSpec, progress=None) -> dict:
+    """Carrega `spec` no banco da engine e devolve as linhas inseridas por tabela.
+
+    As tabelas com id inteiro (alunos, usuários, tarefas, sessões) precisam estar
+    vazias; `progress(tabela, linhas)` é chamado a cada tabela.
+    """
+    if len(lab_id(spec, 0)) > Lab.lab_id.type.length:
+        raise ValueError(f"prefix longo demais para o lab_id: {spec.prefix}")
+    rng = random.Random(spec.seed)
+    password_hash = hash_password_sync(spec.password)
+    counts = {}
+
+    def done(name: str, rows: int):
+        counts[name] = rows
+        if progress is not None:
+            progress(name, rows)
+
+    async with engine.begin() as conn:
+        deferred = await conn.run_sync(_create_tables)
+        for table in (Student, User, Task, Session, SystemMetrics):
+            # os ids inteiros são gerados a partir de 1
+            if (await conn.execute(select(table).limit(1))).first() is not None:
+                raise ValueError(f"a tabela {table.__tablename__} já tem dados, use um banco vazio")
+
+        done("Lab", await _insert(conn, Lab, _labs(spec), spec.chunk_size))
+        done("Machine", await _insert(conn, Machine, _machines(spec, rng), spec.chunk_size))
+        done("Student", await _insert(conn, Student, _students(spec, password_hash), spec.chunk_size))
+        done("User", await _insert(conn, User, _users(spec, password_hash), spec.chunk_size))
+        done("user_lab_association", await _insert(conn, user_lab_association, _user_labs(spec), spec.chunk_size))
+        done("Task", await _insert(conn, Task, _tasks(spec, rng), spec.chunk_size))
+        done("task_machine_association",
+             await _insert(conn, task_machine_association, _task_machines(spec, rng), spec.chunk_size))
+        done("ResourceVersion", await _insert(conn, ResourceVersion, _versions(spec), spec.chunk_size))
+
+        sessions = 0
+        for chunk in _chunks(_sessions(spec, rng), spec.chunk_size):
+            await conn.execute(insert(Session), [session for session, _ in chunk])
+            await conn.execute(insert(SystemMetrics), [metrics for _, metrics in chunk])
+            sessions += len(chunk)
+            if progress is not None and sessions % (spec.chunk_size * 25) == 0:
+                progress("Session", sessions)
+        done("Session", sessions)
+        done("SystemMetrics", sessions)
+
+        for index in deferred:
+            await conn.execute(CreateIndex(index))
+        if conn.dialect.name == "postgresql":
+            await _reset_sequences(conn)
+        await conn.exec_driver_sql("ANALYZE")
+    return counts
+
+async def main(args) -> dict:
+    spec = replace(SCALES[args.scale], **{
+        name: value for name, value in (
+            ("labs", args.labs), ("machines_per_lab", args.machines_per_lab), ("students", args.students),
+            ("sessions", args.sessions), ("seed", args.seed), ("prefix", args.prefix),
+        ) if value is not None
+    })
+    engine = build_engine(args.url)
+    start = time.perf_counter()
+
+    def progress(table: str, rows: int):
+        print(f"{table}: {rows} linhas ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    try:
+        counts = await generate(engine, spec, progress)
+    finally:
+        await engine.dispose()
+    return {"scale": args.scale, "seconds": round(time.perf_counter() - start, 1), **counts}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True, help="Banco de destino (DATABASE_URL), de preferência vazio.")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Volume base.")
+    parser.add_argument("--labs", type=int, help="Sobrescreve o número de labs da escala.")
+    parser.add_argument("--machines-per-lab", type=int, help="Sobrescreve as máquinas por lab.")
+    parser.add_argument("--students", type=int, help="Sobrescreve o número de alunos.")
+    parser.add_argument("--sessions", type=int, help="Sobrescreve o número de sessões.")
+    parser.add_argument("--seed", type=int, help="Semente dos dados.")
+    parser.add_argument("--prefix", help="Prefixo dos ids e nomes gerados.")
+    print(asyncio.run(main(parser.parse_args())))
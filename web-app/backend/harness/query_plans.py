@@ -0,0 +1,91 @@
+"""Confere com EXPLAIN QUERY PLAN que as queries dos handlers usam índice.
+
+Roda o mesmo roteiro de harness.smoke_handlers em um SQLite descartável com
+volume de fundo, captura cada SELECT/WITH/UPDATE/DELETE emitido e falha (exit 1)
+se alguma query fizer SCAN completo de uma tabela do models.py.
+
+Uso (dentro de web-app/backend):
+    python -m harness.query_plans
+    python -m harness.query_plans --sessions 50000 --verbose
+"""
+import argparse
+import asyncio
+import re
+import sqlite3
+import sys
+from dataclasses import replace
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import build_engine
+from models import Base
+from harness.dataset import SCALES, generate
+from harness.smoke_handlers import exercise_handlers, current_step
+from harness.throwaway_db import throwaway_database
+
+TABLES = {table.name for table in Base.metadata.sorted_tables}
+SCAN_RE = re.compile(r"^SCAN (\S+)(.*)$")
+
+async def seed_background(engine, sessions: int):
+    """Volume de fundo em outros labs, para o planner ter estatísticas realistas."""
+    await generate(engine, replace(SCALES["small"], sessions=sessions, prefix="BG"))
+
+def full_scans(plan_rows) -> list[str]:
+    scans = []
+    for row in plan_rows:
+        detail = row[-1]
+        match = SCAN_RE.match(detail)
+        if match and match.group(1) in TABLES:
+            scans.append(detail)
+    return scans
+
+async def main(sessions: int, verbose: bool) -> int:
+    async with throwaway_database("sqlite") as url:
+        engine = build_engine(url)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        await seed_background(engine, sessions) # cria as tabelas
+
+        captured = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            step = current_step.get()
+            if step and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+                captured.append((step, statement, tuple(parameters or ())))
+
+        failures = await exercise_handlers(session_factory)
+        await engine.dispose()
+        if failures:
+            print(f"{failures} handler(s) falharam, o plano abaixo pode estar incompleto")
+
+        raw = sqlite3.connect(url.split("///", 1)[1])
+        problems = 0
+        seen = set()
+        for step, statement, params in captured:
+            if (step, statement) in seen:
+                continue
+            seen.add((step, statement))
+            plan = raw.execute(f"EXPLAIN QUERY PLAN {statement}", params).fetchall()
+            scans = full_scans(plan)
+            if scans:
+                problems += 1
+                print(f"SCAN  [{step}] {' '.join(statement.split())[:160]}")
+                for line in scans:
+                    print(f"        {line}")
+            elif verbose:
+                print(f"ok    [{step}] {' '.join(statement.split())[:160]}")
+                for row in plan:
+                    print(f"        {row[-1]}")
+        raw.close()
+
+    print(f"{len(seen)} queries analisadas, {problems} com SCAN completo")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20000, help="Sessões de fundo antes do ANALYZE.")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o plano de todas as queries.")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.sessions, args.verbose)) else 0)
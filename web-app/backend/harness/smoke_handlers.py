@@ -0,0 +1,343 @@
+"""Executa os handlers de session/, config/, task/ e student/ contra um banco descartável.
+
+Serve para conferir que tudo roda igual no SQLite e no PostgreSQL (asyncpg).
+
+Uso (dentro de web-app/backend):
+    python -m harness.smoke_handlers                      # PostgreSQL se disponível, senão SQLite
+    python -m harness.smoke_handlers --backend sqlite
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/postgres python -m harness.smoke_handlers --backend postgres
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import traceback
+from datetime import datetime
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import build_engine
+from models import Base, User
+from schemas import (
+    LabCreate, LabUpdate, NewMachineConfig, MachineConfig, MachineNewCheck,
+    MachineNewState, SessionCreate, SessionBatchCreate, SessionBatchItem, TaskCreate
+)
+from auth.auth_handler import get_password_hash, get_user, authenticate_user
+from config import lab_handler, machine_config_handler
+from metrics import metrics_handler
+from metrics.metrics_handler import AggregateQuery
+from session import session_handler, write_behind
+from session.pagination import SessionPage, decode_cursor, parse_date_param
+from student import student_handler
+from student.pagination import StudentPage, decode_cursor as decode_student_cursor
+from task import task_handler
+from harness.throwaway_db import throwaway_database
+
+# nome do passo em execução, usado por quem escuta as queries (ex: harness.query_plans)
+current_step: ContextVar[str | None] = ContextVar("current_step", default=None)
+
+def machine_payload(i: int, **overrides) -> dict:
+    payload = dict(
+        machine_key=f"harness-key-{i}",
+        machine_name=f"PC-{i:02d}",
+        motherboard="ASUS H110M",
+        memory="8GB",
+        storage="240GB SSD",
+        state_cleanliness="BOM",
+        last_checked="01/02/2025",
+        lab_id="LABH",
+    )
+    payload.update(overrides)
+    return payload
+
+def session_payload(student_name: str, **overrides) -> SessionCreate:
+    payload = dict(
+        student_name=student_name,
+        password="senha123",
+        class_var="INFO1",
+        session_start="03/02/2025 07:30:00",
+        cpu_usage=21.5,
+        ram_usage=48.0,
+        cpu_temp=52.0,
+        lab_id="LABH",
+    )
+    payload.update(overrides)
+    return SessionCreate(**payload)
+
+class Runner:
+    def __init__(self, session_factory, verbose: bool = False):
+        self.session_factory = session_factory
+        self.verbose = verbose
+        self.failures = 0
+
+    async def step(self, name: str, coro_fn, expect_status: int | None = None):
+        current_step.set(name)
+        async with self.session_factory() as db:
+            try:
+                result = await coro_fn(db)
+            except HTTPException as e:
+                if expect_status == e.status_code:
+                    print(f"  ok    {name} (HTTP {e.status_code} esperado)")
+                    return None
+                self.failures += 1
+                print(f"  FALHA {name}: HTTP {e.status_code} {e.detail}")
+                return None
+            except Exception as e:
+                self.failures += 1
+                print(f"  FALHA {name}: {traceback.format_exception_only(e)[-1].strip()}")
+                if self.verbose:
+                    traceback.print_exc()
+                return None
+        if expect_status is not None:
+            self.failures += 1
+            print(f"  FALHA {name}: esperava HTTP {expect_status}")
+            return result
+        print(f"  ok    {name}")
+        return result
+
+async def run_scenario(url: str, verbose: bool = False) -> int:
+    engine = build_engine(url)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    failures = await exercise_handlers(session_factory, verbose)
+    await engine.dispose()
+    return failures
+
+async def exercise_handlers(session_factory, verbose: bool = False) -> int:
+    """Passa por todos os handlers com um banco vazio (as tabelas já devem existir)."""
+    r = Runner(session_factory, verbose)
+
+    async def create_users(db):
+        db.add_all([
+            User(username="prof", email="prof@ifba.edu.br", hashed_password=await get_password_hash("prof123")),
+            User(username="monitor", email="monitor@ifba.edu.br", hashed_password=await get_password_hash("mon123")),
+        ])
+        await db.commit()
+    await r.step("cria usuários", create_users)
+    await r.step("auth.authenticate_user", lambda db: authenticate_user(db, "prof", "prof123"))
+
+    async def as_user(db, username, fn):
+        user = await get_user(db, username)
+        return await fn(user)
+
+    print("config/lab_handler")
+    await r.step("create_lab", lambda db: as_user(db, "prof", lambda u: lab_handler.create_lab(
+        new_lab=LabCreate(lab_id="LABH", lab_name="Lab Harness", classes="INFO1,INFO2"), user=u, db=db)))
+    await r.step("create_lab (duplicado)", lambda db: as_user(db, "prof", lambda u: lab_handler.create_lab(
+        new_lab=LabCreate(lab_id="LABH", lab_name="Lab Harness", classes="INFO1"), user=u, db=db)), expect_status=400)
+    await r.step("create_lab (descartável)", lambda db: as_user(db, "prof", lambda u: lab_handler.create_lab(
+        new_lab=LabCreate(lab_id="LABX", lab_name="Lab Apagar", classes="INFO3"), user=u, db=db)))
+    await r.step("update_lab", lambda db: as_user(db, "prof", lambda u: lab_handler.update_lab(
+        lab_id="LABH", new_lab=LabUpdate(lab_name="Lab Harness 1"), user=u, db=db)))
+    await r.step("join_lab", lambda db: as_user(db, "monitor", lambda u: lab_handler.join_lab(lab_id="LABH", user=u, db=db)))
+    await r.step("join_lab (repetido)", lambda db: as_user(db, "monitor", lambda u: lab_handler.join_lab(
+        lab_id="LABH", user=u, db=db)), expect_status=409)
+    await r.step("verify_lab (sem permissão)", lambda db: as_user(db, "monitor", lambda u: lab_handler.verify_lab(
+        lab_id="LABX", user=u, db=db)), expect_status=403)
+    await r.step("get_lab_for_user", lambda db: as_user(db, "prof", lambda u: lab_handler.get_lab_for_user(user=u, db=db)))
+    await r.step("get_users_for_lab", lambda db: lab_handler.get_users_for_lab(lab_id="LABH", db=db))
+
+    print("config/machine_config_handler")
+    for i in range(3):
+        await r.step(f"post_new_machine_config {i}", lambda db, i=i: machine_config_handler.post_new_machine_config(
+            new_machine=NewMachineConfig(**machine_payload(i)), db=db))
+    await r.step("post_new_machine_config (duplicada)", lambda db: machine_config_handler.post_new_machine_config(
+        new_machine=NewMachineConfig(**machine_payload(0)), db=db), expect_status=400)
+    await r.step("get_machine_config", lambda db: machine_config_handler.get_machine_config(machine_key="harness-key-0", db=db))
+    await r.step("get_machine_config (outra)", lambda db: machine_config_handler.get_machine_config(machine_key="harness-key-1", db=db))
+    await r.step("update_machine_config", lambda db: machine_config_handler.update_machine_config(
+        machine_key="harness-key-0",
+        new_config=MachineConfig(**{k: v for k, v in machine_payload(0, memory="16GB").items() if k != "machine_key"}),
+        db=db))
+    await r.step("update_last_check", lambda db: as_user(db, "prof", lambda u: machine_config_handler.update_last_check(
+        machine_key="harness-key-1", new_check=MachineNewCheck(new_check="10/02/2025"), user=u, db=db)))
+    await r.step("update_state_cleanliness", lambda db: as_user(db, "prof", lambda u: machine_config_handler.update_state_cleanliness(
+        machine_key="harness-key-1", new_state=MachineNewState(new_state="urgente"), user=u, db=db)))
+
+    async def machine_after_updates(db):
+        # get_machine_config já foi chamado antes: confere que as escritas invalidaram o cache
+        config = await machine_config_handler.get_machine_config(machine_key="harness-key-1", db=db)
+        if (config.state_cleanliness, config.last_checked) != ("URGENTE", datetime(2025, 2, 10)):
+            raise AssertionError(f"cache desatualizado: {config.state_cleanliness} {config.last_checked}")
+        if (await machine_config_handler.get_machine_config(machine_key="harness-key-0", db=db)).memory != "16GB":
+            raise AssertionError("cache desatualizado depois do update_machine_config")
+        return config
+    await r.step("get_machine_config (após updates)", machine_after_updates)
+    await r.step("get_machines_for_lab", lambda db: lab_handler.get_machines_for_lab(lab_id="LABH", db=db))
+
+    print("student/student_handler + session/session_handler")
+    await r.step("verify_student (cadastro)", lambda db: student_handler.verify_student(
+        student_name="Maria", password="senha123", class_var="INFO1", db=db))
+    await r.step("verify_student (senha errada)", lambda db: student_handler.verify_student(
+        student_name="maria", password="errada", class_var="INFO1", db=db), expect_status=401)
+    await r.step("post_new_session", lambda db: session_handler.post_new_session(
+        machine_key="harness-key-0", session=session_payload("Maria"), db=db))
+    await r.step("post_new_session (outro aluno)", lambda db: session_handler.post_new_session(
+        machine_key="harness-key-1", session=session_payload("joao", session_start="03/02/2025 09:10:00"), db=db))
+    await r.step("post_new_session (máquina inexistente)", lambda db: session_handler.post_new_session(
+        machine_key="nao-existe", session=session_payload("maria"), db=db), expect_status=404)
+
+    async def session_batch(db):
+        batch = SessionBatchCreate(sessions=[
+            SessionBatchItem(machine_key="harness-key-1", **session_payload("maria", session_start="04/02/2025 07:30:00").model_dump()),
+            SessionBatchItem(machine_key="nao-existe", **session_payload("maria").model_dump()),
+            SessionBatchItem(machine_key="harness-key-0", **session_payload("joao", password="errada").model_dump()),
+            SessionBatchItem(machine_key="harness-key-0", **session_payload("Ana", session_start="04/02/2025 09:00:00").model_dump()),
+            SessionBatchItem(machine_key="harness-key-1", **session_payload("ana", session_start="04/02/2025 10:00:00").model_dump()),
+        ])
+        response = await session_handler.post_session_batch(batch=batch, db=db)
+        codes = [item.status_code for item in response.results]
+        if codes != [201, 404, 401, 201, 201] or response.created != 3:
+            raise AssertionError(f"resultado inesperado do lote: {codes}")
+        return response
+    await r.step("post_session_batch", session_batch)
+    await r.step("get_sessions_for_lab", lambda db: session_handler.get_sessions_for_lab(lab_id="LABH", db=db))
+
+    async def paged_sessions(db):
+        full = await session_handler.get_sessions_for_lab(lab_id="LABH", db=db)
+        pages, after = [], None
+        while True:
+            page = await session_handler.get_sessions_for_lab(lab_id="LABH", page=SessionPage(limit=2, after=after), db=db)
+            pages.extend(page.items)
+            if not page.next_cursor:
+                break
+            after = decode_cursor(page.next_cursor)
+        if pages != full.items or len(full.items) != 5:
+            raise AssertionError(f"páginas ({len(pages)}) diferentes da lista completa ({len(full.items)})")
+        day = await session_handler.get_sessions_for_lab(lab_id="LABH", db=db, page=SessionPage(
+            start=parse_date_param("04/02/2025", "from"), end=parse_date_param("04/02/2025", "to", end=True)))
+        if len(day.items) != 3:
+            raise AssertionError(f"filtro por data devolveu {len(day.items)} sessões")
+    await r.step("get_sessions_for_lab (paginado)", paged_sessions)
+
+    async def metrics_aggregate(db):
+        total = await metrics_handler.get_metrics_aggregate(AggregateQuery(lab_id="LABH"), db=db)
+        if len(total) != 1 or total[0].count != 5:
+            raise AssertionError(f"agregado do lab: {total}")
+        by_day = await metrics_handler.get_metrics_aggregate(
+            AggregateQuery(group_by=("machine", "class_var"), bucket="day", lab_id="LABH"), db=db)
+        if sum(row.count for row in by_day) != 5:
+            raise AssertionError(f"grupos por máquina/turma/dia somam {sum(row.count for row in by_day)}")
+        return by_day
+    await r.step("get_metrics_aggregate", metrics_aggregate)
+    await r.step("get_sessions_for_machine", lambda db: session_handler.get_sessions_for_machine(machine_key="harness-key-0", db=db))
+    student = await r.step("get_student", lambda db: student_handler.get_student(student_name="maria", class_var="INFO1", db=db))
+    if student:
+        await r.step("get_sessions_for_student", lambda db: session_handler.get_sessions_for_student(
+            student_id=student.student_id, db=db))
+    await r.step("get_students_for_lab", lambda db: lab_handler.get_students_for_lab(lab_id="LABH", db=db))
+
+    async def paged_students(db):
+        full = await lab_handler.get_students_for_lab(lab_id="LABH", db=db)
+        pages, after = [], None
+        while True:
+            page = await lab_handler.get_students_for_lab(lab_id="LABH", page=StudentPage(limit=1, after=after), db=db)
+            pages.extend(page.items)
+            if not page.next_cursor:
+                break
+            after = decode_student_cursor(page.next_cursor)
+        if pages != full.items or len(full.items) < 2:
+            raise AssertionError(f"páginas ({len(pages)}) diferentes da lista completa ({len(full.items)})")
+        lab_sessions = (await session_handler.get_sessions_for_lab(lab_id="LABH", db=db)).items
+        for student in full.items:
+            latest = next(s for s in lab_sessions if s.student_name == student.student_name)
+            if student.last_session.session_start != latest.session_start:
+                raise AssertionError(f"última sessão errada para {student.student_name}")
+        found = await lab_handler.get_students_for_lab(lab_id="LABH", page=StudentPage(search="MAR"), db=db)
+        if [s.student_name for s in found.items] != ["maria"]:
+            raise AssertionError(f"busca por nome devolveu {[s.student_name for s in found.items]}")
+    await r.step("get_students_for_lab (paginado)", paged_students)
+
+    async def lab_summary(db):
+        lab = await lab_handler.get_lab(lab_id="LABH", db=db)
+        students = await lab_handler.get_students_for_lab(lab_id="LABH", db=db)
+        if lab.student_count != len(students.items):
+            raise AssertionError(f"student_count={lab.student_count}, alunos com sessão no lab={len(students.items)}")
+        return lab
+    await r.step("get_lab", lab_summary)
+
+    async def session_write_behind(db):
+        # liga o write-behind global (como o lifespan faria) com um journal deixado por um processo que caiu
+        writer = write_behind.session_writer
+        maria = await student_handler.get_student(student_name="maria", class_var="INFO1", db=db)
+        def row(session_start):
+            return dict(session_start=session_start, machine_key="harness-key-1", student_id=maria.student_id,
+                        lab_id="LABH", cpu_usage=10.0, ram_usage=20.0, cpu_temp=30.0)
+        async def count():
+            async with r.session_factory() as other:
+                page = await session_handler.get_sessions_for_machine(machine_key="harness-key-1", db=other)
+            return len(page.items)
+        before = await count()
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = os.path.join(tmp, "sessions.journal")
+            with open(journal, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"seq": 1, "row": row("05/02/2025 07:00:00")}) + "\n")
+                f.write(json.dumps({"done": 1}) + "\n") # já gravada
+                f.write(json.dumps({"seq": 2, "row": row("04/02/2025 07:30:00")}) + "\n") # gravada, sem checkpoint
+                f.write(json.dumps({"seq": 3, "row": row("05/02/2025 08:00:00")}) + "\n") # não gravada
+                f.write('{"seq": 4, "ro') # linha cortada pela queda
+            saved = writer.enabled, writer.journal_path
+            writer.enabled, writer.journal_path = True, journal
+            try:
+                await writer.start(r.session_factory)
+                if await count() != before + 1:
+                    raise AssertionError(f"journal: esperava 1 sessão recuperada, vieram {await count() - before}")
+                for minute in range(3):
+                    await session_handler.queue_new_session(
+                        machine_key="harness-key-1",
+                        session=session_payload("maria", session_start=f"06/02/2025 07:0{minute}:00"), db=db)
+                await writer.stop()
+                if os.path.getsize(journal):
+                    raise AssertionError("journal não foi zerado depois de esvaziar a fila")
+            finally:
+                await writer.stop()
+                writer.enabled, writer.journal_path = saved
+        if await count() != before + 4:
+            raise AssertionError(f"write-behind gravou {await count() - before} sessões, esperava 4")
+        await session_handler.queue_new_session(
+            machine_key="harness-key-1", session=session_payload("maria"), db=db) # parado: 503
+    await r.step("queue_new_session (write-behind + journal)", session_write_behind, expect_status=503)
+
+    print("task/task_handler")
+    await r.step("post_new_task", lambda db: as_user(db, "prof", lambda u: task_handler.post_new_task(
+        new_task=TaskCreate(task_name="Limpar teclados", task_description="Usar álcool isopropílico",
+                            lab_id="LABH", machines=["harness-key-0", "harness-key-1"]), user=u, db=db)))
+    await r.step("post_new_task (duplicada)", lambda db: as_user(db, "prof", lambda u: task_handler.post_new_task(
+        new_task=TaskCreate(task_name="limpar teclados", task_description="-",
+                            lab_id="LABH", machines=["harness-key-0"]), user=u, db=db)), expect_status=409)
+    tasks = await r.step("get_tasks_for_lab", lambda db: as_user(db, "prof", lambda u: task_handler.get_tasks_for_lab(
+        lab_id="LABH", user=u, db=db)))
+    await r.step("get_tasks_for_machine", lambda db: as_user(db, "monitor", lambda u: task_handler.get_tasks_for_machine(
+        machine_key="harness-key-1", user=u, db=db)))
+    if tasks:
+        await r.step("complete_task", lambda db: as_user(db, "prof", lambda u: task_handler.complete_task(
+            task_id=tasks[0].task_id, user=u, db=db)))
+
+    print("remoções")
+    await r.step("delete_machine", lambda db: as_user(db, "prof", lambda u: machine_config_handler.delete_machine(
+        machine_key="harness-key-2", user=u, db=db)))
+    await r.step("delete_lab", lambda db: as_user(db, "prof", lambda u: lab_handler.delete_lab(lab_id="LABX", user=u, db=db)))
+
+    current_step.set(None)
+    return r.failures
+
+async def main(backend: str, verbose: bool) -> int:
+    async with throwaway_database(backend) as url:
+        print(f"banco: {url}")
+        failures = await run_scenario(url, verbose)
+    print("tudo certo" if not failures else f"{failures} falha(s)")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["auto", "postgres", "sqlite"], default="auto")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o traceback completo das falhas.")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.backend, args.verbose)) else 0)
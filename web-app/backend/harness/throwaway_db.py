@@ -0,0 +1,111 @@
+"""Bancos descartáveis para os scripts de harness e benchmarks.
+
+Ordem de escolha quando backend="auto":
+  1. TEST_DATABASE_URL (servidor PostgreSQL já rodando, cria e apaga um database temporário)
+  2. initdb/pg_ctl no PATH (ou em PG_BIN): sobe um cluster PostgreSQL temporário
+  3. SQLite em um arquivo temporário
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+def _pg_binary(name: str) -> str | None:
+    pg_bin = os.getenv("PG_BIN")
+    if pg_bin and os.path.exists(os.path.join(pg_bin, name)):
+        return os.path.join(pg_bin, name)
+    return shutil.which(name)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@asynccontextmanager
+async def _temporary_database_on(server_url: str):
+    url = make_url(server_url)
+    if url.drivername == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    name = f"infodomus_harness_{uuid.uuid4().hex[:8]}"
+
+    admin = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    async with admin.connect() as conn:
+        await conn.execute(text(f'CREATE DATABASE "{name}"'))
+    try:
+        yield url.set(database=name).render_as_string(hide_password=False)
+    finally:
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        await admin.dispose()
+
+@asynccontextmanager
+async def _local_postgres_cluster():
+    initdb, pg_ctl = _pg_binary("initdb"), _pg_binary("pg_ctl")
+    tmp = tempfile.mkdtemp(prefix="infodomus_pg_")
+    data_dir = os.path.join(tmp, "data")
+    port = _free_port()
+    try:
+        subprocess.run(
+            [initdb, "-D", data_dir, "-U", "postgres", "-A", "trust"],
+            check=True, capture_output=True,
+        )
+        subprocess.run(
+            [pg_ctl, "-D", data_dir, "-l", os.path.join(tmp, "postgres.log"), "-w",
+             "-o", f"-p {port} -k {tmp} -c listen_addresses=''", "start"],
+            check=True, capture_output=True,
+        )
+        try:
+            url = f"postgresql+asyncpg://postgres@/postgres?host={tmp}&port={port}"
+            async with _temporary_database_on(url) as db_url:
+                yield db_url
+        finally:
+            subprocess.run([pg_ctl, "-D", data_dir, "-m", "fast", "stop"], capture_output=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+@asynccontextmanager
+async def _sqlite_file():
+    with tempfile.TemporaryDirectory(prefix="infodomus_sqlite_") as tmp:
+        yield f"sqlite+aiosqlite:///{os.path.join(tmp, 'harness.db')}"
+
+def _can_start_postgres() -> bool:
+    # o initdb se recusa a rodar como root
+    return bool(_pg_binary("initdb") and _pg_binary("pg_ctl")) and os.geteuid() != 0
+
+@asynccontextmanager
+async def throwaway_database(backend: str = "auto"):
+    """Gera a URL de um banco vazio que é apagado ao sair do contexto."""
+    if backend not in ("auto", "postgres", "sqlite"):
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    if backend in ("auto", "postgres"):
+        server_url = os.getenv("TEST_DATABASE_URL")
+        if server_url:
+            async with _temporary_database_on(server_url) as url:
+                yield url
+            return
+        if _can_start_postgres():
+            async with _local_postgres_cluster() as url:
+                yield url
+            return
+        if backend == "postgres":
+            raise RuntimeError(
+                "PostgreSQL indisponível: defina TEST_DATABASE_URL ou coloque initdb/pg_ctl no PATH (usuário não-root)"
+            )
+
+    async with _sqlite_file() as url:
+        yield url
+
+if __name__ == "__main__":
+    async def _show():
+        async with throwaway_database() as url:
+            print(url)
+    asyncio.run(_show())
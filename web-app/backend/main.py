@@ -2,23 +2,45 @@ import uvicorn
 import argparse
 import asyncio
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Depends, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
 
-from database import create_tables
+from database import create_tables, engine, AsyncSessionLocal
+from migrations.runner import migrate
+from auth.hashing import shutdown_executor
+from cache import entities
+from session.write_behind import session_writer
+from responses import default_response_class
+from timestamps import negotiate_time_format
+from monitoring.middleware import MetricsMiddleware
 
 from routers import (
     machine_config_endpoints,lab_endpoints,user,
-    session_endpoints,task_endpoints,auth
+    session_endpoints,task_endpoints,auth,monitoring_endpoints,
+    metrics_endpoints
 )
 
 load_dotenv()
 WEB_API_KEY = os.getenv("WEB_API_KEY")
 
-app = FastAPI(root_path="/api")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session_writer.start(AsyncSessionLocal) # só com SESSION_WRITE_MODE=write_behind
+    yield
+    await session_writer.stop() # grava o que ainda está na fila
+    shutdown_executor() # pool de hash de senha (auth/hashing.py)
+    await entities.close() # conexões do backend redis, se houver
+
+app = FastAPI(
+    root_path="/api",
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
+    dependencies=[Depends(negotiate_time_format)], # X-Time-Format das respostas (timestamps.py)
+)
 
 origins = [
     "http://backend:8080", # ip acessado pelo frontend
@@ -31,7 +53,9 @@ app.add_middleware( # serve para restringir o acesso da API
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Vary", "Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware) # latência/tamanho por rota, servidos em /metrics
 
 async def initialize_db(create_db: bool): # verifica se a db existe
     if create_db:
@@ -48,6 +72,9 @@ app.include_router(session_endpoints.router, prefix="/session", dependencies=[De
 app.include_router(machine_config_endpoints.router, prefix="/machine_config", dependencies=[Depends(verify_key)])     
 app.include_router(lab_endpoints.router, prefix="/lab", dependencies=[Depends(verify_key)])     
 app.include_router(task_endpoints.router, prefix="/tasks", dependencies=[Depends(verify_key)])
+app.include_router(monitoring_endpoints.router, prefix="/monitoring", dependencies=[Depends(verify_key)])
+app.include_router(metrics_endpoints.router, prefix="/metrics", dependencies=[Depends(verify_key)])
+app.include_router(monitoring_endpoints.prometheus_router) # GET /metrics, formato Prometheus
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -61,11 +88,19 @@ if __name__ == "__main__":
         action="store_true",
         help="Cria o banco de dados e as tabelas necessárias."
     )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Aplica as migrações pendentes de migrations/ no banco atual."
+    )
     args = parser.parse_args()
 
     if args.create_db:
         asyncio.run(initialize_db(args.create_db))
 
+    if args.migrate:
+        asyncio.run(migrate(engine))
+
     if args.run_server:
         uvicorn.run("main:app", host="0.0.0.0", port=8000, log_level="info")
     
\ No newline at end of file
@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import Machine, Session, Student, SystemMetrics
+from schemas import MetricsAggregateResponse, MetricSummary
+
+GROUP_FIELDS = ("lab", "machine", "class_var")
+BUCKETS = ("hour", "day", "week")
+METRIC_COLUMNS = ("cpu_usage", "ram_usage", "cpu_temp")
+MAX_AGGREGATE_GROUPS = 5000
+P95 = 0.95
+
+# strftime do SQLite para o início de cada intervalo; a semana começa na segunda,
+# igual ao date_trunc('week') do PostgreSQL
+_SQLITE_BUCKETS = {
+    "hour": ("%Y-%m-%dT%H:00:00",),
+    "day": ("%Y-%m-%dT00:00:00",),
+    "week": ("%Y-%m-%dT00:00:00", "weekday 0", "-6 days"),
+}
+
+@dataclass
+class AggregateQuery:
+    group_by: tuple[str, ...] = ()
+    bucket: str | None = None
+    lab_id: str | None = None
+    machine_key: str | None = None
+    class_var: str | None = None
+    start: datetime | None = None # inclusivo
+    end: datetime | None = None # exclusivo
+
+def _bucket_column(dialect_name: str, bucket: str):
+    if dialect_name == "postgresql":
+        return func.date_trunc(bucket, Session.session_start)
+    fmt, *modifiers = _SQLITE_BUCKETS[bucket]
+    return func.strftime(fmt, Session.session_start, *modifiers)
+
+def _key_columns(query: AggregateQuery, dialect_name: str) -> list:
+    columns = []
+    if "lab" in query.group_by:
+        columns.append(Session.lab_id.label("lab_id"))
+    if "machine" in query.group_by:
+        columns += [Session.machine_key.label("machine_key"), Machine.machine_name.label("machine_name")]
+    if "class_var" in query.group_by:
+        columns.append(Student.class_var.label("class_var"))
+    if query.bucket:
+        columns.append(_bucket_column(dialect_name, query.bucket).label("bucket"))
+    return columns
+
+def _filtered(stmt, query: AggregateQuery):
+    stmt = stmt.select_from(Session).join(SystemMetrics, SystemMetrics.session_id == Session.session_id)
+    if "machine" in query.group_by:
+        stmt = stmt.join(Machine, Machine.machine_key == Session.machine_key)
+    if "class_var" in query.group_by or query.class_var is not None:
+        stmt = stmt.join(Student, Student.student_id == Session.student_id)
+    if query.lab_id is not None:
+        stmt = stmt.where(Session.lab_id == query.lab_id)
+    if query.machine_key is not None:
+        stmt = stmt.where(Session.machine_key == query.machine_key)
+    if query.class_var is not None:
+        stmt = stmt.where(Student.class_var == query.class_var)
+    if query.start is not None:
+        stmt = stmt.where(Session.session_start >= query.start)
+    if query.end is not None:
+        stmt = stmt.where(Session.session_start < query.end)
+    return stmt
+
+def _too_many_groups():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Mais de {MAX_AGGREGATE_GROUPS} grupos. Use um intervalo maior ou filtre por lab/máquina/período.",
+    )
+
+def _response(keys: dict, count: int, summaries: dict) -> MetricsAggregateResponse:
+    bucket = keys.get("bucket")
+    if isinstance(bucket, datetime):
+        keys = {**keys, "bucket": bucket.isoformat()}
+    return MetricsAggregateResponse(**keys, count=count, **summaries)
+
+async def _grouped_rows(query: AggregateQuery, key_columns: list, db: AsyncSession, with_p95: bool):
+    aggregates = [func.count(SystemMetrics.metrics_id).label("count")]
+    for name in METRIC_COLUMNS:
+        column = getattr(SystemMetrics, name)
+        aggregates += [
+            func.avg(column).label(f"{name}_mean"),
+            func.min(column).label(f"{name}_min"),
+            func.max(column).label(f"{name}_max"),
+        ]
+        if with_p95:
+            aggregates.append(func.percentile_cont(P95).within_group(column).label(f"{name}_p95"))
+    stmt = _filtered(select(*key_columns, *aggregates), query)
+    if key_columns:
+        stmt = stmt.group_by(*key_columns).order_by(*key_columns)
+    rows = (await db.execute(stmt.limit(MAX_AGGREGATE_GROUPS + 1))).all()
+    if len(rows) > MAX_AGGREGATE_GROUPS:
+        raise _too_many_groups()
+    return [row for row in rows if row.count]
+
+def _summaries(row, p95: tuple | None = None) -> dict:
+    return {
+        name: MetricSummary(
+            mean=getattr(row, f"{name}_mean"),
+            min=getattr(row, f"{name}_min"),
+            max=getattr(row, f"{name}_max"),
+            p95=getattr(row, f"{name}_p95") if p95 is None else p95[i],
+        )
+        for i, name in enumerate(METRIC_COLUMNS)
+    }
+
+async def _aggregate_in_sql(query: AggregateQuery, key_columns: list, db: AsyncSession):
+    key_names = [column.name for column in key_columns]
+    return [
+        _response({name: getattr(row, name) for name in key_names}, row.count, _summaries(row))
+        for row in await _grouped_rows(query, key_columns, db, with_p95=True)
+    ]
+
+async def _ranked_p95(query: AggregateQuery, key_columns: list, db: AsyncSession) -> dict:
+    """p95 exato por grupo sem percentile_cont: row_number() numera as linhas de cada grupo
+    por métrica e só as duas posições em volta de 0.95 * (n - 1) voltam do banco."""
+    partition = [column.element for column in key_columns] or None
+    ranks = [
+        (func.row_number().over(partition_by=partition, order_by=getattr(SystemMetrics, name)) - 1).label(f"{name}_rank")
+        for name in METRIC_COLUMNS
+    ]
+    ranked = _filtered(select(
+        *key_columns,
+        *(getattr(SystemMetrics, name).label(name) for name in METRIC_COLUMNS),
+        *ranks,
+        func.count().over(partition_by=partition).label("n"),
+    ), query).subquery()
+    # posições floor(p) e floor(p) + 1 sem CAST (no PostgreSQL o CAST arredonda)
+    position = (ranked.c.n - 1) * P95
+    stmt = select(ranked).where(or_(*(
+        and_(ranked.c[f"{name}_rank"] > position - 1, ranked.c[f"{name}_rank"] <= position + 1)
+        for name in METRIC_COLUMNS
+    )))
+
+    key_names = [column.name for column in key_columns]
+    around = {} # grupo -> {(métrica, posição): valor}
+    for row in (await db.execute(stmt)).mappings():
+        values = around.setdefault(tuple(row[name] for name in key_names), {"n": row["n"]})
+        for name in METRIC_COLUMNS:
+            values[name, row[f"{name}_rank"]] = row[name]
+
+    results = {}
+    for key, values in around.items():
+        # interpolação linear, mesmo resultado do percentile_cont do PostgreSQL
+        position = (values["n"] - 1) * P95
+        low_rank = int(position)
+        p95 = []
+        for name in METRIC_COLUMNS:
+            low_value = values[name, low_rank]
+            high_value = values.get((name, low_rank + 1), low_value)
+            p95.append(low_value + (high_value - low_value) * (position - low_rank))
+        results[key] = tuple(p95)
+    return results
+
+async def _aggregate_sqlite(query: AggregateQuery, key_columns: list, db: AsyncSession):
+    # contagem, média, mínimo e máximo no GROUP BY; o p95 em uma segunda query com row_number()
+    rows = await _grouped_rows(query, key_columns, db, with_p95=False)
+    if not rows:
+        return []
+    p95 = await _ranked_p95(query, key_columns, db)
+    key_names = [column.name for column in key_columns]
+    return [
+        _response(
+            {name: getattr(row, name) for name in key_names},
+            row.count,
+            _summaries(row, p95[tuple(getattr(row, name) for name in key_names)]),
+        )
+        for row in rows
+    ]
+
+async def get_metrics_aggregate(query: AggregateQuery, db: AsyncSession) -> list[MetricsAggregateResponse]:
+    dialect_name = db.bind.dialect.name
+    key_columns = _key_columns(query, dialect_name)
+    if dialect_name == "postgresql":
+        return await _aggregate_in_sql(query, key_columns, db)
+    return await _aggregate_sqlite(query, key_columns, db)
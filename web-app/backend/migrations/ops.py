@@ -0,0 +1,124 @@
+"""Operações usadas pelos scripts de migração (recebem a conexão síncrona do run_sync).
+
+Todas podem ser reaplicadas: o --migrate cria antes as tabelas que faltam a
+partir do models.py, então uma migração pode encontrar o schema já no estado final.
+"""
+import time
+
+from sqlalchemy import Column, Index, MetaData, Table, inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable, DropIndex
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+def has_table(conn, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+def has_column(conn, table_name: str, column_name: str) -> bool:
+    return any(c["name"] == column_name for c in inspect(conn).get_columns(table_name))
+
+def add_column(conn, table_name: str, column: Column):
+    """ALTER TABLE ... ADD COLUMN, sem reconstruir a tabela.
+
+    Coluna NOT NULL precisa de server_default (as linhas existentes recebem o valor).
+    """
+    if has_column(conn, table_name, column.name):
+        return
+    if not column.nullable and column.server_default is None:
+        raise ValueError(f"{table_name}.{column.name}: coluna NOT NULL precisa de server_default para o ADD COLUMN")
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f'ALTER TABLE "{table_name}" ADD COLUMN "{column.name}" {column_type}'
+    # o compilador do dialeto escapa o valor ('it''s'), como no CREATE TABLE
+    default = conn.dialect.ddl_compiler(conn.dialect, None).get_column_default_string(column)
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.exec_driver_sql(ddl)
+    print(f"-> {table_name}: coluna {column.name} adicionada")
+
+def index_names(conn, table_name: str) -> set[str]:
+    if conn.dialect.name == "sqlite":
+        # o inspect do SQLite pula os índices de expressão (lower(task_name))
+        result = conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+        )
+        return set(result.scalars())
+    return {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+def create_indexes(conn, table: Table, names: tuple[str, ...] | None = None):
+    """Cria os índices da tabela declarados em models.py que ainda não existem (só os de `names`, se passado)."""
+    existing = index_names(conn, table.name)
+    for index in table.indexes:
+        if index.name in existing or (names is not None and index.name not in names):
+            continue
+        conn.execute(CreateIndex(index))
+        print(f"-> {table.name}: {index.name}")
+
+def replace_index(conn, index: Index):
+    """Recria o índice quando as colunas no banco não batem com a definição de models.py."""
+    existing = {i["name"]: i["column_names"] for i in inspect(conn).get_indexes(index.table.name)}
+    wanted = [column.name for column in index.columns]
+    if existing.get(index.name) == wanted:
+        return
+    if index.name in existing:
+        conn.execute(DropIndex(index))
+    conn.execute(CreateIndex(index))
+    print(f"-> {index.table.name}: {index.name} ({', '.join(wanted)})")
+
+def rebuild_table(conn, table: Table, defaults: dict | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Recria a tabela com a definição de `table` (models.py) e copia os dados em lotes.
+
+    Só para mudanças que o ALTER do SQLite não faz (tipo, constraint, remover coluna).
+    Cria `<tabela>_new`, copia por faixas de rowid (INSERT ... SELECT ... WHERE rowid >
+    :last ORDER BY rowid LIMIT :chunk, tudo dentro do SQLite, então a memória não
+    depende do tamanho da tabela), mostra linhas copiadas e linhas/s a cada lote e
+    troca as tabelas no fim. Os rowids são mantidos. `defaults` preenche colunas
+    novas que não existem na tabela antiga.
+    """
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError("rebuild_table é só para SQLite, no PostgreSQL use ALTER TABLE")
+
+    defaults = defaults or {}
+    old_columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    copied = [c.name for c in table.columns if c.name in old_columns]
+    filled = [c.name for c in table.columns if c.name not in old_columns and c.name in defaults]
+
+    new_name = f"{table.name}_new"
+    # cópia do metadata inteiro para as FKs da tabela nova acharem as tabelas referenciadas
+    new_metadata = MetaData()
+    for other in table.metadata.sorted_tables:
+        other.to_metadata(new_metadata)
+    new_table = table.to_metadata(new_metadata, name=new_name)
+    conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{new_name}"')
+    conn.execute(CreateTable(new_table)) # só a tabela, os índices vêm depois da troca
+
+    columns = ", ".join(f'"{c}"' for c in copied + filled)
+    values = ", ".join([f'"{c}"' for c in copied] + [f":default_{i}" for i in range(len(filled))])
+    copy_chunk = text(
+        f'INSERT INTO "{new_name}" (rowid, {columns}) SELECT rowid, {values} FROM "{table.name}" '
+        f"WHERE rowid > :last ORDER BY rowid LIMIT :chunk"
+    )
+    params = {f"default_{i}": defaults[name] for i, name in enumerate(filled)}
+
+    total = conn.exec_driver_sql(f'SELECT count(*) FROM "{table.name}"').scalar()
+    last = conn.exec_driver_sql(f'SELECT min(rowid) - 1 FROM "{table.name}"').scalar()
+    done = 0
+    start = time.perf_counter()
+    while last is not None:
+        chunk_start = time.perf_counter()
+        rows = conn.execute(copy_chunk, {**params, "last": last, "chunk": chunk_size}).rowcount
+        if not rows:
+            break
+        last = conn.exec_driver_sql(f'SELECT max(rowid) FROM "{new_name}"').scalar()
+        done += rows
+        rate = rows / (time.perf_counter() - chunk_start)
+        print(f"   {table.name}: {done}/{total} linhas ({rate:,.0f} linhas/s)", flush=True)
+
+    conn.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    conn.exec_driver_sql(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"')
+    create_indexes(conn, table)
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0
+    print(f"-> {table.name}: reconstruída, {done} linhas em {elapsed:.1f}s ({rate:,.0f} linhas/s)")
+    return done
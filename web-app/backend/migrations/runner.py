@@ -0,0 +1,85 @@
+"""Aplica as migrações versionadas de migrations/.
+
+Cada script vNNNN_<nome>.py expõe `upgrade(conn)`, que recebe a conexão síncrona
+do run_sync. As versões aplicadas ficam na tabela schema_version, e cada
+migração roda na própria transação junto com o registro da versão.
+
+Uso (dentro de web-app/backend):
+    python main.py --migrate
+"""
+import importlib
+import pkgutil
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import ModuleType
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+
+import migrations
+from models import Base
+
+MIGRATION_RE = re.compile(r"^v(\d{4})_(\w+)$")
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100)),
+    Column("applied_at", DateTime),
+)
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+def discover() -> list[Migration]:
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = MIGRATION_RE.match(info.name)
+        if match:
+            module = importlib.import_module(f"migrations.{info.name}")
+            found.append(Migration(int(match.group(1)), match.group(2), module))
+    found.sort(key=lambda m: m.version)
+
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Versões de migração repetidas: {versions}")
+    return found
+
+def _prepare(conn):
+    schema_version.create(conn, checkfirst=True)
+    Base.metadata.create_all(conn) # só cria as tabelas que ainda não existem
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+async def migrate(engine, target: int | None = None) -> list[Migration]:
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(_prepare)
+
+    pending = [
+        m for m in discover()
+        if m.version not in applied and (target is None or m.version <= target)
+    ]
+    current = max(applied, default=0)
+    if not pending:
+        print(f"banco na versão {current:04d}, nenhuma migração pendente")
+        return []
+
+    print(f"banco na versão {current:04d}, {len(pending)} migração(ões) pendente(s)")
+    for migration in pending:
+        print(f"aplicando v{migration.version:04d}_{migration.name}...")
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                # o pysqlite só abre transação antes de DML; sem o BEGIN o DDL seria
+                # confirmado na hora e uma migração com erro ficaria aplicada pela metade
+                await conn.exec_driver_sql("BEGIN")
+            await conn.run_sync(migration.module.upgrade)
+            await conn.execute(schema_version.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(),
+            ))
+        print(f"v{migration.version:04d} aplicada em {time.perf_counter() - start:.1f}s")
+    return pending
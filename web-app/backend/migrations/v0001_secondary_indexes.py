@@ -0,0 +1,26 @@
+"""Cria em bancos já existentes os índices secundários declarados em models.py.
+
+O create_all só cria índices junto com tabelas novas, então um test.db antigo
+continua sem eles. Pode ser reaplicada (IF NOT EXISTS).
+"""
+from migrations.ops import create_indexes
+from models import Base
+
+INDEXES = (
+    "ix_user_lab_association_lab_user",
+    "ix_task_machine_association_machine_task",
+    "ix_machine_lab_id",
+    "ix_machine_machine_name",
+    "ix_student_student_name",
+    "ix_lab_lab_name",
+    "ix_session_lab_start",
+    "ix_session_machine_start",
+    "ix_session_student_start",
+    "ix_system_metrics_session_id",
+    "ix_task_lab_id",
+    "ix_task_task_name_lower",
+)
+
+def upgrade(conn):
+    for table in Base.metadata.sorted_tables:
+        create_indexes(conn, table, INDEXES)
@@ -0,0 +1,14 @@
+"""Inclui session_id nos índices de Session usados pela paginação por keyset.
+
+No SQLite o rowid já vem no fim de todo índice, mas no PostgreSQL sem a coluna o
+ORDER BY session_start, session_id precisa de um sort extra a cada página.
+"""
+from models import Session
+from migrations.ops import replace_index
+
+INDEXES = ("ix_session_lab_start", "ix_session_machine_start", "ix_session_student_start")
+
+def upgrade(conn):
+    for index in Session.__table__.indexes:
+        if index.name in INDEXES:
+            replace_index(conn, index)
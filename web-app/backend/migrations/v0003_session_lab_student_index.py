@@ -0,0 +1,10 @@
+"""Índice (lab_id, student_id, session_start, session_id) em Session.
+
+Cobre a contagem de alunos distintos do get_lab sem ler a tabela nem ordenar em
+um B-tree temporário. Pode ser reaplicada (IF NOT EXISTS).
+"""
+from migrations.ops import create_indexes
+from models import Session
+
+def upgrade(conn):
+    create_indexes(conn, Session.__table__, ("ix_session_lab_student_start",))
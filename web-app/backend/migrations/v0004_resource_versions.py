@@ -0,0 +1,29 @@
+"""Preenche ResourceVersion para labs e máquinas que já existiam.
+
+A tabela em si vem do create_all do runner. Sem a linha de versão o GET responde
+normalmente mas sem ETag, então os recursos antigos só ganhariam cache HTTP na
+primeira escrita. Pode ser reaplicada (só insere o que falta).
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, literal, exists, and_
+from sqlalchemy.future import select
+
+from cache.versions import LAB_MACHINES, LAB_TASKS, MACHINE
+from models import Lab, Machine, ResourceVersion
+
+def _backfill(conn, resource: str, key_column):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    missing = ~exists().where(and_(
+        ResourceVersion.resource == resource, ResourceVersion.resource_key == key_column
+    ))
+    result = conn.execute(insert(ResourceVersion).from_select(
+        ["resource", "resource_key", "version", "updated_at"],
+        select(literal(resource), key_column, literal(1), literal(now)).where(missing),
+    ))
+    print(f"-> {resource}: {result.rowcount} versões criadas")
+
+def upgrade(conn):
+    _backfill(conn, LAB_MACHINES, Lab.lab_id)
+    _backfill(conn, LAB_TASKS, Lab.lab_id)
+    _backfill(conn, MACHINE, Machine.machine_key)
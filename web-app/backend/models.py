@@ -1,9 +1,11 @@
-from sqlalchemy import Integer,Float, String, Boolean, Date, DateTime, ForeignKey, Table, Column
+from sqlalchemy import Integer,Float, String, Boolean, Date, DateTime, ForeignKey, Table, Column, Index, func
 from sqlalchemy.orm import Mapped, mapped_column,relationship, DeclarativeBase, validates
 from sqlalchemy.ext.asyncio import AsyncAttrs
 
 from datetime import datetime
 
+from timestamps import parse_timestamp
+
 class Base(AsyncAttrs, DeclarativeBase): # atualização de models para operações assincronas
     pass
 
@@ -15,22 +17,30 @@ class StateCleanliness(str, Enum):
     REGULAR = "REGULAR"
     URGENTE = "URGENTE"
 
+# os índices secundários seguem o formato das queries dos handlers, a PK composta
+# só atende buscas pela primeira coluna (user_id / task_id)
 user_lab_association = Table(
     "user_lab_association",
     Base.metadata,
     Column("user_id", ForeignKey("User.user_id"), primary_key=True),
-    Column("lab_id", ForeignKey("Lab.lab_id"), primary_key=True)
+    Column("lab_id", ForeignKey("Lab.lab_id"), primary_key=True),
+    Index("ix_user_lab_association_lab_user", "lab_id", "user_id"),
 )
 task_machine_association = Table(
     "task_machine_association",
     Base.metadata,
     Column("task_id", ForeignKey("Task.task_id"), primary_key=True),
     Column("machine_key", ForeignKey("Machine.machine_key"), primary_key=True),
+    Index("ix_task_machine_association_machine_task", "machine_key", "task_id"),
 )
 
 class Machine(Base):
     __tablename__ = "Machine"
-    
+    __table_args__ = (
+        Index("ix_machine_lab_id", "lab_id"),
+        Index("ix_machine_machine_name", "machine_name"),
+    )
+
     machine_key: Mapped[str] = mapped_column(String(64), primary_key=True)
     machine_name: Mapped[str] = mapped_column(String(100))
     motherboard: Mapped[str] = mapped_column(String(100))
@@ -49,11 +59,8 @@ class Machine(Base):
     )
     @validates("last_checked")
     def validate_session_start(self, key, value):
-        if isinstance(value, str):
-            try:
-                return datetime.strptime(value, "%d/%m/%Y")
-            except ValueError as e:
-                raise ValueError("Formato de data/hora inválido. Use DD/MM/AAAA") from e
+        if isinstance(value, str): # DD/MM/AAAA, ISO ou epoch (timestamps.py)
+            return parse_timestamp(value)
         elif isinstance(value, datetime):
             return value
         else:
@@ -61,6 +68,9 @@ class Machine(Base):
     
 class Student(Base):
     __tablename__ = "Student"
+    __table_args__ = (
+        Index("ix_student_student_name", "student_name"),
+    )
 
     student_id: Mapped[int] = mapped_column(Integer,primary_key=True)
     student_name: Mapped[str] = mapped_column(String(100))
@@ -71,6 +81,9 @@ class Student(Base):
 
 class Lab(Base):    
     __tablename__ = "Lab"
+    __table_args__ = (
+        Index("ix_lab_lab_name", "lab_name"),
+    )
 
     lab_id: Mapped[str] = mapped_column(String(10), primary_key=True)
     lab_name: Mapped[str] = mapped_column(String(100))
@@ -86,6 +99,15 @@ class Lab(Base):
 
 class Session(Base):
     __tablename__ = "Session"
+    __table_args__ = (
+        # listagens por lab/máquina/aluno filtram pela FK e paginam por (session_start, session_id),
+        # ver session/pagination.py
+        Index("ix_session_lab_start", "lab_id", "session_start", "session_id"),
+        Index("ix_session_machine_start", "machine_key", "session_start", "session_id"),
+        Index("ix_session_student_start", "student_id", "session_start", "session_id"),
+        # alunos distintos de um lab (get_lab) e última sessão de cada aluno no lab
+        Index("ix_session_lab_student_start", "lab_id", "student_id", "session_start", "session_id"),
+    )
 
     session_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     session_start: Mapped[datetime] = mapped_column(DateTime)
@@ -104,10 +126,7 @@ class Session(Base):
     @validates("session_start")
     def validate_session_start(self, key, value):
         if isinstance(value, str):
-            try:
-                return datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
-            except ValueError as e:
-                raise ValueError("Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS") from e
+            return parse_timestamp(value)
         elif isinstance(value, datetime):
             return value
         else:
@@ -115,6 +134,9 @@ class Session(Base):
 
 class SystemMetrics(Base):
     __tablename__ = "SystemMetrics"
+    __table_args__ = (
+        Index("ix_system_metrics_session_id", "session_id"),
+    )
 
     metrics_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     cpu_usage: Mapped[float] = mapped_column(Float)
@@ -142,6 +164,9 @@ class User(Base):
 # TODO: no futuro implementar função de resolver tarefa individualmente para cada máquina
 class Task(Base):
     __tablename__ = "Task"
+    __table_args__ = (
+        Index("ix_task_lab_id", "lab_id"),
+    )
 
     task_id: Mapped[int] = mapped_column(primary_key=True)
     task_name: Mapped[str] = mapped_column(String(100), unique=True)
@@ -162,11 +187,23 @@ class Task(Base):
     @validates("task_creation")
     def validate_task_creation(self, key, value):
         if isinstance(value, str):
-            try:
-                return datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
-            except ValueError as e:
-                raise ValueError("Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS") from e
+            return parse_timestamp(value)
         elif isinstance(value, datetime):
-            return value
+            # a coluna é sem fuso: guarda o horário local, como o SQLite já fazia
+            # (o asyncpg recusa datetime com tzinfo em TIMESTAMP WITHOUT TIME ZONE)
+            return value.replace(tzinfo=None)
         else:
-            raise TypeError("task_creation deve ser datetime ou string no formato válido.")
\ No newline at end of file
+            raise TypeError("task_creation deve ser datetime ou string no formato válido.")
+
+# versão de cada listagem servida com ETag (cache/versions.py), incrementada na
+# mesma transação das escritas que mudam o resultado
+class ResourceVersion(Base):
+    __tablename__ = "ResourceVersion"
+
+    resource: Mapped[str] = mapped_column(String(32), primary_key=True)
+    resource_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime) # UTC, sem fuso
+
+# post_new_task compara lower(task_name), o índice unique da coluna não serve para isso
+Index("ix_task_task_name_lower", func.lower(Task.task_name))
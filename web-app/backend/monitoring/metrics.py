@@ -0,0 +1,103 @@
+"""Métricas em memória do processo (contadores, gauges e histogramas).
+
+Os módulos criam as métricas no import com counter()/gauge()/histogram() e só
+atualizam os valores; snapshot() junta tudo para o endpoint /monitoring/metrics.
+"""
+import threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: dict[str, "Metric"] = {}
+_lock = threading.Lock()
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [
+                {"labels": dict(key), "value": self._export(value)} for key, value in self._values.items()
+            ]
+        return {"type": self.kind, "description": self.description, "values": values}
+
+    def _export(self, value):
+        return value
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            data["counts"][bisect_left(self.buckets, value)] += 1
+            data["sum"] += value
+            data["count"] += 1
+
+    def _export(self, value):
+        # contagens acumuladas por limite superior, como no formato do Prometheus
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (float("inf"),), value["counts"]):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"count": value["count"], "sum": round(value["sum"], 6), "buckets": buckets}
+
+def _get_or_create(cls, name: str, description: str, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, description, **kwargs)
+        elif type(metric) is not cls:
+            raise ValueError(f"Métrica {name} já registrada como {metric.kind}")
+        return metric
+
+def counter(name: str, description: str) -> Counter:
+    return _get_or_create(Counter, name, description)
+
+def gauge(name: str, description: str) -> Gauge:
+    return _get_or_create(Gauge, name, description)
+
+def histogram(name: str, description: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, description, buckets=buckets)
+
+def snapshot() -> dict:
+    with _lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.snapshot() for metric in metrics}
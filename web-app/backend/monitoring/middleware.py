@@ -0,0 +1,88 @@
+"""Middleware ASGI que mede todas as requisições HTTP.
+
+Por rota (o template, ex. /session/lab/{lab_id}, não a URL com os ids) e método:
+latência e total por status, requisições em andamento e tamanho do corpo da
+requisição e da resposta. Requisições que não casam com nenhuma rota entram como
+route="<unmatched>" para os 404 de scanners não criarem uma série por URL.
+
+Os valores vão para o registro de monitoring/metrics.py e aparecem em
+/monitoring/metrics (JSON) e /metrics (Prometheus). As queries SQL de cada
+requisição são contadas aqui também (monitoring/queries.py) e voltam no header
+Server-Timing.
+"""
+import time
+
+from starlette.routing import Match
+
+from monitoring.metrics import counter, gauge, histogram
+from monitoring.queries import track
+
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+requests_total = counter("http_requests_total", "Requisições HTTP por rota, método e status.")
+request_duration = histogram("http_request_duration_seconds", "Latência das requisições até o fim da resposta.")
+requests_in_flight = gauge("http_requests_in_flight", "Requisições em andamento.")
+request_size = histogram("http_request_size_bytes", "Tamanho do corpo das requisições.", buckets=SIZE_BUCKETS)
+response_size = histogram("http_response_size_bytes", "Tamanho do corpo das respostas.", buckets=SIZE_BUCKETS)
+
+UNMATCHED = "<unmatched>"
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> str:
+        # o mesmo casamento que o roteador faz; o FastAPI só coloca a rota no scope
+        # depois que a resposta já começou
+        router = scope["app"].router
+        partial = None
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path # método errado (405)
+        return partial or UNMATCHED
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = {"method": scope["method"], "route": self._route(scope)}
+        status_code = 500
+        received = sent = 0
+        queries = track(labels["route"])
+        start = time.perf_counter()
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status_code, sent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if queries is not None:
+                    timing = queries.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_flight.inc(**labels)
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec(**labels)
+            status = str(status_code)
+            requests_total.inc(**labels, status=status)
+            request_duration.observe(elapsed, **labels, status=status)
+            request_size.observe(received, **labels)
+            response_size.observe(sent, **labels, status=status)
+            if queries is not None:
+                queries.finish(labels["method"])
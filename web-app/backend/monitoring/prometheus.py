@@ -0,0 +1,55 @@
+"""Registro de monitoring/metrics.py no formato texto do Prometheus (0.0.4).
+
+Servido em GET /metrics, sem depender de pushgateway ou outro serviço. Exemplo de
+scrape (com METRICS_TOKEN definido):
+
+    scrape_configs:
+      - job_name: infodomus
+        metrics_path: /api/metrics
+        authorization:
+          credentials: <METRICS_TOKEN>
+        static_configs:
+          - targets: ["servidor:8080"]
+"""
+import math
+
+from monitoring.metrics import snapshot
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in items.items()) + "}"
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+def render() -> str:
+    lines = []
+    for name, metric in sorted(snapshot().items()):
+        lines.append(f"# HELP {name} {_escape_help(metric['description'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for item in metric["values"]:
+            labels, value = item["labels"], item["value"]
+            if metric["type"] == "histogram":
+                for bound, count in value["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,112 @@
+"""Contagem e tempo das queries SQL por requisição.
+
+instrument() liga os eventos before/after_cursor_execute nas engines de
+database.py. O MetricsMiddleware (monitoring/middleware.py) abre um QueryStats
+por requisição (track) e, ao responder, manda o total no header Server-Timing:
+
+    Server-Timing: db;dur=3.412;desc="5 queries", app;dur=7.950
+
+Queries mais lentas que DB_SLOW_QUERY_MS vão para o log com os parâmetros e a
+rota. Com DB_QUERY_DEBUG=1 o mesmo SQL repetido DB_N_PLUS_ONE_THRESHOLD vezes
+ou mais na mesma requisição é registrado como provável N+1 (uma query por item
+de uma lista), com a rota e o SQL.
+
+As queries de tarefas de fundo (ex. session/write_behind.py) não têm
+requisição: entram no log de lentas com rota "-" e fora das contagens.
+"""
+import logging
+import os
+import time
+from collections import Counter as _Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from monitoring.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "1").strip().lower() in ("1", "true", "yes", "on")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200)) # 0 desliga o log
+DB_QUERY_DEBUG = os.getenv("DB_QUERY_DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", 5))
+
+_MAX_LOGGED_CHARS = 500
+
+queries_per_request = histogram(
+    "db_queries_per_request", "Queries SQL por requisição.", buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+query_seconds_per_request = histogram("db_query_seconds_per_request", "Tempo no banco por requisição.")
+slow_queries = counter("db_slow_queries_total", "Queries acima de DB_SLOW_QUERY_MS.")
+n_plus_one = counter("db_n_plus_one_total", "Requisições com o mesmo SQL repetido (DB_QUERY_DEBUG).")
+
+class QueryStats:
+    __slots__ = ("route", "count", "seconds", "statements")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = _Counter() if DB_QUERY_DEBUG else None
+
+    def server_timing(self, elapsed: float) -> str:
+        return f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries", app;dur={elapsed * 1000:.3f}'
+
+    def finish(self, method: str):
+        queries_per_request.observe(self.count, method=method, route=self.route)
+        query_seconds_per_request.observe(self.seconds, method=method, route=self.route)
+        if not self.statements:
+            return
+        repeated = [(sql, n) for sql, n in self.statements.items() if n >= DB_N_PLUS_ONE_THRESHOLD]
+        for sql, n in repeated:
+            logger.warning("provável N+1 em %s %s: %d execuções de %s", method, self.route, n, _short(sql))
+        if repeated:
+            n_plus_one.inc(method=method, route=self.route)
+
+# estatísticas da requisição em andamento, definidas pelo MetricsMiddleware
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+def track(route: str) -> QueryStats | None:
+    if not DB_QUERY_STATS:
+        return None
+    stats = QueryStats(route)
+    _current.set(stats)
+    return stats
+
+def _short(value) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= _MAX_LOGGED_CHARS else text[:_MAX_LOGGED_CHARS] + "..."
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+    if DB_SLOW_QUERY_MS and elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "-"
+        slow_queries.inc(route=route)
+        logger.warning(
+            "query lenta (%.1f ms) em %s: %s parâmetros=%s",
+            elapsed * 1000, route, _short(statement), _short(parameters),
+        )
+
+def _error(exception_context):
+    # query que falhou não chega no after_cursor_execute
+    stack = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if stack:
+        stack.pop()
+
+def instrument(engine):
+    """Liga a contagem na engine (async ou sync)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before)
+    event.listen(sync_engine, "after_cursor_execute", _after)
+    event.listen(sync_engine, "handle_error", _error)
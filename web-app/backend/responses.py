@@ -0,0 +1,64 @@
+"""Serialização JSON das respostas.
+
+Por padrão o FastAPI valida de novo o retorno contra o response_model, converte
+tudo com jsonable_encoder e só então chama json.dumps. Nas listagens grandes
+(sessões, alunos, tarefas) isso é a maior parte do tempo de CPU da requisição.
+
+JSON_RESPONSE escolhe o caminho:
+    "orjson" (padrão se o pacote estiver instalado): ORJSONResponse como
+        default_response_class, no lugar do json.dumps.
+    "pydantic": o mesmo, com o serializador do pydantic-core (TypeAdapter).
+    "json": comportamento padrão do FastAPI, para comparação.
+
+Nos dois primeiros, as listagens passam por `typed_response`, que serializa os
+modelos direto com TypeAdapter(response_model).dump_json, numa passada só e sem
+revalidar. Benchmark em benchmarks/bench_json_response.py.
+"""
+import os
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_RESPONSE_KINDS = ("orjson", "pydantic", "json")
+JSON_RESPONSE = os.getenv("JSON_RESPONSE", "orjson" if orjson else "pydantic")
+if JSON_RESPONSE not in JSON_RESPONSE_KINDS:
+    raise ValueError(f"JSON_RESPONSE inválido: {JSON_RESPONSE} (use {', '.join(JSON_RESPONSE_KINDS)})")
+if JSON_RESPONSE == "orjson" and orjson is None:
+    raise RuntimeError("JSON_RESPONSE=orjson precisa do pacote orjson (pip install orjson)")
+
+_any = TypeAdapter(Any)
+
+class PydanticJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return _any.dump_json(content)
+
+def default_response_class() -> type[JSONResponse]:
+    return {"orjson": ORJSONResponse, "pydantic": PydanticJSONResponse, "json": JSONResponse}[JSON_RESPONSE]
+
+@lru_cache(maxsize=None)
+def _adapter(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+def typed_response(content, annotation, response: Response | None = None, exclude_none: bool = False):
+    """Serializa `content` (modelos do `annotation`, ex. List[SessionResponse]) e devolve um Response pronto.
+
+    Cabeçalhos e status já colocados em `response` (X-Next-Cursor, ETag...) são
+    copiados. Um Response em `content` (ex: 304 do conditional_get) passa direto.
+    """
+    if JSON_RESPONSE == "json" or isinstance(content, Response):
+        return content
+    body = _adapter(annotation).dump_json(content, exclude_none=exclude_none)
+    out = Response(body, status_code=(response and response.status_code) or 200, media_type="application/json")
+    if response is not None:
+        out.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        )
+    return out
@@ -37,7 +37,7 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Cria o novo usuário com a senha hashada
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
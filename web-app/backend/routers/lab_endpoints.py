@@ -1,13 +1,16 @@
 import asyncio
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Callable
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Callable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession 
-from database import get_db
+from database import get_db, get_read_db
 from typing import List
 
 from schemas import LabCreate,LabResponse,LabUpdate,MachineConfigResponse,UserResponse,StudentResponse
 from models import User
+from student.pagination import StudentPage, MAX_STUDENT_PAGE, decode_cursor
+from cache.versions import LAB_MACHINES, conditional_get
+from responses import typed_response
 from auth.auth_handler import get_current_active_user
 from config.lab_handler import (
     get_lab, create_lab, update_lab, delete_lab,join_lab,get_machines_for_lab,
@@ -28,7 +31,7 @@ async def handle_request(func: Callable, *args, **kwargs):
     
 
 @router.get("/{lab_id}", response_model=LabResponse)
-async def get_lab_endpoint(lab_id: str, db: AsyncSession = Depends(get_db)):
+async def get_lab_endpoint(lab_id: str, db: AsyncSession = Depends(get_read_db)):
     return await handle_request(get_lab, lab_id=lab_id, db=db)
 
 @router.post("/new_lab")
@@ -49,13 +52,31 @@ async def delete_lab_endpoint(lab_id: str,user: User = Depends(get_current_activ
 
 # esse métodos podem ser utilizados pelo desktop-app, por isso não precisam de user
 @router.get("/{lab_id}/machines", response_model=List[MachineConfigResponse])
-async def get_machines_for_lab_endpoint(lab_id:str,db: AsyncSession = Depends(get_db)):
-    return await handle_request(get_machines_for_lab,lab_id=lab_id,db=db)
+async def get_machines_for_lab_endpoint(lab_id:str, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    machines = await handle_request(
+        conditional_get, request, response, db, LAB_MACHINES, lab_id,
+        build=lambda: get_machines_for_lab(lab_id=lab_id,db=db)
+    )
+    return typed_response(machines, List[MachineConfigResponse], response)
+
+def student_page_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_STUDENT_PAGE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor da página anterior."),
+    search: Optional[str] = Query(None, description="Trecho do nome do aluno."),
+) -> StudentPage:
+    return StudentPage(limit=limit, after=decode_cursor(cursor) if cursor else None, search=search)
 
 @router.get("/{lab_id}/students", response_model=List[StudentResponse])
-async def get_students_for_lab_endpoints(lab_id:str,db: AsyncSession = Depends(get_db)):
-    return await handle_request(get_students_for_lab,lab_id=lab_id,db=db)
+async def get_students_for_lab_endpoints(
+    lab_id:str, response: Response, page: StudentPage = Depends(student_page_params), db: AsyncSession = Depends(get_read_db)
+):
+    # o corpo continua sendo a lista, o cursor vai no header como em /session
+    result = await handle_request(get_students_for_lab,lab_id=lab_id,page=page,db=db)
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
+    return typed_response(result.items, List[StudentResponse], response)
 
 @router.get("/{lab_id}/users", response_model=List[UserResponse])
-async def get_users_for_lab_endpoint(lab_id:str,db: AsyncSession = Depends(get_db)):
-    return await handle_request(get_users_for_lab,lab_id=lab_id,db=db)  
\ No newline at end of file
+async def get_users_for_lab_endpoint(lab_id:str,db: AsyncSession = Depends(get_read_db)):
+    users = await handle_request(get_users_for_lab,lab_id=lab_id,db=db)
+    return typed_response(users, List[UserResponse])  
\ No newline at end of file
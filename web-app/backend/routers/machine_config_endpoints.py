@@ -1,6 +1,6 @@
 import asyncio
 
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Callable
 from sqlalchemy.ext.asyncio import AsyncSession 
 
@@ -8,6 +8,7 @@ from models import User
 from auth.auth_handler import get_current_active_user
 from database import get_db
 from schemas import MachineConfig, NewMachineConfig,MachineNewCheck,MachineNewState
+from cache.versions import MACHINE, conditional_get
 from config.machine_config_handler import (
     get_machine_config,post_new_machine_config,
     delete_machine, update_machine_config,
@@ -30,8 +31,11 @@ async def handle_request(func: Callable, *args, **kwargs):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{machine_key}", response_model=MachineConfig)
-async def get_machine_config_endpoint(machine_key: str, db: AsyncSession = Depends(get_db)):
-    return await handle_request(get_machine_config, machine_key=machine_key, db=db)
+async def get_machine_config_endpoint(machine_key: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    return await handle_request(
+        conditional_get, request, response, db, MACHINE, machine_key,
+        build=lambda: get_machine_config(machine_key=machine_key, db=db)
+    )
 
 @router.post("/new_machine")
 async def post_machine_config_endpoint(new_machine: NewMachineConfig, db: AsyncSession = Depends(get_db)):
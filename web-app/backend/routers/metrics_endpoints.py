@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Callable,List,Literal,Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+from metrics.metrics_handler import AggregateQuery, GROUP_FIELDS, get_metrics_aggregate
+from database import get_read_db
+from schemas import MetricsAggregateResponse
+from session.pagination import parse_date_param
+from responses import typed_response
+
+
+router = APIRouter()
+
+async def handle_request(func: Callable, *args, **kwargs):
+    """Encapsula chamadas para tratamento padronizado de erros"""
+    try:
+        if asyncio.iscoroutinefunction(func):  # Verifica se a função é async
+            return await func(*args, **kwargs)
+        return func(*args, **kwargs)  # Executa normalmente se for síncrona 
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def aggregate_params(
+    group_by: str = Query("", description="Lista separada por vírgula: lab, machine, class_var."),
+    bucket: Optional[Literal["hour", "day", "week"]] = Query(None),
+    lab_id: Optional[str] = Query(None),
+    machine_key: Optional[str] = Query(None),
+    class_var: Optional[str] = Query(None),
+    from_: Optional[str] = Query(None, alias="from", description="Início (inclusivo), DD/MM/AAAA [HH:MM:SS] ou ISO."),
+    to: Optional[str] = Query(None, description="Fim (exclusivo); só a data inclui o dia inteiro."),
+) -> AggregateQuery:
+    fields = tuple(dict.fromkeys(field.strip() for field in group_by.split(",") if field.strip()))
+    invalid = [field for field in fields if field not in GROUP_FIELDS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by inválido: {', '.join(invalid)}. Use {', '.join(GROUP_FIELDS)}.",
+        )
+    return AggregateQuery(
+        group_by=fields,
+        bucket=bucket,
+        lab_id=lab_id,
+        machine_key=machine_key,
+        class_var=class_var,
+        start=parse_date_param(from_, "from") if from_ else None,
+        end=parse_date_param(to, "to", end=True) if to else None,
+    )
+
+@router.get("/aggregate", response_model=List[MetricsAggregateResponse], response_model_exclude_none=True)
+async def get_metrics_aggregate_endpoint(
+    query: AggregateQuery = Depends(aggregate_params), db: AsyncSession = Depends(get_read_db)
+):
+    rows = await handle_request(
+        get_metrics_aggregate,
+        query=query,
+        db=db
+    )
+    return typed_response(rows, List[MetricsAggregateResponse], exclude_none=True)
@@ -0,0 +1,22 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Response
+
+from monitoring.metrics import snapshot
+from monitoring.prometheus import CONTENT_TYPE, render
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") # vazio = /metrics aberto (rede interna)
+
+router = APIRouter()
+prometheus_router = APIRouter() # incluído sem a api-key, para o scraper do Prometheus
+
+@router.get("/metrics")
+async def get_metrics_endpoint():
+    return snapshot()
+
+@prometheus_router.get("/metrics", include_in_schema=False)
+async def get_prometheus_metrics_endpoint(authorization: str | None = Header(None)):
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    return Response(content=render(), media_type=CONTENT_TYPE)
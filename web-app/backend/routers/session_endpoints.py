@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Callable,List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Callable,List,Literal,Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
 from session.session_handler import (
-    post_new_session,get_sessions_for_lab,get_sessions_for_machine,get_sessions_for_student
+    post_new_session,queue_new_session,post_session_batch,get_sessions_for_lab,export_sessions_for_lab,get_sessions_for_machine,get_sessions_for_student
 )
-from database import get_db
-from schemas import SessionCreate,SessionResponse
+from database import get_db, get_read_db, AsyncSessionReadLocal
+from schemas import SessionCreate,SessionResponse,SessionBatchCreate,SessionBatchResponse
+from session.pagination import SessionPage, MAX_SESSION_PAGE, decode_cursor, parse_date_param
+from session.export import EXPORT_FORMATS
+from session.admission import session_admission
+from session.write_behind import session_writer
+from responses import typed_response
 
 
 router = APIRouter()
@@ -24,37 +30,84 @@ async def handle_request(func: Callable, *args, **kwargs):
     
 
 @router.post("/new/{machine_key}")
-async def new_session_endpoint(machine_key: str, new_session: SessionCreate, db: AsyncSession = Depends(get_db)):
+async def new_session_endpoint(
+    machine_key: str, new_session: SessionCreate, response: Response, db: AsyncSession = Depends(get_db)
+):
+    handler = post_new_session
+    if session_writer.running: # SESSION_WRITE_MODE=write_behind: grava depois e responde 202
+        handler = queue_new_session
+        response.status_code = status.HTTP_202_ACCEPTED
+    async with session_admission.slot(): # limita logins simultâneos (session/admission.py)
+        return await handle_request(
+            handler,  # objeto do schema com os dados da requisição
+            machine_key=machine_key,
+            session=new_session,
+            db=db
+        )
+
+@router.post("/batch", response_model=SessionBatchResponse)
+async def session_batch_endpoint(batch: SessionBatchCreate, db: AsyncSession = Depends(get_db)):
     return await handle_request(
-        post_new_session,  # objeto do schema com os dados da requisição
-        machine_key=machine_key,
-        session=new_session,
+        post_session_batch,
+        batch=batch,
         db=db
     )
 
+def session_page_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_SESSION_PAGE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor da página anterior."),
+    from_: Optional[str] = Query(None, alias="from", description="Início (inclusivo), DD/MM/AAAA [HH:MM:SS] ou ISO."),
+    to: Optional[str] = Query(None, description="Fim (exclusivo); só a data inclui o dia inteiro."),
+) -> SessionPage:
+    return SessionPage(
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+        start=parse_date_param(from_, "from") if from_ else None,
+        end=parse_date_param(to, "to", end=True) if to else None,
+    )
+
+async def session_page_response(response: Response, func: Callable, **kwargs):
+    # o corpo continua sendo a lista (o frontend espera um array), o cursor vai no header
+    page = await handle_request(func, **kwargs)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return typed_response(page.items, List[SessionResponse], response)
+
 @router.get("/lab/{lab_id}", response_model=List[SessionResponse])
-async def get_sessions_for_lab_endpoint(lab_id: str, db: AsyncSession = Depends(get_db)):
-    return await handle_request(
-        get_sessions_for_lab,
+async def get_sessions_for_lab_endpoint(
+    lab_id: str, response: Response, page: SessionPage = Depends(session_page_params), db: AsyncSession = Depends(get_read_db)
+):
+    return await session_page_response(response, get_sessions_for_lab, lab_id=lab_id, page=page, db=db)
+
+@router.get("/lab/{lab_id}/export")
+async def export_sessions_for_lab_endpoint(
+    lab_id: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    page: SessionPage = Depends(session_page_params),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stream = await handle_request(
+        export_sessions_for_lab,
         lab_id=lab_id,
+        export_format=format,
+        page=page,
+        session_factory=AsyncSessionReadLocal,
         db=db
     )
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="sessoes_{lab_id}.{format}"'},
+    )
 
 @router.get("/machine/{machine_key}", response_model=List[SessionResponse])
-async def get_sessions_for_machine_endpoint(machine_key: str, db: AsyncSession = Depends(get_db)):
-    return await handle_request(
-        get_sessions_for_machine,
-        machine_key=machine_key,
-        db=db
-    )
+async def get_sessions_for_machine_endpoint(
+    machine_key: str, response: Response, page: SessionPage = Depends(session_page_params), db: AsyncSession = Depends(get_read_db)
+):
+    return await session_page_response(response, get_sessions_for_machine, machine_key=machine_key, page=page, db=db)
 
 @router.get("/student/{student_id}", response_model=List[SessionResponse])
-async def get_sessions_for_endpoint_student(student_id: str, db: AsyncSession = Depends(get_db)):
-    return await handle_request(
-        get_sessions_for_student,
-        student_id=student_id,
-        db=db
-    )
-
-
-
+async def get_sessions_for_endpoint_student(
+    student_id: int, response: Response, page: SessionPage = Depends(session_page_params), db: AsyncSession = Depends(get_read_db)
+):
+    return await session_page_response(response, get_sessions_for_student, student_id=student_id, page=page, db=db)
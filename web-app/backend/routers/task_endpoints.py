@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Callable,List
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,7 +9,10 @@ from task.task_handler import(
 from models import User
 from auth.auth_handler import get_current_active_user
 from schemas import TaskCreate,TaskResponse
-from database import get_db
+from database import get_db, get_read_db
+from cache.versions import LAB_TASKS, conditional_get
+from auth.membership import verify_lab_member
+from responses import typed_response
 
 router = APIRouter()
 
@@ -26,22 +29,23 @@ async def handle_request(func: Callable, *args, **kwargs):
     
 
 @router.get("/lab/{lab_id}",response_model=List[TaskResponse])
-async def get_task_for_lab(lab_id:str,user: User = Depends(get_current_active_user),db: AsyncSession = Depends(get_db)):
-    return await handle_request(
-        get_tasks_for_lab,
-        lab_id=lab_id,
-        user=user,
-        db=db
+async def get_task_for_lab(lab_id:str,request: Request,response: Response,user: User = Depends(get_current_active_user),db: AsyncSession = Depends(get_read_db)):
+    tasks = await handle_request(
+        conditional_get, request, response, db, LAB_TASKS, lab_id,
+        build=lambda: get_tasks_for_lab(lab_id=lab_id,user=user,db=db),
+        authorize=lambda: verify_lab_member(lab_id=lab_id,user=user,db=db)
     )
+    return typed_response(tasks, List[TaskResponse], response)
 
 @router.get("/machine/{machine_key}",response_model=List[TaskResponse])
-async def get_task_for_machine(machine_key:str,user: User = Depends(get_current_active_user),db: AsyncSession = Depends(get_db)):
-    return await handle_request(
+async def get_task_for_machine(machine_key:str,user: User = Depends(get_current_active_user),db: AsyncSession = Depends(get_read_db)):
+    tasks = await handle_request(
         get_tasks_for_machine,
         machine_key=machine_key,
         user=user,
         db=db
     )
+    return typed_response(tasks, List[TaskResponse])
 
 @router.post("/new")
 async def new_task_endpoint(new_task:TaskCreate,user: User = Depends(get_current_active_user),db: AsyncSession = Depends(get_db)):
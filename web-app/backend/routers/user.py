@@ -7,6 +7,7 @@ from schemas import UserResponse,LabResponseUser
 from config.lab_handler import get_lab_for_user
 from models import User
 from database import get_db
+from responses import typed_response
 
 router = APIRouter()
 
@@ -24,4 +25,4 @@ async def get_current_user_labs(
     user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    return await get_lab_for_user(user=user, db=db)
\ No newline at end of file
+    return typed_response(await get_lab_for_user(user=user, db=db), List[LabResponseUser])
\ No newline at end of file
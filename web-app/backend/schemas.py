@@ -1,7 +1,7 @@
-from datetime import datetime
 from typing import List,Optional
-from pydantic import BaseModel, field_validator,validator,root_validator
+from pydantic import BaseModel, Field, validator
 from models import StateCleanliness
+from timestamps import LegacyDate, LegacyDateTime, IsoDateTime
 
 # Authentication Schemas
 class Token(BaseModel):
@@ -37,23 +37,9 @@ class MachineConfig(BaseModel):
     memory: str
     storage: str
     state_cleanliness: StateCleanliness
-    last_checked: str  # String no formato DD/MM/AAAA
+    last_checked: LegacyDate  # DD/MM/AAAA, ISO ou epoch (timestamps.py)
     lab_id: str
 
-    @field_validator('last_checked',mode='before')
-    def validate_date_format(cls, value):
-        try:
-            datetime.strptime(value, "%d/%m/%Y")
-            return value
-        except ValueError:
-            raise ValueError("Formato de data inválido. Use DD/MM/AAAA")
-
-    class Config:
-        json_encoders = {
-            StateCleanliness: lambda v: v.value,
-            datetime: lambda v: v.strftime("%d/%m/%Y") if v else None
-        }
-
 class NewMachineConfig(MachineConfig):
     machine_key: str    
 
@@ -62,33 +48,10 @@ class MachineConfigResponse(BaseModel):
     motherboard: str
     machine_name: str
     state_cleanliness: StateCleanliness
-    last_checked: str  # String no formato DD/MM/AAAA
-    
-    @field_validator('last_checked',mode='before')
-    def validate_date_format(cls, value):
-        try:
-            datetime.strptime(value, "%d/%m/%Y")
-            return value
-        except ValueError:
-            raise ValueError("Formato de data inválido. Use DD/MM/AAAA")
-
-    class Config:
-        json_encoders = {
-            StateCleanliness: lambda v: v.value,
-            datetime: lambda v: v.strftime("%d/%m/%Y") if v else None
-        }
+    last_checked: LegacyDate
 
 class MachineNewCheck(BaseModel):
-    new_check:str
-    @validator('new_check')
-    def validate_new_check(cls, value):
-        value = value.strip()
-        # Verifica o formato dd/mm/yyyy
-        try:
-            data = datetime.strptime(value, "%d/%m/%Y")
-        except ValueError:
-            raise ValueError("Formato inválido para new_check. Use dd/mm/yyyy e uma data válida.")
-        return value
+    new_check: LegacyDate
 
 VALID_STATES = {"bom", "regular", "urgente"}
 class MachineNewState(BaseModel):
@@ -126,7 +89,7 @@ class LabResponseUser(BaseModel):
 
 class LastSessionResponse(BaseModel):
     session_id: int
-    session_start: datetime
+    session_start: IsoDateTime
     lab_id: str
     machine_key: str
 
@@ -137,34 +100,41 @@ class StudentResponse(BaseModel):
     class_var: str
     last_session: Optional[LastSessionResponse] = None
 
+class StudentPageResponse(BaseModel):
+    items: List[StudentResponse]
+    next_cursor: Optional[str] = None # chave do último aluno, None na última página
+
 class SessionCreate(BaseModel):
     student_name: str
     password: str
     class_var: str
-    session_start: str  # Formato: DD/MM/AAAA HH:MM:SS
+    session_start: LegacyDateTime  # DD/MM/AAAA HH:MM:SS, ISO ou epoch (timestamps.py)
     # métricas do sistema
     cpu_usage: float
     ram_usage: float
     cpu_temp: float
     lab_id: str
 
-    @field_validator('session_start')
-    def validate_datetime_format(cls, value):
-        try:
-            datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
-            return value
-        except ValueError:
-            raise ValueError("Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS")
+class SessionBatchItem(SessionCreate):
+    machine_key: str
+
+MAX_SESSION_BATCH = 500
+class SessionBatchCreate(BaseModel):
+    sessions: List[SessionBatchItem] = Field(min_length=1, max_length=MAX_SESSION_BATCH)
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.strftime("%d/%m/%Y %H:%M:%S") if v else None
-        }
+class SessionBatchItemResult(BaseModel):
+    index: int # posição do item em sessions
+    status_code: int
+    detail: str
+
+class SessionBatchResponse(BaseModel):
+    created: int
+    results: List[SessionBatchItemResult]
 
 class SessionResponse(BaseModel):
     student_name: str
     class_var: str
-    session_start: str  # Formato: DD/MM/AAAA HH:MM:SS
+    session_start: LegacyDateTime
     # métricas do sistema
     cpu_usage: float
     ram_usage: float
@@ -172,18 +142,27 @@ class SessionResponse(BaseModel):
     machine_name:str
     lab_name: str
 
-    @field_validator('session_start')
-    def validate_datetime_format(cls, value):
-        try:
-            datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
-            return value
-        except ValueError:
-            raise ValueError("Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS")
-
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.strftime("%d/%m/%Y %H:%M:%S") if v else None
-        }
+class SessionPageResponse(BaseModel):
+    items: List[SessionResponse]
+    next_cursor: Optional[str] = None # chave da última sessão, None na última página
+
+class MetricSummary(BaseModel):
+    mean: float
+    min: float
+    max: float
+    p95: float
+
+class MetricsAggregateResponse(BaseModel):
+    # só vêm preenchidas as chaves pedidas em group_by/bucket
+    lab_id: Optional[str] = None
+    machine_key: Optional[str] = None
+    machine_name: Optional[str] = None
+    class_var: Optional[str] = None
+    bucket: Optional[str] = None # início do intervalo, ISO 8601
+    count: int
+    cpu_usage: MetricSummary
+    ram_usage: MetricSummary
+    cpu_temp: MetricSummary
 
 class TaskResponse(BaseModel):
     task_id: int
@@ -192,13 +171,10 @@ class TaskResponse(BaseModel):
     is_complete: bool
     machine_keys: List[str] = []
     machine_names: List[str] = []
-    task_creation: datetime  # Agora usa datetime de verdade
+    task_creation: LegacyDateTime
 
     class Config:
         orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.strftime("%d/%m/%Y %H:%M:%S")
-        }
 
 class TaskCreate(BaseModel):
     task_name: str
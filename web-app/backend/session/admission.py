@@ -0,0 +1,100 @@
+"""Controle de admissão do POST /session/new.
+
+Quando uma turma inteira senta ao mesmo tempo, todos os desktops chamam
+/session/new em poucos segundos. Sem limite, os bcrypts e as escritas no SQLite
+se acumulam até passar do timeout de 10 s do cliente e todo mundo falha junto.
+Aqui no máximo SESSION_ADMISSION_LIMIT requisições rodam ao mesmo tempo; as
+próximas esperam em fila (até SESSION_ADMISSION_QUEUE) por no máximo
+SESSION_ADMISSION_TIMEOUT segundos:
+
+    fila cheia         -> 429 na hora
+    prazo da fila      -> 503
+    ambos com Retry-After (SESSION_ADMISSION_RETRY_AFTER, com variação aleatória
+    para os clientes não voltarem todos no mesmo segundo)
+
+SESSION_ADMISSION_LIMIT=0 desliga o controle.
+"""
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from monitoring.metrics import counter, gauge, histogram
+
+admission_in_flight = gauge("session_admission_in_flight", "Requisições admitidas e ainda em execução.")
+admission_queue_depth = gauge("session_admission_queue_depth", "Requisições esperando uma vaga.")
+admission_wait_seconds = histogram("session_admission_wait_seconds", "Tempo na fila até ser admitida ou recusada.")
+admission_total = counter("session_admission_total", "Requisições por resultado (admitted/queue_full/timeout).")
+
+class AdmissionController:
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float, retry_after: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+        self._waiting = 0
+        self._running = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def _reject(self, status_code: int, reason: str, waited: float):
+        admission_total.inc(controller=self.name, result=reason)
+        admission_wait_seconds.observe(waited, controller=self.name)
+        retry_after = random.randint(self.retry_after, 2 * self.retry_after)
+        raise HTTPException(
+            status_code=status_code,
+            detail=f"Servidor ocupado, tente novamente em {retry_after} segundos.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _set_waiting(self, delta: int):
+        self._waiting += delta
+        admission_queue_depth.set(self._waiting, controller=self.name)
+
+    def _set_running(self, delta: int):
+        self._running += delta
+        admission_in_flight.set(self._running, controller=self.name)
+
+    @asynccontextmanager
+    async def slot(self):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.monotonic()
+        if self._semaphore.locked():
+            if self._waiting >= self.queue_size:
+                self._reject(status.HTTP_429_TOO_MANY_REQUESTS, "queue_full", 0.0)
+            self._set_waiting(1)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except TimeoutError:
+                self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, "timeout", time.monotonic() - start)
+            finally:
+                self._set_waiting(-1)
+        else:
+            await self._semaphore.acquire()
+
+        admission_total.inc(controller=self.name, result="admitted")
+        admission_wait_seconds.observe(time.monotonic() - start, controller=self.name)
+        self._set_running(1)
+        try:
+            yield
+        finally:
+            self._set_running(-1)
+            self._semaphore.release()
+
+session_admission = AdmissionController(
+    "session_new",
+    limit=int(os.getenv("SESSION_ADMISSION_LIMIT", 8)),
+    queue_size=int(os.getenv("SESSION_ADMISSION_QUEUE", 64)),
+    timeout=float(os.getenv("SESSION_ADMISSION_TIMEOUT", 4)),
+    retry_after=int(os.getenv("SESSION_ADMISSION_RETRY_AFTER", 2)),
+)
@@ -0,0 +1,54 @@
+"""Exportação do histórico de sessões em CSV ou NDJSON, gerada aos poucos.
+
+As linhas vêm de um cursor no servidor em blocos de EXPORT_CHUNK_SIZE e cada
+bloco é serializado e enviado antes do próximo ser lido. A memória não cresce com
+o tamanho do histórico, ao contrário de GET /session/lab/{lab_id}, que monta a
+lista inteira.
+"""
+import csv
+import io
+import json
+
+from schemas import SessionResponse
+from timestamps import LEGACY_DATETIME, format_timestamp
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_COLUMNS = tuple(SessionResponse.model_fields) # mesmas colunas e ordem do SessionResponse
+
+def _row_values(row) -> tuple:
+    # session_start no formato do X-Time-Format, como nas respostas JSON
+    values = row._mapping
+    return tuple(
+        format_timestamp(values[column], LEGACY_DATETIME) if column == "session_start" else values[column]
+        for column in EXPORT_COLUMNS
+    )
+
+def _csv_chunk(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(_row_values(row) for row in rows)
+    return buffer.getvalue()
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row))), ensure_ascii=False) + "\n" for row in rows
+    )
+
+async def stream_export(stmt, export_format: str, session_factory):
+    """Gera o arquivo em pedaços de texto a partir de `stmt` (colunas de _session_rows).
+
+    Abre a própria sessão: a do Depends já foi fechada quando o StreamingResponse
+    começa a consumir o gerador.
+    """
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        if export_format == "csv":
+            yield _csv_chunk([], header=True)
+        async for rows in result.partitions():
+            yield _csv_chunk(rows, header=False) if export_format == "csv" else _ndjson_chunk(rows)
@@ -0,0 +1,78 @@
+"""Paginação por keyset das listagens de sessão.
+
+As sessões saem da mais recente para a mais antiga, ordenadas por
+(session_start, session_id). O cursor é a chave da última linha devolvida, então a
+próxima página começa direto no índice (lab_id/machine_key/student_id,
+session_start, session_id) em vez de pular linhas com OFFSET.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+from models import Session
+from timestamps import parse_timestamp
+
+MAX_SESSION_PAGE = 1000
+
+@dataclass
+class SessionPage:
+    limit: int | None = None # None devolve tudo (comportamento antigo)
+    after: tuple[datetime, int] | None = None # (session_start, session_id) do cursor
+    start: datetime | None = None # inclusivo
+    end: datetime | None = None # exclusivo
+
+def encode_cursor(session_start: datetime, session_id: int) -> str:
+    raw = f"{session_start.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        session_start, session_id = raw.split("|")
+        return datetime.fromisoformat(session_start), int(session_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+
+def parse_date_param(value: str, name: str, end: bool = False) -> datetime:
+    """Converte from/to. Um `to` só com a data inclui o dia inteiro."""
+    value = value.strip()
+    try:
+        parsed = parse_timestamp(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido para {name}. Use DD/MM/AAAA, DD/MM/AAAA HH:MM:SS, ISO 8601 ou epoch.",
+        )
+    if end and len(value) <= 10 and not value.replace(".", "").isdigit(): # só a data, não epoch
+        parsed += timedelta(days=1)
+    return parsed
+
+def apply_page(stmt, page: SessionPage, lookahead: bool = True):
+    """Filtros, ordem e limite no SQL; busca uma linha a mais para saber se há próxima página.
+
+    lookahead=False aplica o limite exato, para quem não gera cursor (exportação).
+    """
+    if page.start is not None:
+        stmt = stmt.where(Session.session_start >= page.start)
+    if page.end is not None:
+        stmt = stmt.where(Session.session_start < page.end)
+    if page.after is not None:
+        # comparação de linha: o SQLite e o PostgreSQL usam como faixa do índice,
+        # o equivalente com OR faria o banco percorrer as páginas anteriores
+        stmt = stmt.where(tuple_(Session.session_start, Session.session_id) < page.after)
+    stmt = stmt.order_by(Session.session_start.desc(), Session.session_id.desc())
+    if page.limit is not None:
+        stmt = stmt.limit(page.limit + 1 if lookahead else page.limit)
+    return stmt
+
+def split_page(rows: list, page: SessionPage) -> tuple[list, str | None]:
+    """Separa a linha extra do apply_page e gera o cursor da próxima página."""
+    if page.limit is None or len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.session_start, last.session_id)
@@ -1,20 +1,26 @@
+import asyncio
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession 
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
-from typing import List
 
 from models import Machine, Session,SystemMetrics,Lab,Student
-from schemas import SessionCreate,SessionResponse
+from schemas import (
+    SessionCreate,SessionResponse,SessionPageResponse,SessionBatchCreate,SessionBatchItemResult,SessionBatchResponse
+)
+from session.pagination import SessionPage, apply_page, split_page
+from session.export import stream_export
 from student.student_handler import verify_student
+from auth.hashing import verify_password, verify_password_cached, get_password_hash
+from cache.entities import get_machine_row
+from session.write_behind import session_writer
 
-async def post_new_session(machine_key: str, session: SessionCreate, db: AsyncSession):
-    # Verifica se a máquina existe
-    machine_result = await db.execute(select(Machine).filter(Machine.machine_key == machine_key))
-    machine_config_obj = machine_result.scalars().first()
+async def _validate_new_session(machine_key: str, session: SessionCreate, db: AsyncSession) -> tuple[dict, Student]:
+    # Verifica se a máquina existe (cache de entidades, só o lab_id é usado)
+    machine_row = await get_machine_row(db, machine_key)
     
-    if not machine_config_obj:
+    if not machine_row:
         raise HTTPException(status_code=404, detail="Computador não foi encontrado.")
     
     # Nome do estudante convertido para minúsculas
@@ -30,13 +36,18 @@ async def post_new_session(machine_key: str, session: SessionCreate, db: AsyncSe
 
     if not student_obj:
         raise HTTPException(status_code=404, detail="Estudante não encontrado.")
-    
+
+    return machine_row, student_obj
+
+async def post_new_session(machine_key: str, session: SessionCreate, db: AsyncSession):
+    machine_row, student_obj = await _validate_new_session(machine_key, session, db)
+
     # Criar a sessão
     db_session = Session(
         session_start=session.session_start,
         machine_key=machine_key,
         student_id=student_obj.student_id,
-        lab_id=machine_config_obj.lab_id
+        lab_id=machine_row["lab_id"]
     )
     
     # Criar as métricas do sistema
@@ -63,102 +74,193 @@ async def post_new_session(machine_key: str, session: SessionCreate, db: AsyncSe
 
     return {"message": "Sessão registrada com sucesso!"}
 
-async def get_sessions_for_lab(lab_id: str, db: AsyncSession) -> List[SessionResponse]:
-    lab_result = await db.execute(
-        select(Lab).where(Lab.lab_id == lab_id)
+async def queue_new_session(machine_key: str, session: SessionCreate, db: AsyncSession):
+    """Como post_new_session, mas a gravação fica para o write-behind (session/write_behind.py)."""
+    machine_row, student_obj = await _validate_new_session(machine_key, session, db)
+    session_writer.enqueue(dict(
+        session_start=session.session_start.isoformat(), # o journal guarda JSON
+        machine_key=machine_key,
+        student_id=student_obj.student_id,
+        lab_id=machine_row["lab_id"],
+        cpu_usage=session.cpu_usage,
+        ram_usage=session.ram_usage,
+        cpu_temp=session.cpu_temp,
+    ))
+    return {"message": "Sessão recebida com sucesso!"}
+
+async def post_session_batch(batch: SessionBatchCreate, db: AsyncSession) -> SessionBatchResponse:
+    """Registra várias sessões (ex: backlog de um cliente que ficou offline) em uma transação.
+
+    Máquinas e estudantes são buscados de uma vez com IN. Itens com máquina inexistente
+    ou credencial errada são recusados individualmente, sem afetar o resto do lote.
+    """
+    items = batch.sessions
+    machine_keys = {item.machine_key for item in items}
+    student_names = {item.student_name.lower() for item in items}
+
+    machine_result = await db.execute(
+        select(Machine.machine_key, Machine.lab_id).where(Machine.machine_key.in_(machine_keys))
     )
-    lab_obj = lab_result.scalars().first()
-    
-    if not lab_obj:
-        raise HTTPException(status_code=404, detail="Nenhuma lab foi encontrado.")
-    
-    result = await db.execute(
-        select(Session).where(Session.lab == lab_obj).options(
-            selectinload(Session.student),
-            selectinload(Session.machine),
-            selectinload(Session.system_metrics)  # Carrega as métricas do sistema
-        )
+    machine_labs = dict(machine_result.all())
+
+    student_result = await db.execute(
+        select(Student).where(Student.student_name.in_(student_names)).order_by(Student.student_id)
+    )
+    students = {}
+    for student_obj in student_result.scalars():
+        students.setdefault(student_obj.student_name, student_obj) # mesmo critério do .first() do get_student
+
+    # bcrypt do lote todo em paralelo no pool: um hash por estudante novo e uma
+    # verificação por (estudante, senha) de quem já existe
+    new_passwords = {}
+    to_verify = set()
+    for item in items:
+        if item.machine_key not in machine_labs:
+            continue
+        student_name = item.student_name.lower()
+        student_obj = students.get(student_name)
+        if student_obj is None:
+            new_passwords.setdefault(student_name, (item.password, item.class_var))
+        elif student_obj.class_var == item.class_var:
+            to_verify.add((student_name, item.password))
+    to_verify = list(to_verify)
+    new_hashes, verified = await asyncio.gather(
+        asyncio.gather(*(get_password_hash(password) for password, _ in new_passwords.values())),
+        asyncio.gather(*(
+            verify_password_cached(f"student:{students[name].student_id}", password, students[name].password_hash)
+            for name, password in to_verify
+        )),
     )
-    sessions = result.scalars().all()
-
-
-    return [
-        SessionResponse(
-            session_start=s.session_start.strftime("%d/%m/%Y %H:%M:%S"),
-            student_name=s.student.student_name,
-            class_var=s.student.class_var,
-            cpu_usage=s.system_metrics.cpu_usage if s.system_metrics else None,  # Acessando as métricas associadas
-            ram_usage=s.system_metrics.ram_usage if s.system_metrics else None,
-            cpu_temp=s.system_metrics.cpu_temp if s.system_metrics else None,
-            machine_name=s.machine.machine_name,
-            lab_name=lab_obj.lab_name  # Acessando o nome do laboratório
+    checked_passwords = dict(zip(to_verify, verified))
+    for (student_name, (password, class_var)), password_hash in zip(new_passwords.items(), new_hashes):
+        # estudante novo: registra junto com o lote
+        student_obj = Student(student_name=student_name, password_hash=password_hash, class_var=class_var)
+        db.add(student_obj)
+        students[student_name] = student_obj
+        checked_passwords[(student_name, password)] = True
+
+    results = []
+    for index, item in enumerate(items):
+        lab_id = machine_labs.get(item.machine_key)
+        if lab_id is None:
+            results.append(SessionBatchItemResult(index=index, status_code=404, detail="Computador não foi encontrado."))
+            continue
+
+        student_name = item.student_name.lower()
+        student_obj = students[student_name]
+        key = (student_name, item.password)
+        if student_obj.class_var == item.class_var and key not in checked_passwords:
+            # estudante novo repetido no lote com outra senha
+            checked_passwords[key] = await verify_password(item.password, student_obj.password_hash)
+        if student_obj.class_var != item.class_var or not checked_passwords[key]:
+            results.append(SessionBatchItemResult(
+                index=index, status_code=401, detail="Usuário, classe ou senha incorretos."
+            ))
+            continue
+
+        db_session = Session(
+            session_start=item.session_start,
+            machine_key=item.machine_key,
+            student=student_obj,
+            lab_id=lab_id,
+        )
+        db_session.system_metrics = SystemMetrics(
+            cpu_usage=item.cpu_usage,
+            ram_usage=item.ram_usage,
+            cpu_temp=item.cpu_temp,
         )
-        for s in sessions
-    ]
+        db.add(db_session)
+        results.append(SessionBatchItemResult(index=index, status_code=201, detail="Sessão registrada com sucesso!"))
+
+    created = sum(1 for r in results if r.status_code == 201)
+    if created:
+        try:
+            # sem refresh: a resposta não usa os ids gerados
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Erro ao registrar o lote de sessões. Detalhes: {str(e)}",
+            )
+
+    return SessionBatchResponse(created=created, results=results)
+
+def _session_rows():
+    # uma query só com as colunas do SessionResponse, no lugar de três selectinload
+    return (
+        select(
+            Session.session_id,
+            Session.session_start,
+            Student.student_name,
+            Student.class_var,
+            SystemMetrics.cpu_usage,
+            SystemMetrics.ram_usage,
+            SystemMetrics.cpu_temp,
+            Machine.machine_name,
+            Lab.lab_name,
+        )
+        .join(Session.student)
+        .join(Session.machine)
+        .join(Session.lab)
+        .join(Session.system_metrics)
+    )
+
+def _to_session_response(row) -> SessionResponse:
+    # linhas do banco já estão no tipo certo: sem validação, o datetime vai direto para o serializador
+    return SessionResponse.model_construct(
+        session_start=row.session_start,
+        student_name=row.student_name,
+        class_var=row.class_var,
+        cpu_usage=row.cpu_usage,
+        ram_usage=row.ram_usage,
+        cpu_temp=row.cpu_temp,
+        machine_name=row.machine_name,
+        lab_name=row.lab_name,
+    )
+
+async def _session_page(stmt, page: SessionPage, db: AsyncSession) -> SessionPageResponse:
+    result = await db.execute(apply_page(stmt, page))
+    rows, next_cursor = split_page(result.all(), page)
+    return SessionPageResponse(items=[_to_session_response(row) for row in rows], next_cursor=next_cursor)
+
+async def get_sessions_for_lab(lab_id: str, db: AsyncSession, page: SessionPage = SessionPage()) -> SessionPageResponse:
+    lab_result = await db.execute(
+        select(Lab.lab_id).where(Lab.lab_id == lab_id)
+    )
+    if lab_result.first() is None:
+        raise HTTPException(status_code=404, detail="Nenhuma lab foi encontrado.")
+
+    return await _session_page(_session_rows().where(Session.lab_id == lab_id), page, db)
 
-async def get_sessions_for_student(student_id: int, db: AsyncSession) -> List[SessionResponse]:
+async def get_sessions_for_student(student_id: int, db: AsyncSession, page: SessionPage = SessionPage()) -> SessionPageResponse:
     student_result = await db.execute(
-        select(Student).where(Student.student_id==student_id)
+        select(Student.student_id).where(Student.student_id==student_id)
     )
-    student_obj = student_result.scalars().first()
-    
-    if not student_obj:
+    if student_result.first() is None:
         raise HTTPException(status_code=404, detail="Nenhum estudante foi encontrado.")
-    
-    
-    result = await db.execute(
-        select(Session).where(Session.student == student_obj).options(
-            selectinload(Session.machine),
-            selectinload(Session.system_metrics),  # Carrega as métricas do sistema
-            selectinload(Session.lab)
-        )
-    )
-    sessions = result.scalars().all()
-
-    return [
-        SessionResponse(
-            session_start=s.session_start.strftime("%d/%m/%Y %H:%M:%S"),
-            student_name=s.student.student_name,
-            class_var=s.student.class_var,
-            cpu_usage=s.system_metrics.cpu_usage if s.system_metrics else None,  # Adicionando as métricas
-            ram_usage=s.system_metrics.ram_usage if s.system_metrics else None,
-            cpu_temp=s.system_metrics.cpu_temp if s.system_metrics else None,
-            machine_name=s.machine.machine_name,
-            lab_name=s.lab.lab_name  # Nome do laboratório associado à sessão
-        )
-        for s in sessions
-    ]
 
-async def get_sessions_for_machine(machine_key: str, db: AsyncSession) -> List[SessionResponse]:
+    return await _session_page(_session_rows().where(Session.student_id == student_id), page, db)
+
+async def get_sessions_for_machine(machine_key: str, db: AsyncSession, page: SessionPage = SessionPage()) -> SessionPageResponse:
     # verifica a existência da máquina
     machine_result = await db.execute(
-        select(Machine).where(Machine.machine_key==machine_key)
+        select(Machine.machine_key).where(Machine.machine_key==machine_key)
     )
-    machine_obj = machine_result.scalars().first()
-    if not machine_obj:
+    if machine_result.first() is None:
         raise HTTPException(status_code=404, detail="Máquina não foi encontrada.")
 
-    result = await db.execute(
-        select(Session).where(Session.machine == machine_obj).options(
-            selectinload(Session.student),
-            selectinload(Session.system_metrics),  # Carrega as métricas do sistema
-            selectinload(Session.lab)
-        )
-    )
-    sessions = result.scalars().all()
-
-    return [
-        SessionResponse(
-            student_name=s.student.student_name,
-            class_var=s.student.class_var,
-            session_start=s.session_start.strftime("%d/%m/%Y %H:%M:%S"),
-            cpu_usage=s.system_metrics.cpu_usage,  # Adicionando as métricas
-            ram_usage=s.system_metrics.ram_usage, 
-            cpu_temp=s.system_metrics.cpu_temp,
-            machine_name=machine_obj.machine_name,
-            lab_name=s.lab.lab_name  # Nome do laboratório associado à sessão
-        )
-        for s in sessions
-    ]
+    return await _session_page(_session_rows().where(Session.machine_key == machine_key), page, db)
 
+async def export_sessions_for_lab(
+    lab_id: str, export_format: str, db: AsyncSession, session_factory, page: SessionPage = SessionPage()
+):
+    lab_result = await db.execute(
+        select(Lab.lab_id).where(Lab.lab_id == lab_id)
+    )
+    if lab_result.first() is None:
+        raise HTTPException(status_code=404, detail="Nenhuma lab foi encontrado.")
 
+    # sem a linha extra: a exportação não devolve cursor, então limit é o total de linhas
+    stmt = apply_page(_session_rows().where(Session.lab_id == lab_id), page, lookahead=False)
+    return stream_export(stmt, export_format, session_factory)
@@ -0,0 +1,268 @@
+"""Gravação assíncrona (write-behind) das sessões do /session/new.
+
+O desktop só precisa saber que o login foi aceito. Com SESSION_WRITE_MODE=write_behind
+o handler valida máquina e estudante, coloca a linha de Session + SystemMetrics
+numa fila e responde 202. Um consumidor em background grava a fila em lotes,
+numa transação por lote, a cada SESSION_WRITE_FLUSH_MS ms ou SESSION_WRITE_BATCH
+linhas (o que vier primeiro).
+
+    fila cheia (SESSION_WRITE_QUEUE)  -> 503 com Retry-After
+    banco fora do ar                  -> o lote fica tentando de novo (backoff até 5 s)
+    erro inesperado                   -> idem, com log e session_write_consumer_errors_total
+    linha inválida no lote            -> grava as outras uma por uma e descarta só ela
+    desligamento                      -> espera a fila esvaziar (SESSION_WRITE_DRAIN_TIMEOUT)
+
+Sem journal, o que estiver na fila se perde se o processo morrer. Com
+SESSION_WRITE_JOURNAL=caminho cada linha é escrita no arquivo antes do 202 e cada
+lote gravado marca um checkpoint; na próxima inicialização as linhas depois do
+último checkpoint são gravadas antes de abrir a fila (as que já estão no banco,
+mesma máquina + aluno + início, são puladas). O arquivo é zerado sempre que a
+fila esvazia. O write+flush sobrevive ao processo morrer; para sobreviver a
+queda de energia use SESSION_WRITE_JOURNAL_FSYNC=1 (um fsync por login).
+
+Com vários workers cada um tem a própria fila, então use um journal por worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.future import select
+
+from models import Session, SystemMetrics
+from monitoring.metrics import counter, gauge, histogram
+from timestamps import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+SESSION_WRITE_MODE = os.getenv("SESSION_WRITE_MODE", "sync") # sync | write_behind
+
+write_queue_depth = gauge("session_write_queue_depth", "Sessões aceitas esperando gravação.")
+write_batch_rows = histogram(
+    "session_write_batch_rows", "Sessões por lote gravado.", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+write_flush_seconds = histogram("session_write_flush_seconds", "Duração de cada transação de lote.")
+write_rows_total = counter("session_write_rows_total", "Sessões por resultado (queued/written/rejected/dropped/replayed).")
+write_flush_errors = counter("session_write_flush_errors_total", "Lotes que falharam e serão tentados de novo.")
+write_consumer_errors = counter(
+    "session_write_consumer_errors_total", "Erros inesperados no consumidor (o lote é tentado de novo)."
+)
+
+def _build(row: dict) -> Session:
+    db_session = Session(
+        session_start=row["session_start"],
+        machine_key=row["machine_key"],
+        student_id=row["student_id"],
+        lab_id=row["lab_id"],
+    )
+    db_session.system_metrics = SystemMetrics(
+        cpu_usage=row["cpu_usage"],
+        ram_usage=row["ram_usage"],
+        cpu_temp=row["cpu_temp"],
+    )
+    return db_session
+
+class SessionWriter:
+    def __init__(self, enabled: bool, queue_size: int, batch_size: int, flush_ms: float,
+                 drain_timeout: float, journal_path: str | None = None, journal_fsync: bool = False):
+        self.enabled = enabled
+        self.queue_size = queue_size
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_ms / 1000
+        self.drain_timeout = drain_timeout
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self._queue: asyncio.Queue | None = None
+        self._consumer: asyncio.Task | None = None
+        self._session_factory = None
+        self._journal = None
+        self._seq = 0
+
+    @property
+    def running(self) -> bool:
+        return self._consumer is not None and not self._consumer.done()
+
+    async def start(self, session_factory):
+        """Grava o que sobrou no journal e inicia o consumidor. Chamado no lifespan."""
+        if not self.enabled or self.running:
+            return
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.journal_path:
+            await self._replay_journal()
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._consumer = asyncio.create_task(self._consume(), name="session-write-behind")
+
+    async def stop(self):
+        """Espera a fila esvaziar (até drain_timeout) e encerra o consumidor."""
+        if self._consumer is None:
+            return
+        consumer, self._consumer = self._consumer, None # enqueue passa a recusar
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except TimeoutError:
+            left = self._queue.qsize()
+            where = "continuam no journal" if self._journal else "foram perdidas"
+            logger.error("write-behind: %d sessões não foram gravadas no desligamento e %s", left, where)
+        consumer.cancel()
+        try:
+            await consumer
+        except asyncio.CancelledError:
+            pass
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    def enqueue(self, row: dict):
+        if not self.running or self._queue.full():
+            write_rows_total.inc(result="rejected")
+            retry_after = random.randint(1, 3)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Servidor ocupado, tente novamente em {retry_after} segundos.",
+                headers={"Retry-After": str(retry_after)},
+            )
+        self._seq += 1
+        if self._journal:
+            self._journal_write({"seq": self._seq, "row": row})
+        self._queue.put_nowait((self._seq, row))
+        write_rows_total.inc(result="queued")
+        write_queue_depth.set(self._queue.qsize())
+
+    def _journal_write(self, entry: dict):
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        if self.journal_fsync:
+            os.fsync(self._journal.fileno())
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            # o consumidor não pode morrer: sem ele o endpoint volta para o modo síncrono
+            # e o que está na fila nunca chega ao banco
+            try:
+                await self._flush_with_retry([row for _, row in batch])
+                if self._journal:
+                    if self._queue.empty():
+                        # tudo que entrou no journal já está no banco
+                        self._journal.seek(0)
+                        self._journal.truncate()
+                    else:
+                        self._journal_write({"done": batch[-1][0]})
+            except Exception:
+                write_consumer_errors.inc()
+                logger.exception("write-behind: erro inesperado no consumidor")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                write_queue_depth.set(self._queue.qsize())
+
+    async def _flush_with_retry(self, rows: list[dict]):
+        delay, one_by_one = 0.1, False
+        while True:
+            try:
+                if one_by_one:
+                    await self._flush_each(rows)
+                else:
+                    await self._flush(rows)
+                return
+            except (IntegrityError, ValueError, TypeError):
+                # alguma linha ficou inválida depois da validação (ex: máquina apagada)
+                one_by_one = True
+                continue
+            except (DBAPIError, OSError) as e:
+                write_flush_errors.inc()
+                logger.warning("write-behind: falha ao gravar lote de %d sessões (%s), tentando de novo", len(rows), e)
+            except Exception:
+                # ex: timeout do pool, que não é DBAPIError
+                write_consumer_errors.inc()
+                logger.exception("write-behind: erro inesperado ao gravar lote de %d sessões, tentando de novo", len(rows))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    async def _flush(self, rows: list[dict]):
+        start = time.monotonic()
+        async with self._session_factory() as db:
+            db.add_all([_build(row) for row in rows])
+            await db.commit()
+        write_flush_seconds.observe(time.monotonic() - start)
+        write_batch_rows.observe(len(rows))
+        write_rows_total.inc(len(rows), result="written")
+
+    async def _flush_each(self, rows: list[dict]):
+        # tira da lista cada linha resolvida: numa nova tentativa as já gravadas não repetem
+        while rows:
+            try:
+                await self._flush(rows[:1])
+            except (IntegrityError, ValueError, TypeError) as e:
+                write_rows_total.inc(result="dropped")
+                logger.error("write-behind: sessão descartada %s (%s)", rows[0], e)
+            rows.pop(0)
+
+    async def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        pending, done = {}, 0
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # última linha cortada pela queda
+                if "done" in entry:
+                    done = max(done, entry["done"])
+                else:
+                    pending[entry["seq"]] = entry["row"]
+        rows = [row for seq, row in sorted(pending.items()) if seq > done]
+        replayed = 0
+        for i in range(0, len(rows), self.batch_size):
+            chunk = await self._skip_existing(rows[i:i + self.batch_size])
+            if chunk:
+                replayed += len(chunk)
+                await self._flush_with_retry(chunk)
+        if replayed:
+            write_rows_total.inc(replayed, result="replayed")
+            logger.warning("write-behind: %d sessões recuperadas do journal", replayed)
+
+    async def _skip_existing(self, rows: list[dict]) -> list[dict]:
+        # o checkpoint é escrito depois do commit: o último lote antes da queda pode já estar no banco
+        def key(row):
+            return (row["machine_key"], parse_timestamp(row["session_start"]), row["student_id"])
+        keys = {key(row) for row in rows}
+        async with self._session_factory() as db:
+            result = await db.execute(
+                # dois IN em vez de (machine_key, session_start) IN: o SQLite só usa o índice assim
+                select(Session.machine_key, Session.session_start, Session.student_id).where(
+                    Session.machine_key.in_({k[0] for k in keys}),
+                    Session.session_start.in_({k[1] for k in keys}),
+                )
+            )
+            existing = {tuple(found) for found in result.all()}
+        return [row for row in rows if key(row) not in existing]
+
+session_writer = SessionWriter(
+    enabled=SESSION_WRITE_MODE == "write_behind",
+    queue_size=int(os.getenv("SESSION_WRITE_QUEUE", 10000)),
+    batch_size=int(os.getenv("SESSION_WRITE_BATCH", 200)),
+    flush_ms=float(os.getenv("SESSION_WRITE_FLUSH_MS", 100)),
+    drain_timeout=float(os.getenv("SESSION_WRITE_DRAIN_TIMEOUT", 30)),
+    journal_path=os.getenv("SESSION_WRITE_JOURNAL") or None,
+    journal_fsync=os.getenv("SESSION_WRITE_JOURNAL_FSYNC", "0").strip().lower() in ("1", "true", "yes", "on"),
+)
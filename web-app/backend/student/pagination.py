@@ -0,0 +1,31 @@
+"""Paginação por keyset da listagem de alunos de um lab.
+
+Os alunos saem em ordem de (student_name, student_id). O cursor é a chave do último
+aluno devolvido, do mesmo jeito que em session/pagination.py.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+
+MAX_STUDENT_PAGE = 1000
+
+@dataclass
+class StudentPage:
+    limit: int | None = None # None devolve tudo (comportamento antigo)
+    after: tuple[str, int] | None = None # (student_name, student_id) do cursor
+    search: str | None = None # trecho do nome, sem diferenciar maiúsculas
+
+def encode_cursor(student_name: str, student_id: int) -> str:
+    # o id vem primeiro porque o nome pode conter "|"
+    raw = f"{student_id}|{student_name}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        student_id, student_name = raw.split("|", 1)
+        return student_name, int(student_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
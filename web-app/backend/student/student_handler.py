@@ -1,4 +1,3 @@
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from sqlalchemy.future import select
@@ -6,14 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession 
 
 from models import Student
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+from auth.hashing import verify_password_cached, get_password_hash
 
 async def get_student(student_name: str, class_var: str, db: AsyncSession) -> Student|None:
     result = await db.execute(select(Student).filter(Student.student_name == student_name.lower()))
@@ -29,7 +21,7 @@ async def get_student(student_name: str, class_var: str, db: AsyncSession) -> St
         )
 
 async def register_student(student_name: str, password: str, class_var: str, db: AsyncSession) -> Student:    
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash(password)
     db_student = Student(
         student_name=student_name.lower(),
         password_hash=hashed_password,
@@ -51,7 +43,7 @@ async def verify_student(student_name: str, password: str, class_var: str, db: A
     student_obj = await get_student(student_name=student_name, class_var=class_var, db=db)
 
     if isinstance(student_obj,Student):
-        if not verify_password(password, student_obj.password_hash):
+        if not await verify_password_cached(f"student:{student_obj.student_id}", password, student_obj.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Usuário, classe ou senha incorretos.",
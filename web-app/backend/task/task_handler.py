@@ -8,8 +8,11 @@ from typing import List
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from models import User,Machine,Task,Lab
+from models import User,Machine,Task,task_machine_association
 from schemas import TaskCreate,TaskResponse
+from cache.versions import LAB_TASKS, bump
+from cache.entities import get_lab_row, get_machine_row
+from auth.membership import verify_lab_member
 
 #TODO: dividir essa função em pequenas tarefas
 async def post_new_task(new_task: TaskCreate, user:User,db:AsyncSession):
@@ -20,17 +23,10 @@ async def post_new_task(new_task: TaskCreate, user:User,db:AsyncSession):
     if task_obj:
         raise HTTPException(status_code=409, detail="Tarefa criada já existe")
     
-    lab_result = await db.execute(select(Lab).where(Lab.lab_id == new_task.lab_id).options(
-                selectinload(Lab.users),
-                selectinload(Lab.machines)
-            ))
-    lab_obj = lab_result.scalars().first()
-
     # verifica existência do lab
-    if not lab_obj:
+    if await get_lab_row(db, new_task.lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
-    if not any(u.user_id == user.user_id for u in lab_obj.users): # verificação se user pode criar um task no lab
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operação não autorizada")
+    await verify_lab_member(lab_id=new_task.lab_id, user=user, db=db) # verificação se user pode criar um task no lab
 
     # transforma as máquinas em obj e verifica se existem e estão no lab
     machine_keys = new_task.machines
@@ -60,6 +56,7 @@ async def post_new_task(new_task: TaskCreate, user:User,db:AsyncSession):
 
     try:
         db.add(db_task)
+        await bump(db, (LAB_TASKS, new_task.lab_id))
         await db.commit()
     except IntegrityError as e:
         await db.rollback()
@@ -70,59 +67,58 @@ async def post_new_task(new_task: TaskCreate, user:User,db:AsyncSession):
     return {"message":"Tarefa registrada com Sucesso!"}
     
 async def get_tasks_for_lab(lab_id:str,user:User,db:AsyncSession) -> List[TaskResponse]:
-    lab_result = await db.execute(select(Lab).where(Lab.lab_id == lab_id)
-                                  .options(selectinload(Lab.users),selectinload(Lab.tasks).selectinload(Task.machines)))
-    lab_obj = lab_result.scalars().first()
-    
     # verifica existência do lab
-    if not lab_obj:
+    if await get_lab_row(db, lab_id) is None:
         raise HTTPException(status_code=404,detail="Lab não foi encontrado")
-    if not any(u.user_id == user.user_id for u in lab_obj.users): # verificação se user pode criar um task no lab
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operação não autorizada")
+    await verify_lab_member(lab_id=lab_id, user=user, db=db)
 
+    tasks_result = await db.execute(
+        select(Task).where(Task.lab_id == lab_id).order_by(Task.task_id).options(selectinload(Task.machines))
+    )
 
     return [
-        TaskResponse(
+        TaskResponse.model_construct(
             task_id=t.task_id,
             task_name=t.task_name,
             task_description=t.task_description,
             is_complete=t.is_complete,
-            task_creation=t.task_creation.isoformat(),
+            task_creation=t.task_creation,
             machine_keys=[m.machine_key for m in t.machines],
             machine_names=[m.machine_name for m in t.machines]
         )
-        for t in lab_obj.tasks
+        for t in tasks_result.scalars()
     ]
 
 async def get_tasks_for_machine(machine_key: str, user: User, db: AsyncSession) -> List[TaskResponse]:
-    result = await db.execute(
-        select(Machine)
-        .where(Machine.machine_key == machine_key)
-        .options(
-            selectinload(Machine.lab).selectinload(Lab.users),  # carrega os usuários do lab
-            selectinload(Machine.tasks).selectinload(Task.machines)  # carrega as tasks da máquina
-        )
-    )
-    machine_obj = result.scalars().first()
+    machine_row = await get_machine_row(db, machine_key)
 
-    if not machine_obj:
+    if not machine_row:
         raise HTTPException(status_code=404, detail="Máquina não foi encontrada")
 
     # Verifica se o usuário está associado ao laboratório da máquina
-    if not any(u.user_id == user.user_id for u in machine_obj.lab.users):
+    if machine_row["lab_id"] is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operação não autorizada")
+    await verify_lab_member(lab_id=machine_row["lab_id"], user=user, db=db)
+
+    tasks_result = await db.execute(
+        select(Task)
+        .join(task_machine_association, task_machine_association.c.task_id == Task.task_id)
+        .where(task_machine_association.c.machine_key == machine_key)
+        .order_by(Task.task_id)
+        .options(selectinload(Task.machines))  # carrega as máquinas de cada task
+    )
 
     return [
-        TaskResponse(
+        TaskResponse.model_construct(
             task_id=t.task_id,
             task_name=t.task_name,
             task_description=t.task_description,
             is_complete=t.is_complete,
-            task_creation=t.task_creation.isoformat(),
+            task_creation=t.task_creation,
             machine_keys=[m.machine_key for m in t.machines],
             machine_names=[m.machine_name for m in t.machines]
         )
-        for t in machine_obj.tasks
+        for t in tasks_result.scalars()
     ]
 
 async def complete_task(task_id:int,user:User,db:AsyncSession):
@@ -140,6 +136,7 @@ async def complete_task(task_id:int,user:User,db:AsyncSession):
     
     task_obj.is_complete = True
     try: 
+        await bump(db, (LAB_TASKS, task_obj.lab_id))
         await db.commit()
         await db.refresh(task_obj)
 
@@ -0,0 +1,7 @@
+"""Roda o harness.query_plans com volume de fundo pequeno: nenhuma query dos handlers pode fazer SCAN completo."""
+import asyncio
+
+from harness import query_plans
+
+def test_handlers_use_indexes():
+    assert asyncio.run(query_plans.main(sessions=2000, verbose=False)) == 0
@@ -0,0 +1,116 @@
+"""Datas e horas no formato de rede.
+
+Internamente tudo é datetime sem fuso (horário local, como as colunas do banco).
+Na entrada os schemas aceitam:
+    DD/MM/AAAA HH:MM:SS e DD/MM/AAAA (formato antigo, do desktop e do frontend)
+    ISO 8601 (com fuso é convertido para o horário local)
+    epoch em segundos (número ou texto)
+Na saída, o header X-Time-Format escolhe o formato da resposta:
+    legacy (padrão): o formato que cada campo sempre teve
+    iso: ISO 8601
+    epoch: segundos desde 1970 (float)
+
+O formato antigo é lido por fatias, sem strptime, e o resultado fica em cache:
+no início da aula dezenas de logins chegam com o mesmo session_start.
+Benchmark em benchmarks/bench_timestamps.py.
+"""
+from contextvars import ContextVar
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Annotated, Union
+
+from fastapi import Header, HTTPException, status
+from pydantic import BeforeValidator, PlainSerializer
+
+LEGACY_DATETIME = "%d/%m/%Y %H:%M:%S"
+LEGACY_DATE = "%d/%m/%Y"
+TIME_FORMATS = ("legacy", "iso", "epoch")
+INVALID_TIMESTAMP = "Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS, DD/MM/AAAA, ISO 8601 ou epoch."
+
+# formato da resposta em andamento, definido por negotiate_time_format
+time_format: ContextVar[str] = ContextVar("time_format", default="legacy")
+
+@lru_cache(maxsize=4096)
+def parse_legacy(value: str) -> datetime:
+    """DD/MM/AAAA HH:MM:SS ou DD/MM/AAAA."""
+    try:
+        if len(value) == 19 and value[2] == value[5] == "/" and value[10] == " " and value[13] == value[16] == ":":
+            digits = value[0:2] + value[3:5] + value[6:10] + value[11:13] + value[14:16] + value[17:19]
+            if digits.isdigit() and digits.isascii():
+                return datetime(
+                    int(value[6:10]), int(value[3:5]), int(value[0:2]),
+                    int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                )
+        elif len(value) == 10 and value[2] == value[5] == "/":
+            digits = value[0:2] + value[3:5] + value[6:10]
+            if digits.isdigit() and digits.isascii():
+                return datetime(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+    except ValueError: # 31/02, 25:00...
+        raise ValueError(INVALID_TIMESTAMP) from None
+    # sem zeros à esquerda (ex: 1/2/2025 7:05:00), aceito pelo strptime de antes
+    for fmt in (LEGACY_DATETIME, LEGACY_DATE):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(INVALID_TIMESTAMP)
+
+def _local(value: datetime) -> datetime:
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def parse_timestamp(value) -> datetime:
+    """Qualquer formato de entrada aceito -> datetime local sem fuso."""
+    if isinstance(value, datetime):
+        return _local(value)
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value)
+    if not isinstance(value, str):
+        raise ValueError(INVALID_TIMESTAMP)
+    value = value.strip()
+    if "/" in value:
+        return parse_legacy(value)
+    try:
+        if value[4:5] == "-": # AAAA-MM-DD...
+            return _local(datetime.fromisoformat(value))
+        return datetime.fromtimestamp(float(value))
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(INVALID_TIMESTAMP) from None
+
+def format_timestamp(value: datetime | date, legacy_format: str | None, date_only: bool = False):
+    """Formata conforme o X-Time-Format da requisição; legacy_format None = ISO no modo legacy."""
+    fmt = time_format.get()
+    if fmt == "epoch":
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, time())
+        return value.timestamp()
+    if fmt == "iso" or legacy_format is None:
+        if date_only and isinstance(value, datetime):
+            value = value.date()
+        return value.isoformat()
+    return value.strftime(legacy_format)
+
+def _wire(legacy_format: str | None, date_only: bool = False):
+    return Annotated[
+        datetime,
+        BeforeValidator(parse_timestamp),
+        PlainSerializer(
+            lambda v: format_timestamp(v, legacy_format, date_only), return_type=Union[str, float], when_used="json"
+        ),
+    ]
+
+# tipos dos schemas: o nome diz o que sai no modo legacy
+LegacyDateTime = _wire(LEGACY_DATETIME)
+LegacyDate = _wire(LEGACY_DATE, date_only=True) # a coluna é Date: o ISO sai sem hora
+IsoDateTime = _wire(None)
+
+async def negotiate_time_format(x_time_format: str | None = Header(None)):
+    """Dependência global (main.py): lê o X-Time-Format da requisição."""
+    fmt = (x_time_format or "legacy").strip().lower()
+    if fmt not in TIME_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"X-Time-Format inválido. Use {', '.join(TIME_FORMATS)}.",
+        )
+    time_format.set(fmt)